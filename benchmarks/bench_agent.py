@@ -0,0 +1,75 @@
+"""
+Offline end-to-end benchmark of the agent pipeline.
+
+Replays recorded tool calls and SQL through the real setup_agent() pipeline with a
+scripted chat model (no network, no API key) against a realistic-size, indexed
+transactions database, and reports per-question latency, SQL time, LLM hops and
+prompt size.
+
+    python benchmarks/bench_agent.py --rounds 3
+    python benchmarks/bench_agent.py --save baseline.json
+    python benchmarks/bench_agent.py --compare baseline.json   # exits 1 on regressions
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from src.benchmark import (  # noqa: E402
+    aggregate,
+    find_regressions,
+    format_report,
+    load_scenario,
+    run_benchmark,
+)
+from src.config import CACHE_DIR, DB_PATH  # noqa: E402
+from src.datagen import generate_database  # noqa: E402
+from src.indexes import ensure_indexes  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH, help="Database to benchmark against")
+    parser.add_argument("--rows", type=int, default=536_000, help="Rows in the synthetic table if --db is missing")
+    parser.add_argument(
+        "--scenario", default=os.path.join(ROOT, "benchmarks", "scenarios", "ecommerce.json"), help="Recorded turns"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Replays of the scenario (medians are reported)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--cache", action="store_true", help="Enable the answer and SQL result caches")
+    parser.add_argument("--save", help="Write the per-question medians to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown per question")
+    args = parser.parse_args()
+
+    db_path = args.db
+    if not os.path.exists(db_path):
+        db_path = os.path.join(CACHE_DIR, f"bench-{args.rows}.db")
+        if not os.path.exists(db_path):
+            print(f"{args.db} not found; building a synthetic {args.rows:,}-row database at {db_path}")
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            generate_database(db_path, args.rows)
+            ensure_indexes(db_path)
+
+    results = run_benchmark(db_path, load_scenario(args.scenario), args.rounds, args.llm_latency, args.cache)
+    print(format_report(results))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(aggregate(results), f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare SQLite engine profiles on the agent's aggregate query workload.
+
+Uses DB_PATH when it exists (the 536k-row Online Retail dataset); otherwise a
+synthetic transactions table of the same size is built, and indexed like
+`python chat_cli.py indexes` would, in a temporary directory.
+
+    python benchmarks/bench_engine.py --repeat 5 --threads 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_community.utilities import SQLDatabase  # noqa: E402
+
+from src.config import (  # noqa: E402
+    DB_PATH,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_POOL_SIZE,
+    SQLITE_TEMP_STORE,
+)
+from src.datagen import generate_database  # noqa: E402
+from src.engine import ENGINE_PROFILES, engine_args  # noqa: E402
+from src.indexes import ensure_indexes  # noqa: E402
+
+QUERIES = [
+    "SELECT Country, SUM(Quantity * UnitPrice) AS revenue FROM transactions GROUP BY Country ORDER BY revenue DESC",
+    "SELECT Description, SUM(Quantity) AS units FROM transactions GROUP BY Description ORDER BY units DESC LIMIT 10",
+    "SELECT substr(InvoiceDate, 1, 7) AS month, SUM(Quantity * UnitPrice) FROM transactions GROUP BY month",
+    "SELECT COUNT(DISTINCT CustomerID) FROM transactions WHERE Country = 'United Kingdom'",
+    "SELECT AVG(UnitPrice) FROM transactions WHERE Description LIKE '%HEART%'",
+]
+
+
+def run_workload(db: SQLDatabase, repeat: int, threads: int) -> float:
+    """Run the query mix repeat times across threads, returning elapsed seconds."""
+    work = QUERIES * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(db.run, work))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH, help="Database to benchmark")
+    parser.add_argument("--rows", type=int, default=536_000, help="Rows in the synthetic table if --db is missing")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of the query mix")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent query threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not os.path.exists(db_path):
+            db_path = os.path.join(tmp, "bench.db")
+            print(f"{args.db} not found; building a synthetic {args.rows:,}-row table")
+            generate_database(db_path, args.rows)
+            ensure_indexes(db_path)
+
+        total = len(QUERIES) * args.repeat
+        for profile in ENGINE_PROFILES:
+            db = SQLDatabase.from_uri(
+                f"sqlite:///{db_path}",
+                engine_args=engine_args(
+                    db_path, profile, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE, SQLITE_POOL_SIZE, SQLITE_TEMP_STORE
+                ),
+            )
+            db.run(QUERIES[0])  # warm the pool and the OS page cache
+            elapsed = run_workload(db, args.repeat, args.threads)
+            print(f"{profile:>8}: {total} queries in {elapsed:.2f}s ({elapsed / total * 1000:.1f} ms/query)")
+            db._engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Measure server throughput with many concurrent simulated users.
+
+Runs the real agent pipeline against a small temporary database with a scripted
+chat model that sleeps to simulate LLM latency, so no API key is needed.
+
+    python benchmarks/bench_server.py --users 50 --turns 4 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+QUESTIONS = {
+    "How many transactions are there?": [
+        {"sql": "SELECT COUNT(*) FROM transactions"},
+        {"answer": "There are 1000 transactions."},
+    ],
+    "Which country has the most revenue?": [
+        {
+            "sql": "SELECT Country, SUM(Quantity * UnitPrice) AS revenue FROM transactions GROUP BY Country "
+            "ORDER BY revenue DESC LIMIT 1"
+        },
+        {"answer": "United Kingdom."},
+    ],
+}
+
+
+def create_database(path: str) -> None:
+    """Create a small transactions table."""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE transactions (InvoiceNo TEXT, StockCode TEXT, Description TEXT, Quantity INTEGER, "
+        "InvoiceDate TEXT, UnitPrice REAL, CustomerID TEXT, Country TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (str(i), f"S{i % 50}", f"Product {i % 50}", i % 7 + 1, "2010-12-01 08:26:00", 1.5, "1", c)
+            for i, c in enumerate(["United Kingdom", "France", "Germany", "EIRE"] * 250)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def simulate_user(client, user: int, turns: int, latencies: list) -> None:
+    """Send a session's questions one after another."""
+    questions = list(QUESTIONS)
+    for turn in range(turns):
+        start = time.perf_counter()
+        response = await client.post(
+            "/chat", json={"question": questions[(user + turn) % len(questions)], "session_id": f"user-{user}"}
+        )
+        response.raise_for_status()
+        await response.json()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args, app) -> None:
+    """Drive the app with concurrent users and print throughput."""
+    latencies: list = []
+    async with TestClient(TestServer(app)) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[simulate_user(client, user, args.turns, latencies) for user in range(args.users)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} requests from {args.users} users in {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(
+        f"latency p50: {latencies[len(latencies) // 2] * 1000:.0f} ms, p95: "
+        f"{latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="Concurrent simulated users")
+    parser.add_argument("--turns", type=int, default=4, help="Questions per user")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated LLM latency per call (seconds)")
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--sql-concurrency", type=int, default=4)
+    parser.add_argument("--max-turns", type=int, default=64)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the answer and SQL caches")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        create_database(db_path)
+
+        from src import agent
+        from src.fake_llm import ScriptedChatModel
+        from src.server import create_app
+
+        executor = agent.setup_agent(
+            use_cache=not args.no_cache,
+            query_cache=None if args.no_cache else agent.create_query_cache(db_path),
+            llm=ScriptedChatModel(scripts=QUESTIONS, latency=args.latency),
+            llm_concurrency=args.llm_concurrency,
+            sql_concurrency=args.sql_concurrency,
+            db_path=db_path,
+            query_plan_log="",
+        )
+        asyncio.run(run(args, create_app(executor, args.max_turns)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Track CLI startup time for the common short-lived invocations.
+
+Each scenario runs chat_cli.py in a fresh interpreter and reports the median
+wall time. "ready" builds the full agent against a small temporary database and
+quits at the first prompt (a placeholder API key is enough; no request is sent).
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CLI = os.path.join(ROOT, "chat_cli.py")
+
+
+def create_database(path: str) -> None:
+    """Create a minimal transactions table."""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE transactions (InvoiceNo TEXT, StockCode TEXT, Description TEXT, Quantity INTEGER, "
+        "InvoiceDate TEXT, UnitPrice REAL, CustomerID TEXT, Country TEXT)"
+    )
+    conn.execute("INSERT INTO transactions VALUES ('1', 'A', 'MUG', 1, '2011-01-01 10:00:00', 2.5, '1', 'France')")
+    conn.commit()
+    conn.close()
+
+
+def time_run(argv: list, env: dict, stdin: str = "") -> float:
+    """Run the CLI once and return its wall time in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, CLI] + argv, input=stdin, env=env, capture_output=True, text=True, cwd=ROOT)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        create_database(db_path)
+        base = dict(os.environ, DB_PATH=db_path, CACHE_DIR=tmp, QUERY_PLAN_LOG="")
+        no_key = {k: v for k, v in base.items() if k != "OPENAI_API_KEY"}
+        with_key = dict(base, OPENAI_API_KEY="sk-placeholder")
+
+        scenarios = [
+            ("--help", ["--help"], no_key, ""),
+            ("config error", [], dict(no_key, OPENAI_API_KEY=""), ""),
+            ("indexes --check", ["indexes", "--check"], no_key, ""),
+            ("ready", [], with_key, "exit\n"),
+        ]
+        for name, argv, env, stdin in scenarios:
+            times = [time_run(argv, env, stdin) for _ in range(args.runs)]
+            print(f"{name:>16}: median {statistics.median(times) * 1000:6.0f} ms  (min {min(times) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,61 +2,303 @@
 Agent setup and initialization.
 """
 
+import sqlite3
+import weakref
+
 from langchain_community.agent_toolkits import create_sql_agent
-from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
 from langchain_community.utilities import SQLDatabase
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_openai import ChatOpenAI
 
-from .config import DB_PATH, MODEL, SYSTEM_PROMPT, TEMPERATURE
-from .memory import get_session_history
+from .cache import AnswerCache, CachedAgent, DatabaseWatcher, QueryResultCache
+from .columnar import TransactionsFrame
+from .concurrency import ConcurrencyLimiter, LimitedChatModel
+from .config import (
+    ANSWER_CACHE_HISTORY_TURNS,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL,
+    CACHE_DIR,
+    COLUMNAR_BACKEND,
+    COMPACT_RESULTS,
+    DB_PATH,
+    EXAMPLE_HINTS,
+    EXAMPLE_MIN_SIMILARITY,
+    EXAMPLE_STORE_PATH,
+    EXAMPLE_STORE_SIZE,
+    HISTORY_MAX_TOKENS,
+    HISTORY_MAX_TURNS,
+    HISTORY_SUMMARIZE,
+    IN_MEMORY_SNAPSHOT,
+    MODEL,
+    PRECOMPUTE_SCHEMA,
+    PRODUCT_LOOKUP,
+    QUERY_PLAN_LOG,
+    QUERY_PLAN_LOG_MAX_BYTES,
+    ROLLUP_TABLES,
+    SALES_TABLE,
+    SCRATCH_RESULTS,
+    SQL_CACHE_MAX_BYTES,
+    SQL_MAX_RESULT_BYTES,
+    SQL_MAX_ROWS,
+    SQL_QUERY_TIMEOUT,
+    SQL_RESULT_PAGE_ROWS,
+    SQL_RESULT_SCAN_ROWS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_POOL_SIZE,
+    SQLITE_PROFILE,
+    SQLITE_TEMP_STORE,
+    SYSTEM_PROMPT,
+    TEMPERATURE,
+    TEMPLATE_FAST_PATH,
+)
+from .engine import engine_args
+from .examples import ExampleAgent, ExampleStore
+from .guards import QueryGuard
+from .indexes import QueryPlanAuditor
+from .memory import HistoryPolicy, get_session_history, get_session_results, summarize_with
+from .products import PRODUCT_LOOKUP_PROMPT, ProductSearch
+from .results import ResultFormatter
+from .rollups import ROLLUPS_PROMPT, rollups_current
+from .sales import SALES_PROMPT, sales_available
+from .schema import SCHEMA_PROMPT, connect_read_only, hidden_tables, load_schema_info
+from .scratch import SessionResultsAgent
+from .snapshot import MemorySnapshot
+from .templates import TemplateAgent, TemplateMatcher
+from .tools import ChatSQLToolkit
+
+
+def create_query_cache(db_path=None):
+    """
+    Create the SQL result cache shared by every agent built from a database.
+
+    Args:
+        db_path (str): Database whose changes flush the cache (defaults to DB_PATH)
+
+    Returns:
+        QueryResultCache instance, or None if the cache is disabled
+    """
+    if SQL_CACHE_MAX_BYTES <= 0:
+        return None
+    return QueryResultCache(SQL_CACHE_MAX_BYTES, DatabaseWatcher(db_path or DB_PATH))
+
+
+def _hidden_tables(connect):
+    """List full-text index tables to keep out of the agent's schema (none if the database is unreadable)."""
+    try:
+        conn = connect()
+    except sqlite3.Error:
+        return []
+    try:
+        return hidden_tables(conn)
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
 
 
-def setup_agent(verbose=False, use_memory=True):
+def setup_agent(
+    verbose=False,
+    use_memory=True,
+    use_cache=True,
+    query_cache=None,
+    precompute_schema=PRECOMPUTE_SCHEMA,
+    llm=None,
+    llm_concurrency=None,
+    sql_concurrency=None,
+    db_path=None,
+    query_plan_log=None,
+    example_store=None,
+    use_templates=TEMPLATE_FAST_PATH,
+    columnar=COLUMNAR_BACKEND,
+    product_lookup=PRODUCT_LOOKUP,
+    use_rollups=ROLLUP_TABLES,
+    use_sales=SALES_TABLE,
+    in_memory=IN_MEMORY_SNAPSHOT,
+    snapshot_progress=None,
+    scratch_results=SCRATCH_RESULTS,
+):
     """
     Initialize the SQL agent with database connection.
 
     Args:
         verbose (bool): Whether to show detailed agent operations
         use_memory (bool): Whether to enable conversation memory
+        use_cache (bool): Whether to serve repeated questions and SQL queries from caches
+        query_cache (QueryResultCache): SQL result cache to share; created when omitted
+        precompute_schema (bool): Whether to put the cached schema in the prompt instead of
+            letting the agent call the introspection tools
+        llm (BaseChatModel): Chat model to use instead of ChatOpenAI (e.g. an offline fake)
+        llm_concurrency (int): Maximum concurrent calls to the LLM (unbounded when None)
+        sql_concurrency (int): Maximum concurrent SQLite queries (unbounded when None)
+        db_path (str): Database to chat with (defaults to DB_PATH)
+        query_plan_log (str): Query plan audit log (defaults to QUERY_PLAN_LOG; "" disables auditing)
+        example_store (ExampleStore): Store of past questions and SQL to share; created from
+            EXAMPLE_STORE_PATH when omitted (unused when EXAMPLE_HINTS is 0)
+        use_templates (bool): Whether to answer common report questions with vetted SQL
+            before falling back to the agent
+        columnar (bool): Whether to give the agent the in-memory transactions_aggregate tool
+        product_lookup (bool): Whether to give the agent the product_lookup tool (only when the
+            product search index has been built)
+        use_rollups (bool): Whether to point the agent and the templates at the materialized
+            rollups (only when they are up to date)
+        use_sales (bool): Whether to point the agent and the templates at the pre-cleaned sales
+            table (only when it has been built)
+        in_memory (bool): Whether to copy the database into memory and run the agent's queries
+            and template answers against the copy, reloading it when the file changes
+        snapshot_progress (callable): Optional callback receiving (bytes copied, total bytes)
+            while the in-memory copy loads
+        scratch_results (bool): Whether to keep each session's last query result as a table the
+            agent can refine follow-up questions from (only with memory)
 
     Returns:
-        Agent executor instance (with memory if enabled)
+        Agent executor instance (with memory, answer cache and template fast path if enabled)
     """
-    # Connect to database
-    db = SQLDatabase.from_uri(f"sqlite:///{DB_PATH}")
+    db_path = db_path or DB_PATH
+    query_plan_log = QUERY_PLAN_LOG if query_plan_log is None else query_plan_log
+
+    # Connect to database with the configured engine profile, or to an in-memory copy of it,
+    # hiding full-text index internals
+    snapshot = None
+    connect = None
+    if in_memory:
+        snapshot = MemorySnapshot(db_path, snapshot_progress)
+        snapshot.load()
+        connection_args = snapshot.engine_args()
+        # Every component reading the database at run time reads the copy
+        connect = snapshot.connect
+    else:
+        connection_args = engine_args(
+            db_path, SQLITE_PROFILE, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE, SQLITE_POOL_SIZE, SQLITE_TEMP_STORE
+        )
+    db = SQLDatabase.from_uri(
+        f"sqlite:///{db_path}",
+        engine_args=connection_args,
+        ignore_tables=_hidden_tables(connect or (lambda: connect_read_only(db_path))),
+    )
+    if snapshot is not None:
+        # Release the in-memory copy with the agent (or at exit)
+        weakref.finalize(db, snapshot.close)
 
     # Initialize LLM
-    llm = ChatOpenAI(model=MODEL, temperature=TEMPERATURE)
+    if llm is None:
+        llm = ChatOpenAI(model=MODEL, temperature=TEMPERATURE)
+    if llm_concurrency:
+        llm = LimitedChatModel(model=llm, limiter=ConcurrencyLimiter(llm_concurrency))
+
+    # Load the schema once so the agent can go straight to sql_db_query
+    schema_info = load_schema_info(db_path, CACHE_DIR) if precompute_schema else None
 
     # Create prompt template with chat history support
+    messages = [("system", SYSTEM_PROMPT)]
+    if schema_info is not None:
+        messages.append(("system", SCHEMA_PROMPT))
+    # Product rows are classified once into the sales table, so queries skip the filters
+    if use_sales and sales_available(db_path):
+        messages.append(("system", SALES_PROMPT))
+    # Resolve product names through the full-text index instead of LIKE scans
+    product_search = ProductSearch(db_path, connect) if product_lookup else None
+    if product_search is not None and not product_search.available():
+        product_search = None
+    if product_search is not None:
+        messages.append(("system", PRODUCT_LOOKUP_PROMPT))
+    # Aggregate questions read the small rollups instead of scanning transactions
+    if use_rollups and rollups_current(db_path):
+        messages.append(("system", ROLLUPS_PROMPT))
+    # Few-shot hints from similar past questions, filled in per turn by ExampleAgent
+    messages.append(MessagesPlaceholder("sql_examples", optional=True))
     prompt_with_history = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
+        messages
+        + [
             MessagesPlaceholder("chat_history", optional=True),
             ("human", "{input}"),
             ("placeholder", "{agent_scratchpad}"),
         ]
     )
 
+    # Keep each session's last result so follow-ups refine it instead of re-running the query
+    session_results = get_session_results() if use_memory and scratch_results else None
+
+    # Serve repeated SQL from the result cache (flushed when the database changes),
+    # log the query plan of every agent-generated query and send results compactly
+    if use_cache and query_cache is None:
+        query_cache = create_query_cache(db_path)
+    toolkit = ChatSQLToolkit(
+        db=db,
+        llm=llm,
+        query_cache=query_cache if use_cache else None,
+        plan_auditor=(
+            QueryPlanAuditor(db_path, query_plan_log, QUERY_PLAN_LOG_MAX_BYTES, connect) if query_plan_log else None
+        ),
+        sql_limiter=ConcurrencyLimiter(sql_concurrency) if sql_concurrency else None,
+        query_guard=QueryGuard(SQL_QUERY_TIMEOUT, SQL_MAX_ROWS, SQL_MAX_RESULT_BYTES),
+        schema_info=schema_info,
+        columnar=TransactionsFrame(db_path, connect=connect) if columnar else None,
+        result_formatter=(
+            ResultFormatter(SQL_RESULT_PAGE_ROWS, SQL_MAX_RESULT_BYTES, SQL_RESULT_SCAN_ROWS)
+            if COMPACT_RESULTS
+            else None
+        ),
+        product_search=product_search,
+        session_results=session_results,
+    )
+
     # Create agent with custom prompt that includes chat history
     agent_executor = create_sql_agent(
         llm=llm,
-        toolkit=SQLDatabaseToolkit(db=db, llm=llm),
+        toolkit=toolkit,
         verbose=verbose,
         agent_type="openai-tools",
         prompt=prompt_with_history,
     )
 
-    # Wrap with memory if enabled
+    # Wrap with memory if enabled, sending the model a summary plus the recent turns
     if use_memory:
-        agent_with_memory = RunnableWithMessageHistory(
+        history_policy = HistoryPolicy(
+            HISTORY_MAX_TURNS,
+            HISTORY_MAX_TOKENS,
+            summarize_with(llm) if HISTORY_SUMMARIZE else None,
+            session_results,
+        )
+        agent_executor = RunnableWithMessageHistory(
             agent_executor,
-            get_session_history,
+            history_policy.session_history,
             input_messages_key="input",
             history_messages_key="chat_history",
         )
-        return agent_with_memory
+        if session_results is not None:
+            agent_executor = SessionResultsAgent(agent_executor)
+
+    # Hint the SQL of similar past questions and learn from every answered one
+    if EXAMPLE_HINTS > 0:
+        if example_store is None:
+            example_store = ExampleStore(EXAMPLE_STORE_PATH or None, EXAMPLE_STORE_SIZE)
+        agent_executor = ExampleAgent(agent_executor, example_store, EXAMPLE_HINTS, EXAMPLE_MIN_SIMILARITY)
+
+    # Serve repeated questions from the answer cache, flushed when the database changes
+    if use_cache and ANSWER_CACHE_SIZE > 0:
+        agent_executor = CachedAgent(
+            agent_executor,
+            AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, DatabaseWatcher(db_path)),
+            get_session_history if use_memory else None,
+            history_turns=ANSWER_CACHE_HISTORY_TURNS,
+            discard_results=session_results.discard if session_results is not None else None,
+        )
+
+    # Answer template questions in milliseconds without the LLM
+    if use_templates:
+        agent_executor = TemplateAgent(
+            agent_executor,
+            TemplateMatcher(
+                db_path,
+                use_rollups,
+                use_sales,
+                connect=connect,
+                timeout=SQL_QUERY_TIMEOUT,
+            ),
+            get_session_history if use_memory else None,
+            session_results.discard if session_results is not None else None,
+        )
 
     return agent_executor
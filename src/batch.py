@@ -0,0 +1,180 @@
+"""
+Batch mode: answer a list of questions concurrently and write the results as JSON lines.
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .memory import clear_memory
+from .server import ChatService
+
+
+def load_questions(lines: Iterable[str]) -> list[dict]:
+    """
+    Parse a batch of questions.
+
+    Each non-empty line is either a plain question, answered in its own session, or a
+    JSON object ``{"question": ..., "session_id": ..., "id": ...}``. Questions sharing a
+    session_id form a follow-up chain answered in order in one session. Blank lines
+    and lines starting with ``#`` are ignored.
+
+    Args:
+        lines: Lines of the batch file
+
+    Returns:
+        Questions as dictionaries with "id", "question" and "session_id"
+    """
+    questions = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        item = json.loads(line) if line.startswith("{") else {"question": line}
+        if not item.get("question"):
+            raise ValueError(f"Line {number} of the batch has no question")
+        question_id = str(item.get("id", number))
+        questions.append(
+            {
+                "id": question_id,
+                "question": item["question"],
+                "session_id": str(item.get("session_id") or f"batch-{question_id}"),
+            }
+        )
+    return questions
+
+
+def load_completed(output_path: str) -> set:
+    """
+    Read which questions already have an answer in a results file.
+
+    Args:
+        output_path: JSON lines file written by a previous run
+
+    Returns:
+        Set of (id, question) pairs whose latest record succeeded
+    """
+    path = Path(output_path)
+    if not path.exists():
+        return set()
+
+    latest = {}
+    with path.open(encoding="utf-8") as results:
+        for line in results:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            latest[(record.get("id"), record.get("question"))] = "error" not in record
+    return {key for key, succeeded in latest.items() if succeeded}
+
+
+def group_chains(questions: list[dict]) -> list[list[dict]]:
+    """
+    Group questions into follow-up chains by session, in order of first appearance.
+
+    Args:
+        questions: Questions returned by load_questions()
+
+    Returns:
+        List of chains, each a list of questions sharing one session
+    """
+    chains: dict[str, list[dict]] = {}
+    for item in questions:
+        chains.setdefault(item["session_id"], []).append(item)
+    return list(chains.values())
+
+
+async def arun_batch(
+    agent,
+    questions: list[dict],
+    output_path: str,
+    concurrency: int = 8,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Answer a batch of questions concurrently, appending one JSON line per answer.
+
+    Chains already fully answered in output_path are skipped, so rerunning the same
+    batch resumes after failures or interruptions. A chain that failed part-way is
+    rerun from its first question in a fresh session, since its follow-ups depend on
+    the earlier answers.
+
+    Args:
+        agent: Agent executor supporting ainvoke()
+        questions: Questions returned by load_questions()
+        output_path: JSON lines file receiving the results
+        concurrency: Maximum number of questions in flight
+        progress: Optional callback receiving each record as it is written
+
+    Returns:
+        Counts of answered, failed and skipped questions and the total wall time
+    """
+    completed = load_completed(output_path)
+    chains = [
+        chain for chain in group_chains(questions) if any((q["id"], q["question"]) not in completed for q in chain)
+    ]
+    summary = {"answered": 0, "failed": 0, "skipped": len(questions) - sum(len(chain) for chain in chains)}
+
+    service = ChatService(agent, max_concurrent_turns=concurrency)
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    with path.open("a", encoding="utf-8") as results:
+
+        def write(record: dict) -> None:
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+            if progress is not None:
+                progress(record)
+
+        async def run_chain(chain: list[dict]) -> None:
+            session_id = chain[0]["session_id"]
+            clear_memory(session_id)
+            for item in chain:
+                record = {"timestamp": time.time(), **item}
+                turn_start = time.perf_counter()
+                try:
+                    response = await service.ask(item["question"], session_id)
+                except Exception as e:
+                    summary["failed"] += 1
+                    record.update(seconds=round(time.perf_counter() - turn_start, 4), error=f"{type(e).__name__}: {e}")
+                    write(record)
+                    # The rest of the chain would be asked without this answer in its history
+                    break
+                summary["answered"] += 1
+                record.update(answer=response["answer"], cached=response["cached"], seconds=response["elapsed"])
+                write(record)
+            clear_memory(session_id)
+
+        await asyncio.gather(*(run_chain(chain) for chain in chains))
+
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def run_batch(
+    agent,
+    questions: list[dict],
+    output_path: str,
+    concurrency: int = 8,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Synchronous wrapper around arun_batch().
+
+    Args:
+        agent: Agent executor supporting ainvoke()
+        questions: Questions returned by load_questions()
+        output_path: JSON lines file receiving the results
+        concurrency: Maximum number of questions in flight
+        progress: Optional callback receiving each record as it is written
+
+    Returns:
+        Counts of answered, failed and skipped questions and the total wall time
+    """
+    return asyncio.run(arun_batch(agent, questions, output_path, concurrency, progress))
@@ -0,0 +1,159 @@
+"""
+Offline end-to-end benchmark of the agent pipeline with a scripted chat model.
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def load_scenario(path: str) -> list[dict]:
+    """
+    Load a recorded scenario.
+
+    A scenario is a JSON list of turns, each ``{"question": ..., "steps": [...]}`` with
+    steps in the ScriptedChatModel format. Turns run in order in one session, so
+    follow-up questions see the earlier turns in their history.
+
+    Args:
+        path: Path to the scenario JSON file
+
+    Returns:
+        List of turns
+    """
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def run_benchmark(
+    db_path: str,
+    scenario: list[dict],
+    rounds: int = 1,
+    llm_latency: float = 0.0,
+    use_cache: bool = False,
+) -> list[dict]:
+    """
+    Run a scenario through the real agent pipeline with a scripted chat model.
+
+    Args:
+        db_path: Database to run the recorded SQL against
+        scenario: Turns returned by load_scenario()
+        rounds: Number of times to replay the scenario, each in a fresh session
+        llm_latency: Simulated seconds per LLM call
+        use_cache: Whether to enable the answer and SQL result caches
+
+    Returns:
+        One result per turn and round with the latency, SQL time, LLM hops and prompt size
+    """
+    # Imported here so loading scenarios or building databases stays cheap
+    from .agent import setup_agent
+    from .examples import ExampleStore
+    from .fake_llm import ScriptedChatModel
+    from .memory import clear_memory
+    from .profiling import TurnProfiler, summarize_turn
+
+    llm = ScriptedChatModel(scripts={turn["question"]: turn["steps"] for turn in scenario}, latency=llm_latency)
+    # A fresh in-memory example store keeps runs independent of earlier sessions
+    agent_executor = setup_agent(
+        llm=llm, use_cache=use_cache, db_path=db_path, query_plan_log="", example_store=ExampleStore()
+    )
+    profiler = TurnProfiler()
+
+    results = []
+    for round_number in range(rounds):
+        session_id = f"benchmark-{round_number}"
+        for turn in scenario:
+            start = time.perf_counter()
+            response = agent_executor.invoke(
+                {"input": turn["question"]},
+                config={"configurable": {"session_id": session_id}, "callbacks": [profiler]},
+            )
+            seconds = time.perf_counter() - start
+            results.append(
+                {
+                    "round": round_number,
+                    "question": turn["question"],
+                    "seconds": round(seconds, 6),
+                    "cached": bool(response.get("cached")),
+                    **summarize_turn(profiler.take_events()),
+                }
+            )
+        clear_memory(session_id)
+    return results
+
+
+def aggregate(results: list[dict]) -> dict:
+    """
+    Aggregate per-turn results by question, using medians across rounds.
+
+    Args:
+        results: Results returned by run_benchmark()
+
+    Returns:
+        Mapping of question to its median latency, SQL time, LLM hops and prompt size
+    """
+    by_question: dict[str, list[dict]] = {}
+    for result in results:
+        by_question.setdefault(result["question"], []).append(result)
+    return {
+        question: {
+            key: statistics.median(r[key] for r in runs)
+            for key in ("seconds", "sql_seconds", "sql_queries", "llm_calls", "max_prompt_tokens")
+        }
+        for question, runs in by_question.items()
+    }
+
+
+def format_report(results: list[dict]) -> str:
+    """
+    Format benchmark results as a table.
+
+    Args:
+        results: Results returned by run_benchmark()
+
+    Returns:
+        Table with one row per question and a total row
+    """
+    summary = aggregate(results)
+    lines = [f"{'question':<50} {'latency ms':>10} {'SQL ms':>8} {'SQL':>4} {'LLM hops':>8} {'prompt tok':>10}"]
+    for question, row in summary.items():
+        label = question if len(question) <= 50 else question[:47] + "..."
+        lines.append(
+            f"{label:<50} {row['seconds'] * 1000:>10.1f} {row['sql_seconds'] * 1000:>8.1f} "
+            f"{row['sql_queries']:>4.0f} {row['llm_calls']:>8.0f} {row['max_prompt_tokens']:>10.0f}"
+        )
+    total = {key: sum(row[key] for row in summary.values()) for key in ("seconds", "sql_seconds", "llm_calls")}
+    lines.append(
+        f"{'total':<50} {total['seconds'] * 1000:>10.1f} {total['sql_seconds'] * 1000:>8.1f} "
+        f"{'':>4} {total['llm_calls']:>8.0f}"
+    )
+    return "\n".join(lines)
+
+
+def find_regressions(
+    results: list[dict], baseline: dict, tolerance: float = 0.5, min_seconds: float = 0.02
+) -> list[str]:
+    """
+    Compare results against a saved baseline.
+
+    Args:
+        results: Results returned by run_benchmark()
+        baseline: A previous aggregate() output
+        tolerance: Allowed relative slowdown before a question counts as regressed
+        min_seconds: Slowdowns smaller than this are treated as noise
+
+    Returns:
+        Descriptions of the regressed questions (empty if none)
+    """
+    regressions = []
+    for question, row in aggregate(results).items():
+        before: Optional[dict] = baseline.get(question)
+        if before is None:
+            continue
+        slower = row["seconds"] - before["seconds"]
+        if slower > min_seconds and row["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append(f"{question}: {before['seconds'] * 1000:.1f} ms -> {row['seconds'] * 1000:.1f} ms")
+        if row["llm_calls"] > before["llm_calls"]:
+            regressions.append(f"{question}: {before['llm_calls']:.0f} -> {row['llm_calls']:.0f} LLM hops")
+    return regressions
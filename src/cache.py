@@ -0,0 +1,442 @@
+"""
+Caching layers that let repeated questions skip the agent.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+# Agent outputs that describe a failure rather than an answer are never cached
+_UNCACHEABLE_PREFIXES = ("Agent stopped due to",)
+
+
+class DatabaseWatcher:
+    """Detect changes to the SQLite database file backing the agent."""
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the watcher.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = str(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def version(self) -> tuple:
+        """
+        Return a token that changes whenever the database content changes.
+
+        The token combines the inode, size and mtime of the database file and its
+        WAL file with SQLite's ``PRAGMA data_version``, which catches commits made
+        by other connections even when the file metadata has not moved yet.
+
+        Returns:
+            Hashable version token
+        """
+        try:
+            main = os.stat(self.db_path)
+        except OSError:
+            self.close()
+            return ("missing",)
+
+        try:
+            wal = os.stat(self.db_path + "-wal")
+            wal_token = (wal.st_size, wal.st_mtime_ns)
+        except OSError:
+            wal_token = None
+
+        return (main.st_ino, main.st_size, main.st_mtime_ns, wal_token, self._data_version(main.st_ino))
+
+    def _data_version(self, inode: int) -> Optional[int]:
+        """Read PRAGMA data_version on a long-lived read-only connection."""
+        with self._lock:
+            try:
+                if self._conn is None or self._conn_inode != inode:
+                    self._close_locked()
+                    self._conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+                    self._conn_inode = inode
+                return self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                self._close_locked()
+                return None
+
+    def close(self) -> None:
+        """Close the watcher's database connection."""
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._conn_inode = None
+
+
+class AnswerCache:
+    """Size-bounded LRU cache of agent answers with a TTL and database invalidation."""
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: float = 3600.0,
+        watcher: Optional[DatabaseWatcher] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of answers kept
+            ttl: Seconds an answer stays valid
+            watcher: Database watcher; the cache is flushed when its version changes
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.watcher = watcher
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._version: Any = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached answer.
+
+        Args:
+            key: Cache key from make_answer_key()
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, answer: str) -> None:
+        """
+        Store an answer, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key from make_answer_key()
+            answer: Final answer text
+        """
+        if self.max_size <= 0 or not isinstance(answer, str) or answer.startswith(_UNCACHEABLE_PREFIXES):
+            return
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (self.clock() + self.ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self) -> None:
+        """Flush the cache if the database changed since the last access."""
+        if self.watcher is None:
+            return
+        version = self.watcher.version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivially different phrasings share a cache entry.
+
+    Args:
+        question: Raw user question
+
+    Returns:
+        Lowercased question with collapsed whitespace and no trailing punctuation
+    """
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?!. ")
+
+
+def make_answer_key(question: str, history_messages: Optional[list] = None, history_turns: int = 2) -> str:
+    """
+    Build the cache key for a question in its conversational context.
+
+    Only the last ``history_turns`` question/answer pairs are fingerprinted: they are
+    what a follow-up question can refer to, and keeping the window small lets
+    repeated questions in fresh sessions share answers.
+
+    Args:
+        question: Raw user question
+        history_messages: Session messages preceding the question
+        history_turns: Number of recent turns included in the fingerprint
+
+    Returns:
+        Hex digest identifying the question and its relevant history
+    """
+    digest = hashlib.sha256(normalize_question(question).encode("utf-8"))
+    recent = (history_messages or [])[-2 * history_turns :] if history_turns > 0 else []
+    for message in recent:
+        digest.update(b"\x00")
+        digest.update(message.type.encode("utf-8"))
+        digest.update(b"\x01")
+        digest.update(str(message.content).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedAgent:
+    """Serve repeated questions from an AnswerCache before invoking the agent."""
+
+    def __init__(
+        self,
+        agent,
+        cache: AnswerCache,
+        get_session_history: Optional[Callable[[str], Any]] = None,
+        history_turns: int = 2,
+        discard_results: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize the wrapper.
+
+        Args:
+            agent: Agent executor (optionally wrapped with message history)
+            cache: Answer cache to consult
+            get_session_history: Session history factory; cache hits are recorded there
+                so follow-up questions still see them
+            history_turns: Number of recent turns included in the cache key
+            discard_results: Called with the session id on a cache hit, to drop the session's
+                saved last query result, which no longer belongs to the latest answer
+        """
+        self.agent = agent
+        self.cache = cache
+        self.get_session_history = get_session_history
+        self.history_turns = history_turns
+        self.discard_results = discard_results
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def invoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Answer from the cache when possible, otherwise invoke the agent."""
+        key, session_id, history = self._prepare(inputs, config)
+        cached = self._hit(key, inputs, session_id, history)
+        if cached is not None:
+            return cached
+        response = self.agent.invoke(inputs, config=config, **kwargs)
+        self.cache.put(key, response.get("output"))
+        return response
+
+    async def ainvoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Async counterpart of invoke()."""
+        key, session_id, history = self._prepare(inputs, config)
+        cached = self._hit(key, inputs, session_id, history)
+        if cached is not None:
+            return cached
+        response = await self.agent.ainvoke(inputs, config=config, **kwargs)
+        self.cache.put(key, response.get("output"))
+        return response
+
+    async def astream_events(self, inputs: dict, config: Optional[dict] = None, **kwargs):
+        """
+        Stream agent events, short-circuiting to a single root end event on a cache hit.
+
+        The final output is taken from the root chain's end event and cached like invoke().
+        """
+        key, session_id, history = self._prepare(inputs, config)
+        cached = self._hit(key, inputs, session_id, history)
+        if cached is not None:
+            yield {
+                "event": "on_chain_end",
+                "name": type(self).__name__,
+                "run_id": "",
+                "parent_ids": [],
+                "tags": [],
+                "metadata": {},
+                "data": {"output": cached},
+            }
+            return
+
+        output = None
+        async for event in self.agent.astream_events(inputs, config=config, **kwargs):
+            if event["event"] == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"].get("output")
+            yield event
+        if isinstance(output, dict):
+            self.cache.put(key, output.get("output"))
+
+    def _prepare(self, inputs: dict, config: Optional[dict]):
+        """Resolve the session history and compute the cache key before the turn runs."""
+        session_id = ((config or {}).get("configurable") or {}).get("session_id", "default")
+        history = self.get_session_history(session_id) if self.get_session_history is not None else None
+        messages = history.messages if history is not None else []
+        return make_answer_key(inputs["input"], messages, self.history_turns), session_id, history
+
+    def _hit(self, key: str, inputs: dict, session_id: str, history) -> Optional[dict]:
+        """Return a response for a cache hit, recording the turn in the session history."""
+        answer = self.cache.get(key)
+        if answer is None:
+            return None
+        if self.discard_results is not None:
+            self.discard_results(session_id)
+        if history is not None:
+            history.add_user_message(inputs["input"])
+            history.add_ai_message(answer)
+        return {"input": inputs["input"], "output": answer, "cached": True}
+
+
+# Statements whose results may be cached; everything else bypasses the query cache
+_CACHEABLE_SQL = re.compile(r"^\s*(select|with|values)\b", re.IGNORECASE)
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|\s+|[^'\"\s/-]+|[-/]", re.DOTALL)
+
+
+def canonicalize_sql(sql: str) -> str:
+    """
+    Canonicalize SQL text so formatting differences share a cache entry.
+
+    Comments are dropped, whitespace is collapsed, keywords and identifiers are
+    lowercased and trailing semicolons removed. String literals are left untouched
+    because their case is significant.
+
+    Args:
+        sql: SQL text produced by the agent
+
+    Returns:
+        Canonical SQL text
+    """
+    parts = []
+    for token in _SQL_TOKENS.findall(sql):
+        if token.startswith("'"):
+            parts.append(token)
+        elif token.startswith(("--", "/*")) or token.isspace():
+            parts.append(" ")
+        else:
+            parts.append(token.lower())
+    return re.sub(r"\s+", " ", "".join(parts)).strip().rstrip(";").strip()
+
+
+class QueryResultCache:
+    """LRU cache of SQL results bounded by total result size, invalidated on database changes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, watcher: Optional[DatabaseWatcher] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Maximum combined size of cached results
+            watcher: Database watcher; the cache is flushed when its version changes
+        """
+        self.max_bytes = max_bytes
+        self.watcher = watcher
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, tuple[Any, int]]" = OrderedDict()
+        self._version: Any = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, sql: str) -> Optional[Any]:
+        """
+        Look up the cached result of a query.
+
+        Args:
+            sql: SQL text (canonicalized internally)
+
+        Returns:
+            The cached result, or None on a miss or for uncacheable statements
+        """
+        if not _CACHEABLE_SQL.match(sql):
+            return None
+        key = canonicalize_sql(sql)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, sql: str, result: Any, size: Optional[int] = None) -> None:
+        """
+        Store the result of a query, evicting least recently used results to fit.
+
+        Args:
+            sql: SQL text (canonicalized internally)
+            result: Query result as returned by the query tool
+            size: Result size in bytes; defaults to the UTF-8 length of str(result)
+        """
+        if not _CACHEABLE_SQL.match(sql):
+            return
+        size = len(str(result).encode("utf-8")) if size is None else size
+        if size > self.max_bytes:
+            return
+        key = canonicalize_sql(sql)
+        with self._lock:
+            self._check_version()
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Report cache counters.
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries and bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    def _check_version(self) -> None:
+        """Flush the cache if the database changed since the last access."""
+        if self.watcher is None:
+            return
+        version = self.watcher.version()
+        if version != self._version:
+            self._entries.clear()
+            self.current_bytes = 0
+            self._version = version
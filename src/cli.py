@@ -3,14 +3,55 @@ Command-line interface for the database chatbot.
 """
 
 import argparse
+import asyncio
+import os
+import sqlite3
 import sys
+import time
 
-from .agent import setup_agent
-from .config import validate_config
-from .utils import Spinner
+from .cache import DatabaseWatcher, QueryResultCache
+from .config import (
+    BATCH_CONCURRENCY,
+    CACHE_DIR,
+    DB_PATH,
+    IN_MEMORY_SNAPSHOT,
+    LLM_MAX_CONCURRENCY,
+    PRECOMPUTE_SCHEMA,
+    PROFILE_LOG,
+    QUERY_PLAN_LOG,
+    SERVER_HOST,
+    SERVER_MAX_CONCURRENT_TURNS,
+    SERVER_PORT,
+    SQL_CACHE_MAX_BYTES,
+    SQLITE_MAX_CONCURRENCY,
+    validate_config,
+    validate_database,
+)
+from .datagen import generate_database
+from .engine import enable_wal
+from .indexes import ensure_indexes, missing_indexes, summarize_audit_log
+from .ingest import ingest_sources
+from .products import ensure_product_search, product_search_state
+from .rollups import refresh_rollups, rollups_current
+from .sales import ensure_sales_table, sales_state
+from .schema import load_schema_info
+from .streaming import stream_answer
+from .utils import BackgroundAgent, Spinner
 
 
-def chat_loop(agent_executor, verbose=False, session_id="default"):
+def setup_agent(*args, **kwargs):
+    """
+    Build the agent executor (see agent.setup_agent).
+
+    LangChain and the OpenAI client take seconds to import, so they are only loaded
+    when an agent is actually built, never for --help, config errors or `indexes`.
+    """
+    from .agent import setup_agent as build_agent
+
+    return build_agent(*args, **kwargs)
+
+
+def chat_loop(agent_executor, verbose=False, session_id="default", stream=False, profile=None):
     """
     Run the interactive chat loop.
 
@@ -18,6 +59,8 @@ def chat_loop(agent_executor, verbose=False, session_id="default"):
         agent_executor: Initialized agent executor
         verbose (bool): Whether to show detailed operations
         session_id (str): Session identifier for conversation memory
+        stream (bool): Whether to print answer tokens and agent steps as they happen
+        profile (str): JSON lines file receiving per-turn LLM/SQL timings, or None to skip profiling
     """
     print("=" * 60)
     print("E-Commerce Database Chat CLI")
@@ -28,7 +71,23 @@ def chat_loop(agent_executor, verbose=False, session_id="default"):
         print("Verbose mode: ON - Showing background operations")
     print()
 
+    # The agent may still be building in the background while the banner prints
+    if isinstance(agent_executor, BackgroundAgent):
+        agent_executor = agent_executor.result()
+
+    # One event loop for the whole session keeps the async LLM client reusable
+    loop = asyncio.new_event_loop() if stream else None
+
+    profile_log = None
+    callbacks = []
+    if profile:
+        from .profiling import ProfileLog
+
+        profile_log = ProfileLog(profile)
+        callbacks = [profile_log.profiler]
+
     while True:
+        in_turn = False
         try:
             # Get user input
             question = input("\n🔍 Your question: ").strip()
@@ -42,6 +101,15 @@ def chat_loop(agent_executor, verbose=False, session_id="default"):
             if not question:
                 continue
 
+            # From here on, Ctrl-C cancels the question instead of ending the session
+            started = time.perf_counter()
+            in_turn = True
+            if stream:
+                response = stream_answer(agent_executor, question, session_id, loop=loop, callbacks=callbacks)
+                if profile_log is not None:
+                    profile_log.record(question, time.perf_counter() - started, bool(response.get("cached")))
+                continue
+
             # Process question with spinner (unless verbose mode)
             if not verbose:
                 spinner = Spinner("Thinking")
@@ -49,23 +117,61 @@ def chat_loop(agent_executor, verbose=False, session_id="default"):
 
             try:
                 # Invoke with session config for memory support
-                response = agent_executor.invoke(
-                    {"input": question},
-                    config={"configurable": {"session_id": session_id}},
-                )
+                config = {"configurable": {"session_id": session_id}}
+                if callbacks:
+                    config["callbacks"] = callbacks
+                response = agent_executor.invoke({"input": question}, config=config)
             finally:
                 if not verbose:
                     spinner.stop()
 
+            if profile_log is not None:
+                profile_log.record(question, time.perf_counter() - started, bool(response.get("cached")))
+
+            if verbose and response.get("cached"):
+                print("⚡ Answered from cache")
             print(f"💡 Answer: {response['output']}")
 
         except KeyboardInterrupt:
+            if in_turn:
+                cancel_turn(loop)
+                # Record the events of the cancelled turn so they are not counted in the next one
+                if profile_log is not None:
+                    profile_log.record(question, time.perf_counter() - started, error="cancelled")
+                print("\n⏹️  Cancelled. Ask another question or type 'exit'.")
+                continue
             print("\n\nGoodbye!")
             break
         except Exception as e:
+            if in_turn and profile_log is not None:
+                profile_log.record(question, time.perf_counter() - started, error=str(e))
             print(f"\n❌ Error: {str(e)}")
             print("Please try rephrasing your question.")
 
+    if loop is not None:
+        loop.close()
+
+    if profile_log is not None and profile_log.turns:
+        print(f"\nProfile ({profile_log.log_path}):")
+        print(profile_log.format_summary())
+
+
+def cancel_turn(loop=None):
+    """
+    Abort an interrupted turn: interrupt its running SQL and drop its pending async tasks.
+
+    Args:
+        loop: The chat loop's event loop in stream mode, or None
+    """
+    from .guards import cancel_running_queries
+
+    cancel_running_queries()
+    if loop is not None:
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
 
 def parse_args():
     """
@@ -81,24 +187,347 @@ def parse_args():
         action="store_true",
         help="Show detailed background operations (SQL queries, agent reasoning)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run the agent and SQL instead of answering repeated questions from the caches",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the answer token by token and show agent steps as they happen",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Log per-turn LLM and SQL timings, tokens and rows as JSON lines and print a summary table at exit",
+    )
+    parser.add_argument(
+        "--profile-log",
+        metavar="PATH",
+        default=PROFILE_LOG or None,
+        help="File the profile is written to; implies --profile (default: PROFILE_LOG or profile.jsonl)",
+    )
+
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        default=IN_MEMORY_SNAPSHOT,
+        help="Copy the database into memory at startup and answer from the copy (reloaded when the file changes)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    indexes_parser = subparsers.add_parser(
+        "indexes", help="Create or check the indexes, product search index, sales table and rollups"
+    )
+    indexes_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report missing or stale indexes, tables and rollups without changing the database",
+    )
+    indexes_parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Summarize logged agent queries that still fall back to full table scans",
+    )
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the agent over HTTP/WebSocket for many sessions")
+    serve_parser.add_argument("--host", default=SERVER_HOST, help=f"Interface to bind (default: {SERVER_HOST})")
+    serve_parser.add_argument(
+        "--port", type=int, default=SERVER_PORT, help=f"Port to listen on (default: {SERVER_PORT})"
+    )
+
+    batch_parser = subparsers.add_parser("batch", help="Answer a file of questions concurrently, writing JSON lines")
+    batch_parser.add_argument(
+        "questions",
+        help="File with one question (or JSON object with question/session_id/id) per line, or - for stdin",
+    )
+    batch_parser.add_argument(
+        "--output", help="JSON lines results file, appended to and used to resume (default: <questions>.results.jsonl)"
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f"Questions answered at once (default: {BATCH_CONCURRENCY})",
+    )
+
+    generate_parser = subparsers.add_parser("generate", help="Write a synthetic transactions database for load testing")
+    generate_parser.add_argument(
+        "--rows", type=int, default=10_000_000, help="Number of rows to generate (default: 10,000,000)"
+    )
+    generate_parser.add_argument("--output", required=True, help="Path of the database file to create")
+    generate_parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    generate_parser.add_argument(
+        "--batch-size", type=int, default=100_000, help="Rows per insert transaction (default: 100,000)"
+    )
+    generate_parser.add_argument("--force", action="store_true", help="Overwrite the output file if it exists")
+    generate_parser.add_argument(
+        "--no-indexes", action="store_true", help="Skip building the indexes and switching to WAL afterwards"
+    )
+
+    ingest_parser = subparsers.add_parser("ingest", help="Build or extend the database from CSV/Excel exports")
+    ingest_parser.add_argument("sources", nargs="+", help="Online Retail .csv or .xlsx files, in order")
+    ingest_parser.add_argument("--output", default=DB_PATH, help=f"Database file to build (default: {DB_PATH})")
+    ingest_parser.add_argument(
+        "--append", action="store_true", help="Add invoices that are not in the database yet instead of rebuilding it"
+    )
+    ingest_parser.add_argument("--force", action="store_true", help="Rebuild the database if it already exists")
+    ingest_parser.add_argument(
+        "--chunk-size", type=int, default=100_000, help="Rows per batch and insert transaction (default: 100,000)"
+    )
+    ingest_parser.add_argument("--encoding", default="utf-8", help="Text encoding of CSV files (default: utf-8)")
+    ingest_parser.add_argument("--sheet", help="Worksheet of Excel files (default: the first)")
+    ingest_parser.add_argument(
+        "--no-indexes", action="store_true", help="Skip building the indexes and statistics afterwards"
+    )
     return parser.parse_args()
 
 
+def batch(args):
+    """
+    Run the batch command.
+
+    Args:
+        args: Parsed arguments for the batch command
+
+    Returns:
+        Number of questions that failed
+    """
+    from .batch import load_questions, run_batch
+
+    if args.questions == "-":
+        questions = load_questions(sys.stdin)
+        output = args.output or "batch.results.jsonl"
+    else:
+        with open(args.questions, encoding="utf-8") as lines:
+            questions = load_questions(lines)
+        output = args.output or f"{os.path.splitext(args.questions)[0]}.results.jsonl"
+
+    agent_executor = setup_agent(
+        verbose=args.verbose,
+        use_cache=not args.no_cache,
+        llm_concurrency=LLM_MAX_CONCURRENCY,
+        sql_concurrency=SQLITE_MAX_CONCURRENCY,
+    )
+
+    def report(record):
+        status = f"❌ {record['error']}" if "error" in record else "✓"
+        print(f"[{record['id']}] {record['seconds']:6.1f}s {status}  {record['question']}")
+
+    summary = run_batch(agent_executor, questions, output, args.concurrency, progress=report)
+    print(
+        f"\n{summary['answered']} answered, {summary['failed']} failed, {summary['skipped']} already done "
+        f"in {summary['seconds']:.1f}s; results in {output}"
+    )
+    if summary["failed"]:
+        print("Run the same command again to retry the failed questions.")
+    return summary["failed"]
+
+
+def generate(args):
+    """
+    Run the generate command.
+
+    Args:
+        args: Parsed arguments for the generate command
+    """
+    if os.path.exists(args.output) and not args.force:
+        raise FileExistsError(f"{args.output} already exists; pass --force to overwrite it")
+
+    def report(written, seconds):
+        print(f"\r{written:,} / {args.rows:,} rows ({written / max(seconds, 1e-9):,.0f} rows/s)", end="", flush=True)
+
+    written = generate_database(args.output, args.rows, seed=args.seed, batch_size=args.batch_size, progress=report)
+    print(f"\nWrote {written:,} rows to {args.output}")
+    if not args.no_indexes:
+        ensure_indexes(args.output)
+        ensure_product_search(args.output)
+        ensure_sales_table(args.output)
+        refresh_rollups(args.output)
+        enable_wal(args.output)
+        print("Built indexes, the product search index, sales table and rollups, and refreshed statistics.")
+
+
+def ingest(args):
+    """
+    Run the ingest command.
+
+    Args:
+        args: Parsed arguments for the ingest command
+    """
+    if os.path.exists(args.output) and not (args.force or args.append):
+        raise FileExistsError(f"{args.output} already exists; pass --append to add new invoices or --force to rebuild")
+
+    def report(inserted, seconds):
+        print(f"\r{inserted:,} rows ({inserted / max(seconds, 1e-9):,.0f} rows/s)", end="", flush=True)
+
+    summary = ingest_sources(
+        args.output,
+        args.sources,
+        append=args.append,
+        chunk_size=args.chunk_size,
+        encoding=args.encoding,
+        sheet=args.sheet,
+        build_indexes=not args.no_indexes,
+        progress=report,
+    )
+    skipped = f", skipped {summary['skipped']:,} rows of invoices already loaded" if summary["skipped"] else ""
+    print(f"\n{'Appended' if args.append else 'Loaded'} {summary['inserted']:,} rows into {args.output}{skipped}")
+    if not args.no_indexes:
+        enable_wal(args.output)
+        print("Built indexes, the product search index, sales table and rollups, and refreshed statistics.")
+    print(f"Done in {summary['seconds']:.1f}s")
+
+
+def serve(args):
+    """
+    Run the serve command.
+
+    Args:
+        args: Parsed arguments for the serve command
+    """
+    from .server import run_server
+
+    agent_executor = setup_agent(
+        verbose=args.verbose,
+        use_cache=not args.no_cache,
+        llm_concurrency=LLM_MAX_CONCURRENCY,
+        sql_concurrency=SQLITE_MAX_CONCURRENCY,
+    )
+    run_server(agent_executor, args.host, args.port, SERVER_MAX_CONCURRENT_TURNS)
+
+
+def manage_indexes(args):
+    """
+    Run the indexes command.
+
+    Args:
+        args: Parsed arguments for the indexes command
+    """
+    if args.report:
+        if not QUERY_PLAN_LOG:
+            print("Query plan auditing is off; set QUERY_PLAN_LOG to a file to record agent queries.")
+            return
+        scans = summarize_audit_log(QUERY_PLAN_LOG)
+        if not scans:
+            print("No logged queries fell back to full table scans.")
+        for count, sql, tables in scans:
+            print(f"{count:5d}x  SCAN {', '.join(tables)}: {sql}")
+        return
+
+    if args.check:
+        missing = missing_indexes(DB_PATH)
+        print(f"Missing or stale indexes: {', '.join(missing)}" if missing else "All indexes are up to date.")
+        status = product_search_state(DB_PATH)
+        print("Product search index is up to date." if status == "ok" else f"Product search index is {status}.")
+        status = sales_state(DB_PATH)
+        print("Sales table is up to date." if status == "ok" else f"Sales table is {status}.")
+        print("Rollups are up to date." if rollups_current(DB_PATH) else "Rollups are missing or out of date.")
+        return
+
+    changed = ensure_indexes(DB_PATH)
+    for name, state in changed.items():
+        print(f"{'Rebuilt' if state == 'stale' else 'Created'} {name}")
+    status = ensure_product_search(DB_PATH)
+    if status is not None:
+        print(f"{'Rebuilt' if status == 'stale' else 'Created'} the product search index")
+    status = ensure_sales_table(DB_PATH)
+    if status is not None:
+        print(f"{'Rebuilt' if status == 'stale' else 'Created'} the sales table")
+    for name, action in refresh_rollups(DB_PATH).items():
+        print(f"{action.capitalize()} {name}")
+    if enable_wal(DB_PATH):
+        print("Switched the database to WAL journal mode.")
+    print("Indexes are up to date and statistics refreshed.")
+
+
+def check_indexes():
+    """Warn at startup when the managed indexes, product search index, sales table or rollups are missing."""
+    try:
+        missing = missing_indexes(DB_PATH)
+        product_search = product_search_state(DB_PATH)
+        sales = sales_state(DB_PATH)
+    except sqlite3.Error:
+        return
+    if missing:
+        print(f"⚠️  Missing indexes ({', '.join(missing)}); run `python chat_cli.py indexes` to speed up queries.")
+    elif product_search != "ok":
+        print("⚠️  Product search index not built; run `python chat_cli.py indexes` to enable product lookups.")
+    elif sales != "ok":
+        print("⚠️  Sales table not built; run `python chat_cli.py indexes` so queries skip the product filters.")
+    elif not rollups_current(DB_PATH):
+        print("⚠️  Rollups missing or out of date; run `python chat_cli.py indexes` to speed up aggregate questions.")
+
+
+def report_snapshot(copied: int, total: int) -> None:
+    """Print the progress of copying the database into memory."""
+    if copied == 0:
+        print(f"Loading {DB_PATH} into memory (about {total / 1e6:,.0f} MB)…")
+    print(f"\r{copied / max(total, 1):.0%}", end="\n" if copied >= total else "", flush=True)
+
+
 def main():
     """Main entry point for the CLI application."""
     args = parse_args()
 
     try:
+        if args.command == "indexes":
+            validate_database()
+            manage_indexes(args)
+            return
+
+        if args.command == "generate":
+            generate(args)
+            return
+
+        if args.command == "ingest":
+            ingest(args)
+            return
+
         # Validate configuration
         validate_config()
 
-        # Setup agent
-        agent_executor = setup_agent(verbose=args.verbose)
+        if args.command == "serve":
+            check_indexes()
+            serve(args)
+            return
+
+        if args.command == "batch":
+            check_indexes()
+            if batch(args):
+                sys.exit(1)
+            return
+
+        # Build the agent in the background; the index check and schema warmup below
+        # and the banner overlap with the LangChain imports
+        query_cache = None
+        if not args.no_cache and SQL_CACHE_MAX_BYTES > 0:
+            query_cache = QueryResultCache(SQL_CACHE_MAX_BYTES, DatabaseWatcher(DB_PATH))
+        agent_executor = BackgroundAgent(
+            setup_agent,
+            verbose=args.verbose,
+            use_cache=not args.no_cache,
+            query_cache=query_cache,
+            in_memory=args.in_memory,
+            snapshot_progress=report_snapshot,
+        )
+        check_indexes()
+        if PRECOMPUTE_SCHEMA:
+            load_schema_info(DB_PATH, CACHE_DIR)
+        if args.in_memory:
+            # Let the copy finish, and its progress print, before the banner
+            agent_executor.result()
 
         # Start chat loop
-        chat_loop(agent_executor, verbose=args.verbose)
+        profile = args.profile_log or ("profile.jsonl" if args.profile else None)
+        chat_loop(agent_executor, verbose=args.verbose, stream=args.stream, profile=profile)
+
+        if args.verbose and query_cache is not None:
+            stats = query_cache.stats()
+            print(f"SQL cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} cached results")
 
-    except (ValueError, FileNotFoundError) as e:
+    except (ValueError, FileNotFoundError, FileExistsError) as e:
         print(f"Configuration error: {str(e)}")
         sys.exit(1)
     except Exception as e:
@@ -0,0 +1,323 @@
+"""
+In-memory columnar copy of the transactions table for vectorized aggregates.
+"""
+
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+from .cache import DatabaseWatcher
+from .sales import NON_PRODUCT_DESCRIPTIONS
+from .schema import connect_read_only
+
+# Dimensions a query can group by: table columns and date buckets of InvoiceDate
+DIMENSIONS = (
+    "Description",
+    "StockCode",
+    "Country",
+    "CustomerID",
+    "InvoiceNo",
+    "year",
+    "month",
+    "day",
+    "weekday",
+    "hour",
+)
+
+# Metrics a query can compute per group
+METRICS = ("revenue", "quantity", "rows", "orders", "customers", "avg_price")
+
+_AGGREGATIONS = {
+    "revenue": "sum",
+    "quantity": "sum",
+    "rows": "sum",
+    "orders": "nunique",
+    "customers": "nunique",
+    "avg_price": "mean",
+}
+
+_COLUMNS = "InvoiceNo, StockCode, Description, Quantity, InvoiceDate, UnitPrice, CustomerID, Country"
+
+
+class TransactionsFrame:
+    """
+    The transactions table held as compact columns: categorical text, int32 quantities,
+    float32 prices and datetime64 dates.
+
+    The table is loaded in chunks on first use and reloaded when the database changes.
+    Group-bys, top-k and date bucketing then run as vectorized pandas operations
+    instead of SQLite's row-at-a-time execution.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        chunk_size: int = 500_000,
+        connect: Optional[Callable[[], sqlite3.Connection]] = None,
+    ):
+        """
+        Initialize the frame.
+
+        Args:
+            db_path: Path to the SQLite database file
+            chunk_size: Rows read per chunk while loading
+            connect: Opens the connection the table is loaded from (defaults to a read-only
+                connection to db_path; e.g. MemorySnapshot.connect)
+        """
+        self.db_path = db_path
+        self.connect = connect or (lambda: connect_read_only(db_path))
+        self.chunk_size = chunk_size
+        self.watcher = DatabaseWatcher(db_path)
+        self.loads = 0
+        self._frame = None
+        self._products = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def frame(self):
+        """
+        Get the columnar table, loading or reloading it if the database changed.
+
+        Returns:
+            pandas DataFrame with one column per table column
+        """
+        with self._lock:
+            version = self.watcher.version()
+            if self._frame is None or version != self._version:
+                self._frame = self._load()
+                self._products = None
+                self._version = version
+                self.loads += 1
+            return self._frame
+
+    def aggregate(
+        self,
+        group_by: Optional[list] = None,
+        metrics: Optional[list] = None,
+        countries: Optional[list] = None,
+        description_contains: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        products_only: bool = True,
+        returns_only: bool = False,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 20,
+    ) -> tuple[list, list]:
+        """
+        Filter, group and aggregate the transactions.
+
+        Args:
+            group_by: Dimensions from DIMENSIONS (none gives a single total row)
+            metrics: Metrics from METRICS (defaults to revenue)
+            countries: Only include these countries
+            description_contains: Only include descriptions containing this text (case-insensitive)
+            start_date: Only include invoices on or after this ISO date
+            end_date: Only include invoices before this ISO date
+            products_only: Exclude non-product lines, returns and zero prices (as SYSTEM_PROMPT asks)
+            returns_only: Only include returned/cancelled lines (negative quantities)
+            order_by: Metric or dimension to sort by (defaults to the first metric)
+            descending: Sort order
+            limit: Maximum number of groups returned
+
+        Returns:
+            (column names, rows)
+
+        Raises:
+            ValueError: For unknown dimensions, metrics or filter values
+        """
+        import numpy as np
+        import pandas as pd
+
+        group_by = list(group_by or [])
+        metrics = list(metrics or ["revenue"])
+        unknown = [d for d in group_by if d not in DIMENSIONS] + [m for m in metrics if m not in METRICS]
+        if unknown:
+            raise ValueError(
+                f"Unsupported {', '.join(unknown)}; dimensions: {', '.join(DIMENSIONS)}; metrics: {', '.join(METRICS)}"
+            )
+        order_by = order_by or metrics[0]
+        if order_by not in metrics and order_by not in group_by:
+            raise ValueError(f"order_by must be one of the requested metrics or dimensions, not {order_by!r}")
+
+        df = self.frame()
+        mask = np.ones(len(df), dtype=bool)
+        if products_only and not returns_only:
+            mask &= self._product_mask(df)
+        if returns_only:
+            mask &= df["Quantity"].to_numpy() < 0
+        if countries:
+            mask &= df["Country"].isin(countries).to_numpy()
+        if description_contains:
+            categories = df["Description"].cat.categories
+            matching = categories[categories.str.contains(description_contains, case=False, regex=False)]
+            mask &= df["Description"].isin(matching).to_numpy()
+        if start_date:
+            mask &= (df["InvoiceDate"] >= pd.Timestamp(start_date)).to_numpy()
+        if end_date:
+            mask &= (df["InvoiceDate"] < pd.Timestamp(end_date)).to_numpy()
+
+        selected = df[mask]
+        columns = {}
+        # Categorical dimensions are grouped on their integer codes and labelled afterwards
+        labels = {}
+        for dimension in group_by:
+            columns[dimension], categories = _dimension(selected, dimension)
+            if categories is not None:
+                labels[dimension] = categories
+        quantity = selected["Quantity"].to_numpy()
+        if "revenue" in metrics:
+            columns["revenue"] = quantity.astype(np.float64) * selected["UnitPrice"].to_numpy()
+        if "quantity" in metrics:
+            columns["quantity"] = quantity.astype(np.int64)
+        if "avg_price" in metrics:
+            columns["avg_price"] = selected["UnitPrice"].to_numpy().astype(np.float64)
+        if "orders" in metrics:
+            columns["orders"] = selected["InvoiceNo"].cat.codes.to_numpy()
+        if "customers" in metrics:
+            # Unknown customers are stored as -1 and are not counted
+            customers = selected["CustomerID"].to_numpy()
+            columns["customers"] = np.where(customers >= 0, customers, np.nan)
+        if "rows" in metrics:
+            columns["rows"] = np.ones(len(selected), dtype=np.int64)
+        work = pd.DataFrame(columns, index=pd.RangeIndex(len(selected)))
+
+        named = {metric: (metric, _AGGREGATIONS[metric]) for metric in metrics}
+        if group_by:
+            result = work.groupby(group_by, sort=False).agg(**named).reset_index()
+            for dimension, categories in labels.items():
+                codes = result[dimension].to_numpy()
+                # Code -1 marks a missing value, which is not a group
+                present = codes >= 0
+                result = result[present].assign(**{dimension: categories.take(codes[present]).to_numpy()})
+        else:
+            result = pd.DataFrame([[getattr(work[m], _AGGREGATIONS[m])() for m in metrics]], columns=metrics)
+
+        result = result.sort_values(order_by, ascending=not descending, kind="stable").head(limit)
+        names = group_by + metrics
+        rows = [tuple(_plain(value) for value in row) for row in result[names].itertuples(index=False, name=None)]
+        return names, rows
+
+    def _product_mask(self, df):
+        """Rows that are real purchases of real products (cached per load)."""
+        # Kept with the frame it was computed from, so a reload in another thread never
+        # pairs it with a frame of a different length
+        with self._lock:
+            if self._products is None or self._products[0] is not df:
+                categories = df["Description"].cat.categories
+                bad = categories.isin(NON_PRODUCT_DESCRIPTIONS) | categories.str.contains("adjust", case=False)
+                good_codes = (~bad).nonzero()[0]
+                codes = df["Description"].cat.codes.to_numpy()
+                mask = (
+                    (df["UnitPrice"].to_numpy() > 0)
+                    & (df["Quantity"].to_numpy() > 0)
+                    & (codes >= 0)
+                    & _isin_codes(codes, good_codes, len(categories))
+                )
+                self._products = (df, mask)
+            return self._products[1]
+
+    def _load(self):
+        """Read the table in chunks into compact columns."""
+        import numpy as np
+        import pandas as pd
+        from pandas.api.types import union_categoricals
+
+        text = {"InvoiceNo": [], "StockCode": [], "Description": [], "Country": []}
+        numeric = {"Quantity": [], "UnitPrice": [], "CustomerID": [], "InvoiceDate": []}
+        conn = self.connect()
+        try:
+            for chunk in pd.read_sql_query(f"SELECT {_COLUMNS} FROM transactions", conn, chunksize=self.chunk_size):
+                for column in text:
+                    text[column].append(chunk[column].astype("category"))
+                numeric["Quantity"].append(chunk["Quantity"].fillna(0).to_numpy(dtype=np.int32))
+                numeric["UnitPrice"].append(chunk["UnitPrice"].to_numpy(dtype=np.float32))
+                # CustomerID may be stored as TEXT or REAL; unknown customers become -1
+                customers = pd.to_numeric(chunk["CustomerID"], errors="coerce").fillna(-1)
+                numeric["CustomerID"].append(customers.to_numpy(dtype=np.int32))
+                numeric["InvoiceDate"].append(
+                    pd.to_datetime(chunk["InvoiceDate"], format="ISO8601").to_numpy(dtype="datetime64[s]")
+                )
+        finally:
+            conn.close()
+
+        if not text["InvoiceNo"]:
+            return pd.DataFrame(
+                {
+                    **{column: pd.Categorical([]) for column in text},
+                    "Quantity": np.array([], dtype=np.int32),
+                    "UnitPrice": np.array([], dtype=np.float32),
+                    "CustomerID": np.array([], dtype=np.int32),
+                    "InvoiceDate": np.array([], dtype="datetime64[s]"),
+                }
+            )
+        return pd.DataFrame(
+            {
+                **{column: union_categoricals(parts) for column, parts in text.items()},
+                **{column: np.concatenate(parts) for column, parts in numeric.items()},
+            }
+        )
+
+
+def _isin_codes(codes, good_codes, n_categories):
+    """Vectorized membership of categorical codes in a set of codes."""
+    import numpy as np
+
+    lookup = np.zeros(n_categories + 1, dtype=bool)
+    lookup[good_codes] = True
+    # Code -1 (missing) maps to the extra last slot, which stays False
+    return lookup[codes]
+
+
+def _dimension(df, dimension: str):
+    """
+    Column (or date bucket) to group by.
+
+    Returns:
+        (values, categories): integer codes and their labels for categorical dimensions,
+        or the values themselves and None
+    """
+    dates = df["InvoiceDate"]
+    if dimension == "year":
+        return dates.dt.year.to_numpy(), None
+    if dimension == "month":
+        return _codes(_months(dates))
+    if dimension == "day":
+        return _codes(_days(dates))
+    if dimension == "weekday":
+        return dates.dt.day_name().to_numpy(), None
+    if dimension == "hour":
+        return dates.dt.hour.to_numpy(), None
+    if dimension == "CustomerID":
+        return df["CustomerID"].to_numpy(), None
+    return _codes(df[dimension].array)
+
+
+def _codes(categorical):
+    """Split a Categorical into its codes and categories."""
+    return categorical.codes, categorical.categories
+
+
+def _months(dates):
+    """Year-month labels, formatting each distinct month once."""
+    import pandas as pd
+
+    months = dates.to_numpy().astype("datetime64[M]")
+    return pd.Categorical(months).rename_categories(lambda m: str(m)[:7])
+
+
+def _days(dates):
+    """Date labels, formatting each distinct day once."""
+    import pandas as pd
+
+    days = dates.to_numpy().astype("datetime64[D]")
+    return pd.Categorical(days).rename_categories(lambda d: str(d)[:10])
+
+
+def _plain(value):
+    """Convert numpy scalars to rounded Python values for the agent."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
@@ -0,0 +1,146 @@
+"""
+Concurrency limits for shared upstream resources (LLM endpoints, SQLite).
+"""
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+
+class ConcurrencyLimiter:
+    """
+    Bound the number of concurrent users of a resource.
+
+    Threads and coroutines share one semaphore, so the bound holds when sync and
+    async callers mix. Coroutines wait for a slot on a worker thread in ahold() so
+    the event loop is never blocked, and nothing is tied to a particular loop.
+    """
+
+    def __init__(self, max_concurrency: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrency: Maximum number of simultaneous holders
+        """
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.peak = 0
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self):
+        """Hold a slot, blocking the calling thread until one is free."""
+        with self._semaphore:
+            self._enter()
+            try:
+                yield
+            finally:
+                self._exit()
+
+    @asynccontextmanager
+    async def ahold(self):
+        """Hold a slot without blocking the event loop while waiting."""
+        await self._acquire()
+        try:
+            self._enter()
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            self._semaphore.release()
+
+    async def _acquire(self) -> None:
+        if self._semaphore.acquire(blocking=False):
+            return
+        waiter = asyncio.ensure_future(asyncio.to_thread(self._semaphore.acquire))
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The worker thread cannot be interrupted; give its slot back once it gets one
+            waiter.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, waiter: asyncio.Future) -> None:
+        if not waiter.cancelled() and waiter.exception() is None:
+            self._semaphore.release()
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+class LimitedChatModel(BaseChatModel):
+    """Chat model wrapper that bounds the number of in-flight calls to the wrapped model."""
+
+    model: BaseChatModel
+    limiter: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"limited-{self.model._llm_type}"
+
+    def bind_tools(self, tools, **kwargs):
+        """Bind tools using the wrapped model's formatting, keeping calls routed through the limiter."""
+        binding = self.model.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(binding, "kwargs", {}))
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        with self.limiter.hold():
+            return self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async with self.limiter.ahold():
+            return await self.model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _should_stream(self, *, async_api: bool, run_manager=None, **kwargs: Any) -> bool:
+        # Stream exactly when the wrapped model would, so token streaming survives the wrapper
+        return self.model._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        # The slot is held until the last chunk, since the upstream call is in flight until then
+        with self.limiter.hold():
+            yield from self.model._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.limiter.ahold():
+            async for chunk in self.model._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
@@ -18,6 +18,118 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL = os.getenv("MODEL", "gpt-4o-mini")
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0"))
 
+# Answer cache configuration (size 0 disables the cache)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_HISTORY_TURNS = int(os.getenv("ANSWER_CACHE_HISTORY_TURNS", "2"))
+
+# SQLite engine profile for the agent: "tuned" opens pooled read-only connections with
+# mmap, a larger page cache and the temp storage set by SQLITE_TEMP_STORE (SQLite's own
+# default unless changed); "default" keeps driver defaults
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_MMAP_SIZE = int(float(os.getenv("SQLITE_MMAP_SIZE_MB", "256")) * 1024 * 1024)
+SQLITE_CACHE_SIZE = int(float(os.getenv("SQLITE_CACHE_SIZE_MB", "64")) * 1024 * 1024)
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+# "memory" keeps sorts off disk but was slower for large GROUP BY sorts, so it is opt-in
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "default").lower()
+
+# Conversation history sent to the model: recent turns kept verbatim, older turns folded
+# into a rolling summary (HISTORY_SUMMARIZE=false drops them), all within a token budget
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "6"))
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "2000"))
+HISTORY_SUMMARIZE = os.getenv("HISTORY_SUMMARIZE", "true").lower() in ("1", "true", "yes")
+
+# Tag of the history summarizer's model calls, whose tokens are never part of an answer
+SUMMARY_TAG = "history_summary"
+
+# Session store: hot sessions kept in memory under an LRU and a byte budget; with a
+# SESSION_STORE_PATH they are persisted to SQLite and paged back in after eviction
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1000"))
+SESSION_CACHE_BYTES = int(float(os.getenv("SESSION_CACHE_MB", "64")) * 1024 * 1024)
+
+# Each session's last query result kept as a scratch table the agent can refine follow-ups
+# from, evicted after SCRATCH_RESULTS_TTL seconds or least recently used past the memory
+# budget (results over SCRATCH_RESULTS_MAX_ROWS rows are not kept; false disables)
+SCRATCH_RESULTS = os.getenv("SCRATCH_RESULTS", "true").lower() in ("1", "true", "yes")
+SCRATCH_RESULTS_BYTES = int(float(os.getenv("SCRATCH_RESULTS_MB", "64")) * 1024 * 1024)
+SCRATCH_RESULTS_TTL = float(os.getenv("SCRATCH_RESULTS_TTL", "1800"))
+SCRATCH_RESULTS_MAX_ROWS = int(os.getenv("SCRATCH_RESULTS_MAX_ROWS", "50000"))
+
+# SQL result cache configuration (size 0 disables the cache)
+SQL_CACHE_MAX_BYTES = int(float(os.getenv("SQL_CACHE_SIZE_MB", "64")) * 1024 * 1024)
+
+# Guards on agent-generated SQL: seconds before a query is cancelled, and the maximum
+# rows / result size returned to the agent (0 disables each guard)
+SQL_QUERY_TIMEOUT = float(os.getenv("SQL_QUERY_TIMEOUT", "15"))
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "200"))
+SQL_MAX_RESULT_BYTES = int(float(os.getenv("SQL_MAX_RESULT_KB", "32")) * 1024)
+
+# Send query results to the model as a compact "|"-separated table showing one page of
+# SQL_RESULT_PAGE_ROWS rows plus row count and column statistics, with a paging tool
+# for the rest, instead of the Python repr of every row ("false" restores the repr).
+# Paging stops at SQL_MAX_ROWS rows; the count and statistics cover up to
+# SQL_RESULT_SCAN_ROWS rows.
+COMPACT_RESULTS = os.getenv("COMPACT_RESULTS", "true").lower() in ("1", "true", "yes")
+SQL_RESULT_PAGE_ROWS = int(os.getenv("SQL_RESULT_PAGE_ROWS", "50"))
+SQL_RESULT_SCAN_ROWS = int(os.getenv("SQL_RESULT_SCAN_ROWS", "100000"))
+
+# Introspect the schema once and put it in the prompt instead of using introspection tools
+PRECOMPUTE_SCHEMA = os.getenv("PRECOMPUTE_SCHEMA", "true").lower() in ("1", "true", "yes")
+
+# Directory for on-disk caches (schema descriptions, etc.)
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+# EXPLAIN QUERY PLAN log for agent-generated queries (empty disables auditing), rotated to
+# <file>.1 once it grows past QUERY_PLAN_LOG_MAX_MB
+QUERY_PLAN_LOG = os.getenv("QUERY_PLAN_LOG", os.path.join(CACHE_DIR, "query_plans.jsonl"))
+QUERY_PLAN_LOG_MAX_BYTES = int(float(os.getenv("QUERY_PLAN_LOG_MAX_MB", "16")) * 1024 * 1024)
+
+# Per-turn profile log (empty leaves profiling off unless --profile or --profile-log is given)
+PROFILE_LOG = os.getenv("PROFILE_LOG", "")
+
+# Store of answered questions and their SQL, retrieved as few-shot hints for similar questions
+# (empty EXAMPLE_STORE_PATH keeps examples in memory only; EXAMPLE_HINTS=0 disables hints)
+EXAMPLE_STORE_PATH = os.getenv("EXAMPLE_STORE_PATH", os.path.join(CACHE_DIR, "sql_examples.db"))
+EXAMPLE_STORE_SIZE = int(os.getenv("EXAMPLE_STORE_SIZE", "5000"))
+EXAMPLE_HINTS = int(os.getenv("EXAMPLE_HINTS", "3"))
+EXAMPLE_MIN_SIMILARITY = float(os.getenv("EXAMPLE_MIN_SIMILARITY", "0.3"))
+
+# Answer common report questions (top N products, monthly/total revenue, customer counts)
+# with vetted SQL instead of the LLM
+TEMPLATE_FAST_PATH = os.getenv("TEMPLATE_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+# Load the transactions table into memory as compact columns and give the agent a
+# vectorized transactions_aggregate tool for group-bys, rankings and date buckets
+# (sql_db_query remains the fallback for everything else)
+COLUMNAR_BACKEND = os.getenv("COLUMNAR_BACKEND", "false").lower() in ("1", "true", "yes")
+
+# Copy the database into memory at startup (reloaded when the file changes) and run the
+# agent's queries against the copy; same as passing --in-memory
+IN_MEMORY_SNAPSHOT = os.getenv("IN_MEMORY_SNAPSHOT", "false").lower() in ("1", "true", "yes")
+
+# Point the agent and the templates at the pre-cleaned sales table (product rows only,
+# revenue precomputed; built by `chat_cli.py indexes`) instead of filtering transactions
+SALES_TABLE = os.getenv("SALES_TABLE", "true").lower() in ("1", "true", "yes")
+
+# Answer aggregate questions from the materialized rollups (built by `chat_cli.py indexes`
+# and refreshed incrementally by `ingest --append`) when they are up to date
+ROLLUP_TABLES = os.getenv("ROLLUP_TABLES", "true").lower() in ("1", "true", "yes")
+
+# Give the agent the product_lookup tool (full-text index over product descriptions,
+# built by `chat_cli.py indexes`) and steer it there instead of Description LIKE scans
+PRODUCT_LOOKUP = os.getenv("PRODUCT_LOOKUP", "true").lower() in ("1", "true", "yes")
+
+# Server mode: bounds on concurrent upstream LLM calls and concurrent SQLite queries
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+SQLITE_MAX_CONCURRENCY = int(os.getenv("SQLITE_MAX_CONCURRENCY", "4"))
+SERVER_MAX_CONCURRENT_TURNS = int(os.getenv("SERVER_MAX_CONCURRENT_TURNS", "64"))
+
+# Batch mode: questions answered concurrently by `chat_cli.py batch`
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
 # System prompt for the agent
 SYSTEM_PROMPT = """You are an e-commerce data analyst assistant with access to conversation history.
 
@@ -39,7 +151,13 @@ def validate_config():
     if not OPENAI_API_KEY or OPENAI_API_KEY == "your-api-key-here":
         raise ValueError("Please set your OPENAI_API_KEY in the .env file")
 
+    validate_database()
+
+
+def validate_database():
+    """Validate that the database file exists."""
     if not Path(DB_PATH).exists():
         raise FileNotFoundError(
-            f"Database '{DB_PATH}' not found. " "Please run the notebook first to create the database."
+            f"Database '{DB_PATH}' not found. "
+            "Create it from the Online Retail export with: python chat_cli.py ingest <file.csv|file.xlsx>"
         )
@@ -0,0 +1,318 @@
+"""
+Synthetic transactions data shaped like the Online Retail dataset, at any size.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Callable, Iterator, Optional
+
+TRANSACTIONS_DDL = (
+    "CREATE TABLE transactions (InvoiceNo TEXT, StockCode TEXT, Description TEXT, Quantity INTEGER, "
+    "InvoiceDate TEXT, UnitPrice REAL, CustomerID REAL, Country TEXT)"
+)
+
+# Share of invoices per country, roughly as in the original dataset
+COUNTRY_WEIGHTS = {
+    "United Kingdom": 0.89,
+    "Germany": 0.018,
+    "France": 0.016,
+    "EIRE": 0.015,
+    "Spain": 0.0048,
+    "Netherlands": 0.0044,
+    "Belgium": 0.0039,
+    "Switzerland": 0.0037,
+    "Portugal": 0.0028,
+    "Australia": 0.0023,
+    "Norway": 0.002,
+    "Italy": 0.0015,
+    "Channel Islands": 0.0014,
+    "Finland": 0.0013,
+    "Cyprus": 0.0012,
+    "Sweden": 0.0009,
+    "Austria": 0.0007,
+    "Denmark": 0.0007,
+    "Japan": 0.0007,
+    "Poland": 0.0006,
+    "USA": 0.0005,
+    "Israel": 0.0005,
+    "Unspecified": 0.0008,
+    "Singapore": 0.0004,
+    "Iceland": 0.0003,
+    "Canada": 0.0003,
+    "Greece": 0.0003,
+    "Malta": 0.0002,
+    "United Arab Emirates": 0.0001,
+    "European Community": 0.0001,
+    "RSA": 0.0001,
+    "Lebanon": 0.0001,
+    "Lithuania": 0.0001,
+    "Brazil": 0.0001,
+    "Czech Republic": 0.0001,
+    "Bahrain": 0.0001,
+    "Saudi Arabia": 0.0001,
+}
+
+_COLORS = ["WHITE", "RED", "PINK", "BLUE", "GREEN", "IVORY", "BLACK", "CREAM", "PURPLE", "GOLD", "SILVER", "ASSORTED"]
+_MOTIFS = [
+    "HANGING HEART",
+    "RETROSPOT",
+    "VINTAGE",
+    "PAISLEY",
+    "REGENCY",
+    "SPOTTY",
+    "DOLLY GIRL",
+    "SKULL",
+    "CHRISTMAS",
+    "FLORAL",
+    "BIRD",
+    "POLKADOT",
+    "WOODLAND",
+    "ROSE",
+    "STAR",
+]
+_ITEMS = [
+    "T-LIGHT HOLDER",
+    "LUNCH BAG",
+    "MUG",
+    "CAKE CASES",
+    "JUMBO BAG",
+    "CAKESTAND",
+    "DOORMAT",
+    "ALARM CLOCK",
+    "TEA CUP AND SAUCER",
+    "PARTY BUNTING",
+    "WATER BOTTLE",
+    "NAPKINS",
+    "PHOTO FRAME",
+    "CUSHION COVER",
+    "PURSE",
+    "CANDLE",
+    "NOTEBOOK",
+    "LANTERN",
+    "BOWL",
+    "SHOPPING BAG",
+    "STORAGE TIN",
+    "GIFT WRAP",
+    "CHILDRENS APRON",
+    "HOT WATER BOTTLE",
+    "WALL CLOCK",
+]
+
+# Non-product rows: (StockCode, Description, share of invoices, unit price range)
+_ADJUSTMENTS = [
+    ("POST", "POSTAGE", 0.025, (15.0, 40.0)),
+    ("M", "Manual", 0.004, (0.2, 300.0)),
+    ("DOT", "DOTCOM POSTAGE", 0.003, (5.0, 1500.0)),
+    ("C2", "CARRIAGE", 0.001, (50.0, 50.0)),
+    ("BANK CHARGES", "Bank Charges", 0.0005, (15.0, 15.0)),
+    ("AMAZONFEE", "AMAZON FEE", 0.0002, (500.0, 15000.0)),
+]
+
+# Timestamps span the original dataset's period unless told otherwise
+DEFAULT_START = "2010-12-01 08:00:00"
+DEFAULT_END = "2011-12-09 20:00:00"
+
+
+def _catalog(rng, n_products: int) -> tuple:
+    """Build product stock codes, descriptions, base prices and popularity weights."""
+    import numpy as np
+
+    combos = len(_COLORS) * len(_MOTIFS) * len(_ITEMS)
+    picks = rng.permutation(max(combos, n_products))[:n_products]
+    descriptions = []
+    for i, pick in enumerate(picks):
+        if pick >= combos:
+            descriptions.append(f"ASSORTED GIFT SET {i}")
+            continue
+        color, rest = divmod(int(pick), len(_MOTIFS) * len(_ITEMS))
+        motif, item = divmod(rest, len(_ITEMS))
+        descriptions.append(f"{_COLORS[color]} {_MOTIFS[motif]} {_ITEMS[item]}")
+
+    suffixes = np.where(rng.random(n_products) < 0.15, rng.choice(list("ABCDEFGLNPS"), n_products), "")
+    stock_codes = [f"{20000 + i * 17 % 80000}{s}" for i, s in enumerate(suffixes)]
+    prices = np.round(np.clip(rng.lognormal(mean=0.9, sigma=0.8, size=n_products), 0.1, 650.0), 2)
+
+    # Zipf-like popularity: a few best-sellers and a long tail, about as flat as the original's
+    ranks = rng.permutation(n_products) + 1
+    popularity = 1.0 / ranks**0.5
+    return (
+        np.array(stock_codes, dtype=object),
+        np.array(descriptions, dtype=object),
+        prices,
+        popularity / popularity.sum(),
+    )
+
+
+def generate_batches(
+    rows: int,
+    seed: int = 0,
+    batch_size: int = 100_000,
+    n_products: int = 4000,
+    start: str = DEFAULT_START,
+    end: str = DEFAULT_END,
+) -> Iterator[list]:
+    """
+    Generate transactions rows in batches, holding only one batch in memory.
+
+    Invoices have several lines for one customer, country and timestamp, and
+    timestamps increase through the period. About 2% of invoices are cancellations
+    (``C`` invoice numbers, negative quantities), about a quarter have no customer,
+    some lines have a zero price, invoices carry postage and fee rows, and rare
+    ``B`` "Adjust bad debt" rows have negative prices.
+
+    Args:
+        rows: Total number of rows to generate
+        seed: Random seed; the same arguments always produce the same rows
+        batch_size: Approximate number of rows per batch
+        n_products: Size of the product catalog
+        start: First invoice timestamp ("YYYY-MM-DD HH:MM:SS")
+        end: Last invoice timestamp
+
+    Yields:
+        Lists of row tuples in TRANSACTIONS_DDL column order
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    stock_codes, descriptions, base_prices, popularity = _catalog(rng, n_products)
+    countries = np.array(list(COUNTRY_WEIGHTS), dtype=object)
+    country_weights = np.array(list(COUNTRY_WEIGHTS.values()))
+    country_weights /= country_weights.sum()
+
+    # Customers belong to one country; the pool grows with the data like new sign-ups would
+    n_customers = max(100, rows // 120)
+    customer_country = rng.choice(len(countries), size=n_customers, p=country_weights)
+
+    adjustment_codes = np.array([a[0] for a in _ADJUSTMENTS], dtype=object)
+    adjustment_descriptions = np.array([a[1] for a in _ADJUSTMENTS], dtype=object)
+    adjustment_shares = np.array([a[2] for a in _ADJUSTMENTS])
+    adjustment_low = np.array([a[3][0] for a in _ADJUSTMENTS])
+    adjustment_high = np.array([a[3][1] for a in _ADJUSTMENTS])
+
+    quantity_values = np.array([1, 2, 3, 4, 6, 8, 10, 12, 24, 48])
+    quantity_weights = np.array([0.22, 0.14, 0.08, 0.07, 0.12, 0.04, 0.06, 0.18, 0.06, 0.03])
+
+    start_ts = np.datetime64(start.replace(" ", "T"), "s").astype(np.int64)
+    end_ts = np.datetime64(end.replace(" ", "T"), "s").astype(np.int64)
+    mean_lines = 20
+    total_invoices = max(1, rows // mean_lines)
+
+    produced = 0
+    first_invoice = 0
+    while produced < rows:
+        want = min(batch_size, rows - produced)
+
+        # Invoice sizes, with the last invoice cut or padded so the batch has exactly `want` rows
+        lines = np.minimum(rng.geometric(1 / mean_lines, size=want // mean_lines + 1), 600)
+        n_invoices = min(len(lines), int(np.searchsorted(np.cumsum(lines), want)) + 1)
+        lines = lines[:n_invoices]
+        lines[-1] += want - lines.sum()
+        last_line = np.cumsum(lines) - 1
+
+        # Invoice-level attributes
+        invoice_numbers = 536365 + first_invoice + np.arange(n_invoices)
+        cancelled = rng.random(n_invoices) < 0.02
+        has_customer = rng.random(n_invoices) >= 0.25
+        customers = rng.integers(0, n_customers, size=n_invoices)
+        anonymous_country = rng.choice(len(countries), size=n_invoices, p=country_weights)
+        invoice_country = np.where(has_customer, customer_country[customers], anonymous_country)
+        invoice_customer = np.where(has_customer, 12346 + customers, np.nan)
+        position = (first_invoice + np.arange(n_invoices) + rng.random(n_invoices)) / total_invoices
+        timestamps = start_ts + (np.minimum(position, 1.0) * (end_ts - start_ts)).astype(np.int64)
+        invoice_dates = np.char.replace(np.datetime_as_string(timestamps.astype("datetime64[s]")), "T", " ")
+        invoice_labels = np.char.add(np.where(cancelled, "C", ""), invoice_numbers.astype(str)).astype(object)
+
+        # Line-level attributes
+        invoice = np.repeat(np.arange(n_invoices), lines)
+        products = rng.choice(n_products, size=want, p=popularity)
+        codes = stock_codes[products]
+        names = descriptions[products]
+        quantities = rng.choice(quantity_values, size=want, p=quantity_weights)
+        quantities = np.where(rng.random(want) < 0.01, quantities * rng.integers(5, 50, size=want), quantities)
+        prices = np.where(quantities >= 12, np.round(base_prices[products] * 0.85, 2), base_prices[products])
+        prices = np.where(rng.random(want) < 0.005, 0.0, prices)
+
+        # The last line of some invoices is postage, a fee or a manual adjustment
+        adjusted = np.flatnonzero(rng.random(n_invoices) < adjustment_shares.sum())
+        kind = rng.choice(len(_ADJUSTMENTS), size=len(adjusted), p=adjustment_shares / adjustment_shares.sum())
+        rows_adjusted = last_line[adjusted]
+        codes[rows_adjusted] = adjustment_codes[kind]
+        names[rows_adjusted] = adjustment_descriptions[kind]
+        quantities[rows_adjusted] = rng.integers(1, 4, size=len(adjusted))
+        prices[rows_adjusted] = np.round(rng.uniform(adjustment_low[kind], adjustment_high[kind]), 2)
+
+        quantities = np.where(cancelled[invoice], -quantities, quantities)
+        labels = invoice_labels[invoice]
+        customer_ids = invoice_customer[invoice].astype(object)
+        customer_ids[np.isnan(invoice_customer[invoice])] = None
+
+        # Rare bad debt adjustments carry a negative price
+        for row in np.flatnonzero(rng.random(want) < 1 / 250_000):
+            labels[row], codes[row], names[row] = f"A{invoice_numbers[invoice[row]]}", "B", "Adjust bad debt"
+            quantities[row], prices[row], customer_ids[row] = 1, -round(float(rng.uniform(1000, 12000)), 2), None
+
+        yield list(
+            zip(
+                labels.tolist(),
+                codes.tolist(),
+                names.tolist(),
+                quantities.tolist(),
+                invoice_dates[invoice].tolist(),
+                prices.tolist(),
+                customer_ids.tolist(),
+                countries[invoice_country[invoice]].tolist(),
+            )
+        )
+        produced += want
+        first_invoice += n_invoices
+
+
+def generate_database(
+    db_path: str,
+    rows: int,
+    seed: int = 0,
+    batch_size: int = 100_000,
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> int:
+    """
+    Write a synthetic transactions database, streaming one batch per transaction.
+
+    Rows go to ``<db_path>.partial``, which replaces db_path only once every batch
+    is written, so an interrupted run never leaves a truncated database behind.
+
+    Args:
+        db_path: Path of the database file to create
+        rows: Number of rows to generate
+        seed: Random seed
+        batch_size: Rows per batch and per transaction
+        progress: Optional callback receiving (rows written, elapsed seconds) after each batch
+
+    Returns:
+        Number of rows written
+    """
+    partial = f"{db_path}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    start = time.perf_counter()
+    written = 0
+    conn = sqlite3.connect(partial)
+    try:
+        # The partial file is discarded on failure, so durability is not needed while writing
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(TRANSACTIONS_DDL)
+        for batch in generate_batches(rows, seed, batch_size):
+            with conn:
+                conn.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            written += len(batch)
+            if progress is not None:
+                progress(written, time.perf_counter() - start)
+    except BaseException:
+        conn.close()
+        os.remove(partial)
+        raise
+    conn.close()
+    os.replace(partial, db_path)
+    return written
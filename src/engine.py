@@ -0,0 +1,116 @@
+"""
+SQLite engine profiles for the agent's database connection.
+"""
+
+import sqlite3
+
+from .schema import connect_read_only
+
+ENGINE_PROFILES = ("default", "tuned")
+TEMP_STORES = ("default", "file", "memory")
+
+
+def connect_tuned(db_path: str, mmap_size: int, cache_size: int, temp_store: str = "default") -> sqlite3.Connection:
+    """
+    Open a read-only connection tuned for scan-heavy aggregate queries.
+
+    Args:
+        db_path: Path to the SQLite database file
+        mmap_size: Bytes of the database file to memory-map
+        cache_size: Page cache size in bytes (0 keeps SQLite's default)
+        temp_store: Where sorts and temporary b-trees live, one of TEMP_STORES
+
+    Returns:
+        sqlite3 connection usable from any pool thread
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    if cache_size:
+        # A negative cache_size is a size in KiB rather than a page count
+        conn.execute(f"PRAGMA cache_size = {-(int(cache_size) // 1024)}")
+    conn.execute(f"PRAGMA temp_store = {temp_store.upper()}")
+    return conn
+
+
+def engine_args(
+    db_path: str,
+    profile: str = "tuned",
+    mmap_size: int = 256 * 1024 * 1024,
+    cache_size: int = 64 * 1024 * 1024,
+    pool_size: int = 8,
+    temp_store: str = "default",
+) -> dict:
+    """
+    Build SQLAlchemy engine arguments for an engine profile.
+
+    The "tuned" profile opens every pooled connection read-only with mmap and a larger
+    page cache, and keeps up to pool_size connections (plus as many short-lived overflow
+    connections) shared across threads. The "default" profile leaves SQLAlchemy's
+    defaults untouched.
+
+    Args:
+        db_path: Path to the SQLite database file
+        profile: One of ENGINE_PROFILES
+        mmap_size: Bytes of the database file to memory-map
+        cache_size: Page cache size in bytes per connection
+        pool_size: Number of pooled connections kept open
+        temp_store: Where sorts and temporary b-trees live, one of TEMP_STORES
+
+    Returns:
+        Keyword arguments for sqlalchemy.create_engine()
+    """
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile {profile!r}; expected one of {', '.join(ENGINE_PROFILES)}")
+    if temp_store not in TEMP_STORES:
+        raise ValueError(f"Unknown temp_store {temp_store!r}; expected one of {', '.join(TEMP_STORES)}")
+    if profile == "default":
+        return {}
+
+    # Imported here so commands that never build the agent skip SQLAlchemy's import cost
+    from sqlalchemy.pool import QueuePool
+
+    return {
+        "creator": lambda: connect_tuned(db_path, mmap_size, cache_size, temp_store),
+        "poolclass": QueuePool,
+        "pool_size": pool_size,
+        "max_overflow": pool_size,
+    }
+
+
+def journal_mode(db_path: str) -> str:
+    """
+    Read the database's journal mode.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        Journal mode name (e.g. "wal" or "delete")
+    """
+    conn = connect_read_only(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0].lower()
+    finally:
+        conn.close()
+
+
+def enable_wal(db_path: str) -> bool:
+    """
+    Switch the database to write-ahead logging so readers never block on writers.
+
+    WAL is a persistent property of the database file, so this only needs to run
+    once, from a read-write connection.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        True if the journal mode was changed
+    """
+    if journal_mode(db_path) == "wal":
+        return False
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0].lower() == "wal"
+    finally:
+        conn.close()
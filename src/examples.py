@@ -0,0 +1,341 @@
+"""
+Store of answered questions and the SQL that answered them, retrieved as few-shot hints.
+"""
+
+import ast
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import SystemMessage
+
+from .cache import normalize_question
+from .results import parse_table
+from .streaming import count_rows
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS examples (
+    question_key TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    rows INTEGER,
+    columns INTEGER,
+    updated_at REAL NOT NULL
+)
+"""
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about which SQL a question needs
+_STOPWORDS = frozenset(
+    "a an and are as at be by can did do does for from give how i in is it me of on or our please show "
+    "tell that the their there these this those to us was we were what which who with you".split()
+)
+
+# Follow-up questions ("and in the UK?", "which of those sold most?") only make sense with
+# the conversation before them, so their SQL is no example for a question asked afresh
+_FOLLOW_UP = re.compile(
+    r"^\s*(?:and|also|what about|how about)\b"
+    r"|\b(?:it|its|they|them|their|those|these|same|above|previous|former|latter)\b",
+    re.IGNORECASE,
+)
+
+EXAMPLES_PROMPT = """Similar questions were answered correctly before with the SQL below. \
+Reuse the matching pattern (filters, joins, grouping) and adapt it to the current question \
+instead of exploring the schema again:
+
+{examples}"""
+
+
+def tokenize(question: str) -> list[str]:
+    """
+    Split a question into index terms: content words and adjacent word pairs.
+
+    Args:
+        question: User question
+
+    Returns:
+        List of terms, with repeats
+    """
+    words = [w for w in _WORDS.findall(question.lower()) if w not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def result_shape(output) -> Optional[tuple[int, int]]:
+    """
+    Get the (rows, columns) shape of a sql_db_query result.
+
+    Args:
+        output: Tool output
+
+    Returns:
+        Shape of the result, or None if the output is an error
+    """
+    rows = count_rows(output)
+    if rows is None:
+        return None
+    if rows == 0:
+        return (0, 0)
+    text = getattr(output, "content", output)
+    if not text.startswith("["):
+        return parse_table(text)
+    return (rows, len(ast.literal_eval(text.split("\n", 1)[0])[0]))
+
+
+class ExampleStore:
+    """
+    Successful (question, SQL, result shape) examples with a TF-IDF similarity index.
+
+    Examples are keyed by normalized question, so asking the same question again
+    replaces its SQL with the latest one that worked. With a database path the
+    examples persist across runs; the index itself is rebuilt in memory on startup.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_examples: int = 5000):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: SQLite file for persistence, or None to keep examples in memory only
+            max_examples: Maximum number of examples kept; the least recently updated go first
+        """
+        self.db_path = db_path
+        self.max_examples = max_examples
+        self._examples: dict[str, dict] = {}
+        self._terms: dict[str, Counter] = {}
+        self._postings: dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(_SCHEMA)
+            rows = self._conn.execute(
+                "SELECT question_key, question, sql, rows, columns, updated_at FROM examples ORDER BY updated_at"
+            ).fetchall()
+            for key, question, sql, n_rows, columns, updated_at in rows:
+                self._index(key, {"question": question, "sql": sql, "rows": n_rows, "columns": columns}, updated_at)
+
+    def __len__(self) -> int:
+        """Number of stored examples."""
+        return len(self._examples)
+
+    def add(self, question: str, sql: str, shape: Optional[tuple[int, int]] = None) -> None:
+        """
+        Record the SQL that answered a question.
+
+        Args:
+            question: User question
+            sql: Final SQL query of the turn
+            shape: (rows, columns) of the query result
+        """
+        key = normalize_question(question)
+        if not tokenize(key):
+            return
+        rows, columns = shape if shape is not None else (None, None)
+        example = {"question": question, "sql": sql, "rows": rows, "columns": columns}
+        now = time.time()
+        with self._lock:
+            self._index(key, example, now)
+            evicted = []
+            while len(self._examples) > self.max_examples:
+                oldest = min(self._examples, key=lambda k: self._examples[k]["updated_at"])
+                self._unindex(oldest)
+                evicted.append((oldest,))
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO examples (question_key, question, sql, rows, columns, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, question, sql, rows, columns, now),
+                    )
+                    self._conn.executemany("DELETE FROM examples WHERE question_key = ?", evicted)
+
+    def search(self, question: str, k: int = 3, min_similarity: float = 0.3) -> list[dict]:
+        """
+        Find the stored examples most similar to a question.
+
+        Similarity is the cosine of TF-IDF vectors over words and word pairs.
+
+        Args:
+            question: User question
+            k: Maximum number of examples returned
+            min_similarity: Minimum cosine similarity of a returned example
+
+        Returns:
+            Examples with their "similarity", most similar first
+        """
+        query = Counter(tokenize(normalize_question(question)))
+        with self._lock:
+            n_docs = len(self._examples)
+            if not query or not n_docs:
+                return []
+
+            def weight(term: str, count: int) -> float:
+                return (1 + math.log(count)) * (math.log((n_docs + 1) / (len(self._postings.get(term, ())) + 1)) + 1)
+
+            query_weights = {t: weight(t, c) for t, c in query.items()}
+            query_norm = math.sqrt(sum(w * w for w in query_weights.values()))
+            candidates = set().union(*(self._postings.get(t, set()) for t in query_weights))
+
+            scored = []
+            for key in candidates:
+                weights = {t: weight(t, c) for t, c in self._terms[key].items()}
+                dot = sum(w * weights[t] for t, w in query_weights.items() if t in weights)
+                similarity = dot / (query_norm * math.sqrt(sum(w * w for w in weights.values())))
+                if similarity >= min_similarity:
+                    scored.append({**self._examples[key], "similarity": round(similarity, 4)})
+        scored.sort(key=lambda e: e["similarity"], reverse=True)
+        return scored[:k]
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _index(self, key: str, example: dict, updated_at: float) -> None:
+        """Add or replace an example in the in-memory index."""
+        self._unindex(key)
+        terms = Counter(tokenize(key))
+        self._examples[key] = {**example, "updated_at": updated_at}
+        self._terms[key] = terms
+        for term in terms:
+            self._postings.setdefault(term, set()).add(key)
+
+    def _unindex(self, key: str) -> None:
+        """Remove an example from the in-memory index."""
+        if self._examples.pop(key, None) is None:
+            return
+        for term in self._terms.pop(key):
+            postings = self._postings[term]
+            postings.discard(key)
+            if not postings:
+                del self._postings[term]
+
+
+def format_examples(examples: list[dict]) -> str:
+    """
+    Format retrieved examples as a few-shot hint for the system prompt.
+
+    Args:
+        examples: Examples returned by ExampleStore.search()
+
+    Returns:
+        Hint text
+    """
+    blocks = []
+    for example in examples:
+        block = f"Question: {example['question']}\nSQL: {example['sql']}"
+        if example.get("rows") is not None:
+            block += f"\nResult: {example['rows']} rows x {example['columns']} columns"
+        blocks.append(block)
+    return EXAMPLES_PROMPT.format(examples="\n\n".join(blocks))
+
+
+class _SQLRecorder(BaseCallbackHandler):
+    """Record the sql_db_query calls of one turn with their result shapes."""
+
+    def __init__(self):
+        self.queries: list[tuple[str, Optional[tuple[int, int]]]] = []
+        self._pending: dict[UUID, str] = {}
+
+    def on_tool_start(
+        self, serialized: dict, input_str: str, *, run_id: UUID, inputs: Optional[dict] = None, **kwargs: Any
+    ) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        if name == "sql_db_query":
+            self._pending[run_id] = (inputs or {}).get("query", input_str)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        sql = self._pending.pop(run_id, None)
+        if sql is not None:
+            self.queries.append((sql, result_shape(output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        sql = self._pending.pop(run_id, None)
+        if sql is not None:
+            self.queries.append((sql, None))
+
+    def final_query(self) -> Optional[tuple[str, tuple[int, int]]]:
+        """The last query of the turn, if it succeeded and found rows."""
+        # Empty results are as likely to come from a wrong filter as from a right one
+        if self.queries and self.queries[-1][1] is not None and self.queries[-1][1][0] > 0:
+            return self.queries[-1]
+        return None
+
+
+class ExampleAgent:
+    """
+    Give the agent few-shot hints from similar past questions and learn from each answer.
+
+    Before a turn, the most similar stored examples are passed to the prompt's
+    "sql_examples" placeholder; after a successful turn, its final SQL query is stored
+    as a new example, unless the question is a follow-up relying on earlier turns.
+    """
+
+    def __init__(self, agent, store: ExampleStore, k: int = 3, min_similarity: float = 0.3):
+        """
+        Initialize the wrapper.
+
+        Args:
+            agent: Agent executor whose prompt has an optional "sql_examples" placeholder
+            store: Example store to search and extend
+            k: Maximum number of examples per question
+            min_similarity: Minimum similarity of an example used as a hint
+        """
+        self.agent = agent
+        self.store = store
+        self.k = k
+        self.min_similarity = min_similarity
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def invoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Invoke the agent with example hints, then learn from its SQL."""
+        inputs, config, recorder = self._prepare(inputs, config)
+        response = self.agent.invoke(inputs, config=config, **kwargs)
+        self._learn(inputs["input"], recorder)
+        return response
+
+    async def ainvoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Async counterpart of invoke()."""
+        inputs, config, recorder = self._prepare(inputs, config)
+        response = await self.agent.ainvoke(inputs, config=config, **kwargs)
+        self._learn(inputs["input"], recorder)
+        return response
+
+    async def astream_events(self, inputs: dict, config: Optional[dict] = None, **kwargs):
+        """Stream agent events with example hints, then learn from its SQL."""
+        inputs, config, recorder = self._prepare(inputs, config)
+        async for event in self.agent.astream_events(inputs, config=config, **kwargs):
+            yield event
+        self._learn(inputs["input"], recorder)
+
+    def _prepare(self, inputs: dict, config: Optional[dict]):
+        """Add the hint for the question and a recorder for the turn's SQL."""
+        examples = self.store.search(inputs["input"], self.k, self.min_similarity)
+        hints = [SystemMessage(format_examples(examples))] if examples else []
+        recorder = _SQLRecorder()
+        config = dict(config or {})
+        callbacks = config.get("callbacks")
+        if callbacks is None or isinstance(callbacks, list):
+            config["callbacks"] = [*(callbacks or []), recorder]
+        return {**inputs, "sql_examples": hints}, config, recorder
+
+    def _learn(self, question: str, recorder: _SQLRecorder) -> None:
+        """Store the turn's final query if it succeeded and the question stands on its own."""
+        if _FOLLOW_UP.search(question):
+            return
+        final = recorder.final_query()
+        if final is not None:
+            self.store.add(question, *final)
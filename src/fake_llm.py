@@ -0,0 +1,88 @@
+"""
+Offline chat models for exercising the real agent pipeline without an API key.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field, PrivateAttr
+
+
+def _current_turn(messages: list) -> tuple:
+    """Split a prompt into the current question and the AI messages sent since it."""
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            following = messages[index + 1 :]
+            return messages[index].content, [m for m in following if isinstance(m, AIMessage)]
+    return "", []
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that replays scripted tool calls and answers per question.
+
+    A script is a list of steps for one question. A step is either
+    ``{"sql": "..."}`` (a sql_db_query call), ``{"tool": name, "args": {...}}``
+    (any other tool call) or ``{"answer": "..."}`` (the final answer). The step to
+    play is derived from the prompt itself, so one model instance serves any number
+    of concurrent sessions.
+    """
+
+    scripts: dict = Field(default_factory=dict)
+    default_answer: str = "I could not find an answer to that question."
+    latency: float = 0.0
+    calls: int = 0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        """Accept tool bindings; scripted tool calls are replayed by name."""
+        return self
+
+    def _next_message(self, messages: list) -> AIMessage:
+        """Build the reply for the next scripted step of the current question."""
+        with self._lock:
+            self.calls += 1
+        question, replies = _current_turn(messages)
+        steps = self.scripts.get(question.strip(), [{"answer": self.default_answer}])
+        step = steps[min(len(replies), len(steps) - 1)]
+        if "answer" in step:
+            return AIMessage(content=step["answer"])
+
+        name, args = ("sql_db_query", {"query": step["sql"]}) if "sql" in step else (step["tool"], step["args"])
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": f"call_{len(replies)}", "type": "tool_call"}],
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
@@ -0,0 +1,193 @@
+"""
+Execution guards for agent-generated SQL: time budget, result caps and cancellation.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .results import ResultFormatter
+from .scratch import ResultCapture
+
+# Queries currently running under a guard, so Ctrl-C can interrupt them from any thread
+_running: set = set()
+_running_lock = threading.Lock()
+
+
+class _RunningQuery:
+    """Cancellation state of one in-flight query."""
+
+    def __init__(self, connection: sqlite3.Connection, deadline: Optional[float]):
+        self.connection = connection
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+
+    def check(self) -> int:
+        """SQLite progress handler: a non-zero return aborts the running statement."""
+        if self.reason is None and self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = "timeout"
+        return self.reason is not None
+
+    def cancel(self) -> None:
+        """Abort the statement from another thread."""
+        if self.reason is None:
+            self.reason = "cancelled"
+        self.connection.interrupt()
+
+
+def cancel_running_queries() -> int:
+    """
+    Interrupt every guarded query that is currently running.
+
+    Returns:
+        Number of queries interrupted
+    """
+    with _running_lock:
+        running = list(_running)
+    for query in running:
+        query.cancel()
+    return len(running)
+
+
+class QueryGuard:
+    """
+    Run agent-generated queries under a time budget and a result size cap.
+
+    Queries run with a SQLite progress handler that aborts them once the time budget
+    is spent or when cancel_running_queries() is called (e.g. on Ctrl-C). Rows are
+    fetched incrementally and fetching stops at max_rows rows or max_bytes of
+    formatted output, with a note telling the agent the result was truncated, so a
+    runaway query never floods the model's context.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 15.0,
+        max_rows: int = 200,
+        max_bytes: int = 32 * 1024,
+        check_every: int = 10_000,
+    ):
+        """
+        Initialize the guard.
+
+        Args:
+            timeout: Seconds a query may run before it is cancelled (0 disables the budget)
+            max_rows: Maximum number of rows returned to the agent (0 disables the cap)
+            max_bytes: Maximum size of the formatted result returned to the agent (0 disables the cap)
+            check_every: SQLite virtual machine instructions between budget checks
+        """
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.check_every = check_every
+        self.timeouts = 0
+        self.truncations = 0
+
+    def run(
+        self,
+        db: SQLDatabase,
+        query: str,
+        formatter: Optional[ResultFormatter] = None,
+        page: int = 1,
+        capture: Optional[ResultCapture] = None,
+    ) -> str:
+        """
+        Execute a query, formatting the result like SQLDatabase.run_no_throw().
+
+        Args:
+            db: Database to query
+            query: SQL generated by the agent
+            formatter: Compact result formatter to use instead of the row cap and Python repr
+            page: Page of the result to format (with a formatter)
+            capture: Optional capture receiving a copy of the rows as they are fetched
+
+        Returns:
+            The result rows as text (with a truncation note if capped), or an error message
+
+        Raises:
+            KeyboardInterrupt: If the query was interrupted by Ctrl-C on this thread
+        """
+        if db.dialect != "sqlite" and formatter is None:
+            return db.run_no_throw(query)
+
+        deadline = time.monotonic() + self.timeout if self.timeout > 0 else None
+        running: Optional[_RunningQuery] = None
+        try:
+            with db._engine.begin() as connection:
+                if db.dialect != "sqlite":
+                    return self._fetch(db, connection.execute(text(query)), formatter, page, capture)
+                running = _RunningQuery(connection.connection.driver_connection, deadline)
+                running.connection.set_progress_handler(running.check, self.check_every)
+                with _running_lock:
+                    _running.add(running)
+                try:
+                    return self._fetch(db, connection.execute(text(query)), formatter, page, capture)
+                finally:
+                    with _running_lock:
+                        _running.discard(running)
+                    running.connection.set_progress_handler(None, 0)
+        except SQLAlchemyError as e:
+            reason = running.reason if running is not None else None
+            # Ctrl-C raises inside the progress handler, where SQLite swallows it and aborts the
+            # statement; re-raise it so the turn ends instead of the agent retrying
+            if running is not None and reason is None and "interrupted" in str(getattr(e, "orig", e)):
+                raise KeyboardInterrupt from e
+            if reason == "timeout":
+                self.timeouts += 1
+                return (
+                    f"Error: query cancelled after exceeding the {self.timeout:g}s time budget. "
+                    "Narrow it with filters, aggregate instead of listing rows, or add a LIMIT."
+                )
+            if reason == "cancelled":
+                return "Error: query cancelled by the user."
+            return f"Error: {e}"
+
+    def _fetch(
+        self,
+        db: SQLDatabase,
+        cursor,
+        formatter: Optional[ResultFormatter] = None,
+        page: int = 1,
+        capture: Optional[ResultCapture] = None,
+    ) -> str:
+        """Fetch rows until the result is exhausted or a cap is reached."""
+        if not cursor.returns_rows:
+            return ""
+        source = capture.tee(list(cursor.keys()), cursor) if capture is not None else cursor
+        if formatter is not None:
+            try:
+                rows = (tuple(truncate_word(value, length=db._max_string_length) for value in row) for row in source)
+                # The row limit caps what the agent can page through; the byte cap is per page
+                return formatter.format(list(cursor.keys()), rows, page, max_rows=self.max_rows)
+            finally:
+                cursor.close()
+        rows = []
+        size = 2
+        truncated = False
+        try:
+            for row in source:
+                formatted = tuple(truncate_word(value, length=db._max_string_length) for value in row)
+                size += len(str(formatted)) + 2
+                if (self.max_rows and len(rows) >= self.max_rows) or (
+                    self.max_bytes and rows and size > self.max_bytes
+                ):
+                    truncated = True
+                    break
+                rows.append(formatted)
+        finally:
+            cursor.close()
+        if not rows:
+            return ""
+        if not truncated:
+            return str(rows)
+        self.truncations += 1
+        return (
+            f"{rows}\n[Result truncated to the first {len(rows)} rows; the query returned more. "
+            "Aggregate, filter or add a LIMIT instead of fetching raw rows.]"
+        )
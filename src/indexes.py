@@ -0,0 +1,230 @@
+"""
+Index provisioning and query plan auditing for the transactions table.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from .schema import connect_read_only
+
+# Covering indexes for the common filters (Country, Description, StockCode, InvoiceDate)
+# plus a partial index restricted to valid product rows (UnitPrice > 0)
+INDEXES = {
+    "idx_transactions_country": (
+        "CREATE INDEX idx_transactions_country ON transactions (Country, Description, Quantity, UnitPrice)"
+    ),
+    "idx_transactions_description": (
+        "CREATE INDEX idx_transactions_description ON transactions (Description, StockCode, Quantity, UnitPrice)"
+    ),
+    "idx_transactions_stockcode": (
+        "CREATE INDEX idx_transactions_stockcode ON transactions (StockCode, Description, Quantity, UnitPrice)"
+    ),
+    "idx_transactions_invoicedate": (
+        "CREATE INDEX idx_transactions_invoicedate ON transactions (InvoiceDate, Country, Quantity, UnitPrice)"
+    ),
+    "idx_transactions_products": (
+        "CREATE INDEX idx_transactions_products ON transactions "
+        "(Description, Country, InvoiceDate, Quantity, UnitPrice) WHERE UnitPrice > 0"
+    ),
+}
+
+_FULL_SCAN = re.compile(r"^SCAN (\S+)(?!.*\bUSING\b.*\bINDEX\b)")
+
+
+def _normalize_sql(sql: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", sql or "").strip().lower()
+
+
+def index_status(conn: sqlite3.Connection) -> dict:
+    """
+    Compare the managed indexes with what exists in the database.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        Dictionary mapping index name to "ok", "missing" or "stale"
+    """
+    existing = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'").fetchall())
+    status = {}
+    for name, sql in INDEXES.items():
+        if name not in existing:
+            status[name] = "missing"
+        elif _normalize_sql(existing[name]) != _normalize_sql(sql):
+            status[name] = "stale"
+        else:
+            status[name] = "ok"
+    return status
+
+
+def missing_indexes(db_path: str) -> list:
+    """
+    List managed indexes that are missing or out of date.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        Names of indexes that need to be (re)built
+    """
+    conn = connect_read_only(db_path)
+    try:
+        return [name for name, state in index_status(conn).items() if state != "ok"]
+    finally:
+        conn.close()
+
+
+def ensure_indexes(db_path: str) -> dict:
+    """
+    Create missing indexes, rebuild stale ones and refresh planner statistics.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        Dictionary mapping each rebuilt index name to its previous status
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        changed = {name: state for name, state in index_status(conn).items() if state != "ok"}
+        with conn:
+            for name, state in changed.items():
+                if state == "stale":
+                    conn.execute(f'DROP INDEX "{name}"')
+                conn.execute(INDEXES[name])
+        conn.execute("ANALYZE")
+        return changed
+    finally:
+        conn.close()
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str) -> list:
+    """
+    Run EXPLAIN QUERY PLAN for a statement.
+
+    Args:
+        conn: SQLite connection
+        sql: Statement to explain
+
+    Returns:
+        List of plan detail strings
+    """
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}")]
+
+
+def full_scans(plan: list) -> list:
+    """
+    Find the tables a query plan reads without an index.
+
+    Args:
+        plan: Plan detail strings from explain_query_plan()
+
+    Returns:
+        Names of fully scanned tables
+    """
+    return [match.group(1) for match in map(_FULL_SCAN.match, plan) if match]
+
+
+class QueryPlanAuditor:
+    """Record the query plan of every agent-generated query as JSON lines."""
+
+    def __init__(
+        self,
+        db_path: str,
+        log_path: str,
+        max_bytes: int = 16 * 1024 * 1024,
+        connect: Optional[Callable[[], sqlite3.Connection]] = None,
+    ):
+        """
+        Initialize the auditor.
+
+        Args:
+            db_path: Path to the SQLite database file
+            log_path: JSON lines file receiving one record per query
+            max_bytes: Size past which the log is moved to <log_path>.1, replacing the older one
+            connect: Opens the connections queries are explained on (defaults to a read-only
+                connection to db_path; e.g. MemorySnapshot.connect)
+        """
+        self.db_path = db_path
+        self.connect = connect or (lambda: connect_read_only(db_path))
+        self.log_path = Path(log_path)
+        self.max_bytes = max_bytes
+        self.queries = 0
+        self.full_scan_queries = 0
+        self._lock = threading.Lock()
+
+    def record(self, sql: str) -> Optional[dict]:
+        """
+        Explain a query and append the plan to the audit log.
+
+        Auditing never interferes with the query itself: statements that cannot be
+        explained (syntax errors, missing tables) are simply not recorded.
+
+        Args:
+            sql: Query generated by the agent
+
+        Returns:
+            The recorded entry, or None if the query could not be explained
+        """
+        try:
+            conn = self.connect()
+            try:
+                plan = explain_query_plan(conn, sql)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+        entry = {"timestamp": time.time(), "sql": sql, "plan": plan, "full_scans": full_scans(plan)}
+        with self._lock:
+            self.queries += 1
+            self.full_scan_queries += bool(entry["full_scans"])
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                if self.log_path.exists() and self.log_path.stat().st_size >= self.max_bytes:
+                    self.log_path.replace(_rotated(self.log_path))
+                with self.log_path.open("a", encoding="utf-8") as log:
+                    log.write(json.dumps(entry) + "\n")
+            except OSError:
+                pass
+        return entry
+
+
+def _rotated(path: Path) -> Path:
+    return path.with_name(path.name + ".1")
+
+
+def summarize_audit_log(log_path: str) -> list:
+    """
+    Summarize recorded queries that fell back to full table scans.
+
+    Reads the rotated log too. Lines that are not complete records (a write cut
+    short, a corrupted file) are skipped.
+
+    Args:
+        log_path: JSON lines file written by QueryPlanAuditor
+
+    Returns:
+        List of (count, sql, tables) tuples, most frequent first
+    """
+    counts: dict = {}
+    path = Path(log_path)
+    for part in (_rotated(path), path):
+        if not part.exists():
+            continue
+        with part.open(encoding="utf-8", errors="replace") as log:
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                    sql, tables = entry["sql"], entry["full_scans"]
+                except (ValueError, TypeError, KeyError):
+                    continue
+                if tables:
+                    count, _ = counts.get(sql, (0, None))
+                    counts[sql] = (count + 1, tables)
+    return sorted(((count, sql, tables) for sql, (count, tables) in counts.items()), key=lambda item: -item[0])
@@ -0,0 +1,361 @@
+"""
+Build or extend the transactions database from Online Retail CSV/Excel exports.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .indexes import ensure_indexes
+from .products import ensure_product_search
+from .rollups import refresh_rollups
+from .sales import ensure_sales_table
+
+# Typed layout: ISO-8601 dates, integer customer IDs and derived year/month columns
+INGEST_DDL = (
+    "CREATE TABLE transactions (InvoiceNo TEXT, StockCode TEXT, Description TEXT, Quantity INTEGER, "
+    "InvoiceDate TEXT, UnitPrice REAL, CustomerID INTEGER, Country TEXT, InvoiceYear INTEGER, InvoiceMonth TEXT)"
+)
+
+COLUMNS = (
+    "InvoiceNo",
+    "StockCode",
+    "Description",
+    "Quantity",
+    "InvoiceDate",
+    "UnitPrice",
+    "CustomerID",
+    "Country",
+    "InvoiceYear",
+    "InvoiceMonth",
+)
+
+# Source headers, lowercased without spaces or underscores, mapped to table columns
+# (covers both the Online Retail and Online Retail II exports)
+SOURCE_COLUMNS = {
+    "invoiceno": "InvoiceNo",
+    "invoice": "InvoiceNo",
+    "stockcode": "StockCode",
+    "description": "Description",
+    "quantity": "Quantity",
+    "invoicedate": "InvoiceDate",
+    "unitprice": "UnitPrice",
+    "price": "UnitPrice",
+    "customerid": "CustomerID",
+    "country": "Country",
+}
+
+# Date formats tried after ISO-8601: the original CSV export's month-first dates such
+# as "12/1/2010 8:26", then anything dateutil understands (slow, per value)
+_DATE_FORMATS = ("%m/%d/%Y %H:%M", "mixed")
+
+_REQUIRED = ("InvoiceNo", "StockCode", "Quantity", "InvoiceDate", "UnitPrice")
+
+
+def _canonical_columns(header) -> dict:
+    """Map source column names to table columns; raise if required columns are missing."""
+    mapping = {}
+    for name in header:
+        column = SOURCE_COLUMNS.get(str(name).lower().replace(" ", "").replace("_", ""))
+        if column is not None and column not in mapping.values():
+            mapping[name] = column
+    missing = [c for c in _REQUIRED if c not in mapping.values()]
+    if missing:
+        raise ValueError(f"Source is missing required columns: {', '.join(missing)}")
+    return mapping
+
+
+def _read_csv(path: str, chunk_size: int, encoding: str):
+    """Stream a CSV file as DataFrame chunks of raw text."""
+    import pandas as pd
+
+    return pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, encoding=encoding)
+
+
+def _read_excel(path: str, chunk_size: int, sheet: Optional[str]):
+    """Stream an Excel sheet as DataFrame chunks, without loading the workbook into memory."""
+    import pandas as pd
+
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:  # pragma: no cover - depends on the environment
+        raise ImportError(
+            "Excel ingestion requires openpyxl. Install it with: pip install 'ecommerce-db-chat[excel]'"
+        ) from e
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = (workbook[sheet] if sheet else workbook.worksheets[0]).iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_source(
+    path: str, chunk_size: int = 100_000, encoding: str = "utf-8", sheet: Optional[str] = None
+) -> Iterator[list]:
+    """
+    Stream a CSV or Excel export as typed row batches.
+
+    Text is trimmed, dates are normalized to "YYYY-MM-DD HH:MM:SS", customer IDs become
+    integers (NULL when missing) and the InvoiceYear/InvoiceMonth columns are derived
+    from the date. Rows without an invoice number or a parseable date are dropped.
+
+    Args:
+        path: .csv, .xlsx or .xlsm file
+        chunk_size: Rows per batch
+        encoding: Text encoding of CSV files
+        sheet: Worksheet of Excel files (defaults to the first)
+
+    Yields:
+        Lists of row tuples in COLUMNS order
+    """
+    import numpy as np
+    import pandas as pd
+
+    suffix = Path(path).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        chunks = _read_excel(path, chunk_size, sheet)
+    elif suffix in (".csv", ".txt", ".gz", ".zip"):
+        chunks = _read_csv(path, chunk_size, encoding)
+    else:
+        raise ValueError(f"Unsupported source file type {suffix!r}; expected .csv or .xlsx")
+
+    mapping = None
+    for chunk in chunks:
+        if mapping is None:
+            mapping = _canonical_columns(chunk.columns)
+        chunk = chunk[list(mapping)].rename(columns=mapping)
+        text = {
+            column: _per_distinct(chunk[column], _clean_text) if column in chunk else np.full(len(chunk), None)
+            for column in ("InvoiceNo", "StockCode", "Description", "Country")
+        }
+        dates, years, months = _parse_dates(chunk["InvoiceDate"])
+        quantities = pd.to_numeric(chunk["Quantity"], errors="coerce").to_numpy()
+        prices = pd.to_numeric(chunk["UnitPrice"], errors="coerce").to_numpy(dtype=float)
+        customers = pd.to_numeric(chunk.get("CustomerID", pd.Series(index=chunk.index)), errors="coerce").to_numpy()
+
+        keep = (text["InvoiceNo"] != None) & (dates != None) & ~np.isnan(quantities) & ~np.isnan(prices)  # noqa: E711
+        if not keep.any():
+            continue
+        customer_ids = np.where(np.isnan(customers), None, np.nan_to_num(customers).astype(np.int64))
+
+        yield list(
+            zip(
+                text["InvoiceNo"][keep].tolist(),
+                text["StockCode"][keep].tolist(),
+                text["Description"][keep].tolist(),
+                quantities[keep].astype(np.int64).tolist(),
+                dates[keep].tolist(),
+                prices[keep].tolist(),
+                customer_ids[keep].tolist(),
+                text["Country"][keep].tolist(),
+                years[keep].tolist(),
+                months[keep].tolist(),
+            )
+        )
+
+
+def _per_distinct(values, convert):
+    """Convert each distinct value once (text and dates repeat heavily) and expand to every row."""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values)
+    # Missing values have code -1, which picks the trailing None
+    return np.append(np.asarray(convert(pd.Series(uniques)), dtype=object), None)[codes]
+
+
+def _clean_text(values) -> list:
+    """Trim text; empty strings become None."""
+    return [str(value).strip() or None for value in values]
+
+
+def _parse_dates(values) -> tuple:
+    """Parse invoice dates into ISO-8601 text, years and "YYYY-MM" months (None when unparseable)."""
+    import numpy as np
+    import pandas as pd
+
+    def parse(uniques):
+        dates = pd.to_datetime(uniques, format="ISO8601", errors="coerce")
+        for date_format in _DATE_FORMATS:
+            if not dates.isna().any():
+                break
+            dates = dates.fillna(pd.to_datetime(uniques, format=date_format, errors="coerce"))
+        return dates
+
+    codes, uniques = pd.factorize(values)
+    dates = parse(pd.Series(uniques))
+    valid = dates.notna()
+    columns = []
+    for formatted in (
+        dates.dt.strftime("%Y-%m-%d %H:%M:%S"),
+        dates.dt.year.astype("Int64"),
+        dates.dt.strftime("%Y-%m"),
+    ):
+        column = formatted.astype(object).where(valid, None).to_numpy()
+        columns.append(np.append(column, None)[codes])
+    return tuple(columns)
+
+
+def _release_journals(db_path: str) -> None:
+    """
+    Fold a WAL or rollback journal left next to a database back into it before the file is replaced.
+
+    SQLite finds these sidecar files by name, so one left behind by a crash would be
+    replayed onto the new database. Opening the old database recovers them, and closing
+    the last connection removes them.
+
+    Args:
+        db_path: Database about to be replaced
+
+    Raises:
+        RuntimeError: If another process still has the database open
+    """
+    sidecars = [db_path + suffix for suffix in ("-wal", "-shm", "-journal")]
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+    elif any(os.path.exists(path) for path in sidecars):
+        # Without their database these belong to nothing
+        for path in sidecars:
+            if os.path.exists(path):
+                os.remove(path)
+    leftover = [path for path in sidecars if os.path.exists(path)]
+    if leftover:
+        raise RuntimeError(
+            f"Database '{db_path}' is still open in another process ({', '.join(leftover)}); "
+            "stop it before rebuilding"
+        )
+
+
+def ingest_sources(
+    db_path: str,
+    sources: list,
+    append: bool = False,
+    chunk_size: int = 100_000,
+    encoding: str = "utf-8",
+    sheet: Optional[str] = None,
+    build_indexes: bool = True,
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> dict:
+    """
+    Load source files into the transactions table.
+
+    A rebuild writes a new database to ``<db_path>.partial`` and swaps it in once
+    every row, index and planner statistic is in place, so the live database is never
+    half-built. It refuses while another process has the database open, since that
+    process's WAL would otherwise be replayed onto the new file. An append adds the
+    invoices that are not in the database yet (whole invoices, so re-ingesting an
+    overlapping export is safe), committing each source in one transaction so an
+    interrupted append leaves none of its invoices behind, then refreshes the indexes
+    and statistics.
+
+    Args:
+        db_path: Database to create or extend
+        sources: CSV/Excel files to read, in order
+        append: Add new invoices to the existing database instead of rebuilding it
+        chunk_size: Rows per batch (and per insert transaction when rebuilding)
+        encoding: Text encoding of CSV files
+        sheet: Worksheet of Excel files (defaults to the first)
+        build_indexes: Whether to build the managed indexes, product search index, sales
+            table and rollups and run ANALYZE at the end
+        progress: Optional callback receiving (rows inserted, elapsed seconds) after each batch
+
+    Returns:
+        Counts of rows inserted and skipped (already present) and the elapsed seconds
+    """
+    if append and not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database '{db_path}' not found; ingest without --append to create it")
+    for source in sources:
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Source file '{source}' not found")
+
+    target = db_path if append else f"{db_path}.partial"
+    if not append:
+        # Refuse before the work rather than after it when the database is in use
+        _release_journals(db_path)
+        if os.path.exists(target):
+            os.remove(target)
+
+    start = time.perf_counter()
+    summary = {"inserted": 0, "skipped": 0}
+    conn = sqlite3.connect(target)
+    try:
+        if append:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+            if not columns:
+                raise ValueError(f"Database '{db_path}' has no transactions table to append to")
+            existing = {invoice for (invoice,) in conn.execute("SELECT DISTINCT InvoiceNo FROM transactions")}
+        else:
+            # The partial file is discarded on failure, so durability is not needed while writing
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute(INGEST_DDL)
+            columns = list(COLUMNS)
+            existing = set()
+
+        # Older databases may lack the derived columns; insert the ones they have
+        positions = [COLUMNS.index(c) for c in columns if c in COLUMNS]
+        insert = (
+            f"INSERT INTO transactions ({', '.join(COLUMNS[i] for i in positions)}) "
+            f"VALUES ({', '.join('?' for _ in positions)})"
+        )
+        for source in sources:
+            added = set()
+            for batch in read_source(source, chunk_size, encoding, sheet):
+                rows = [tuple(row[i] for i in positions) for row in batch if row[0] not in existing]
+                added.update(row[0] for row in rows)
+                summary["skipped"] += len(batch) - len(rows)
+                conn.executemany(insert, rows)
+                # An append must not leave part of an invoice behind: a re-run would skip the
+                # rest as already loaded. A failed rebuild discards the whole file instead.
+                if not append:
+                    conn.commit()
+                summary["inserted"] += len(rows)
+                if progress is not None:
+                    progress(summary["inserted"], time.perf_counter() - start)
+            conn.commit()
+            # Invoices are only whole within one source; a later overlapping export is skipped
+            existing |= added
+    except BaseException:
+        # Closing without a commit rolls back the append of the source being read
+        conn.close()
+        if not append:
+            os.remove(target)
+        raise
+    conn.close()
+
+    if build_indexes:
+        # Also runs ANALYZE so the planner sees the new data; once built, the product
+        # search index and sales table are kept current by triggers and the rollups only
+        # fold in the appended rows, so appends stay cheap
+        ensure_indexes(target)
+        ensure_product_search(target)
+        ensure_sales_table(target)
+        refresh_rollups(target)
+    if not append:
+        try:
+            _release_journals(db_path)
+        except BaseException:
+            os.remove(target)
+            raise
+        os.replace(target, db_path)
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
@@ -2,10 +2,42 @@
 Conversation memory management for the chatbot.
 """
 
-from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
+from typing import Callable, Optional
 
-# Session-scoped message history store
-_store: dict[str, BaseChatMessageHistory] = {}
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately, get_buffer_string, trim_messages
+
+from .config import (
+    SCRATCH_RESULTS_BYTES,
+    SCRATCH_RESULTS_MAX_ROWS,
+    SCRATCH_RESULTS_TTL,
+    SESSION_CACHE_BYTES,
+    SESSION_CACHE_SIZE,
+    SESSION_STORE_PATH,
+    SUMMARY_TAG,
+)
+from .scratch import ScratchResults
+from .session_store import SessionHistory, SessionStore
+
+HISTORY_SUMMARY_PROMPT = """Update the running summary of a conversation between a user and an assistant \
+answering questions about an e-commerce database.
+
+Keep every product, country, customer, time period, filter and figure the user may refer back to \
+("it", "that product", "the same period"), most recent first. Reply with the summary only, in at most \
+150 words.
+
+Current summary:
+{summary}
+
+New conversation turns:
+{conversation}"""
+
+# Session-scoped message history store: hot sessions in memory, optionally persisted to SQLite
+_store = SessionStore(SESSION_STORE_PATH or None, SESSION_CACHE_SIZE, SESSION_CACHE_BYTES)
+
+# Each session's last query result, kept in memory only (results go stale with the database)
+_results = ScratchResults(SCRATCH_RESULTS_BYTES, SCRATCH_RESULTS_TTL, SCRATCH_RESULTS_MAX_ROWS)
 
 
 def get_session_history(session_id: str = "default") -> BaseChatMessageHistory:
@@ -18,9 +50,7 @@ def get_session_history(session_id: str = "default") -> BaseChatMessageHistory:
     Returns:
         BaseChatMessageHistory instance for the session
     """
-    if session_id not in _store:
-        _store[session_id] = InMemoryChatMessageHistory()
-    return _store[session_id]
+    return _store.get(session_id)
 
 
 def create_memory(session_id: str = "default") -> BaseChatMessageHistory:
@@ -36,13 +66,166 @@ def create_memory(session_id: str = "default") -> BaseChatMessageHistory:
     return get_session_history(session_id)
 
 
+def get_session_results() -> ScratchResults:
+    """
+    Get the store of the sessions' last query results.
+
+    Returns:
+        ScratchResults shared by every session
+    """
+    return _results
+
+
 def clear_memory(session_id: str = "default") -> None:
     """
-    Clear the conversation history for a session.
+    Clear the conversation history and the saved last result of a session.
 
     Args:
         session_id: Unique identifier for the conversation session
     """
-    if session_id in _store:
-        _store[session_id].clear()
-        del _store[session_id]
+    _store.delete(session_id)
+    _results.discard(session_id)
+
+
+def summarize_with(llm) -> Callable[[str, list], str]:
+    """
+    Build a summarizer that folds conversation turns into a running summary using a chat model.
+
+    Args:
+        llm: Chat model used for summarization
+
+    Returns:
+        Callable taking (summary, messages) and returning the updated summary
+    """
+
+    def summarize(summary: str, messages: list) -> str:
+        prompt = HISTORY_SUMMARY_PROMPT.format(summary=summary or "(none)", conversation=get_buffer_string(messages))
+        # Run outside the turn's callbacks, so streaming and profiling never see the summary
+        # as answer tokens or an agent iteration
+        return str(llm.invoke(prompt, config={"tags": [SUMMARY_TAG], "callbacks": []}).content).strip()
+
+    return summarize
+
+
+class HistoryPolicy:
+    """
+    Decide which part of a session's history is sent to the model.
+
+    The last ``max_turns`` turns are always kept verbatim. Once ``2 * max_turns`` turns
+    are pending, the older ones are folded into the session's rolling summary in one
+    summarizer call (or dropped without a summarizer), so summarization runs once every
+    ``max_turns`` turns. The summary and the recent turns are then trimmed to
+    ``max_tokens``, oldest turns first, so the prompt stays flat however long the session.
+    With a results store, a note describing the session's saved last result follows the turns.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        max_tokens: int = 2000,
+        summarizer: Optional[Callable[[str, list], str]] = None,
+        results: Optional[ScratchResults] = None,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            max_turns: Number of recent question/answer turns kept verbatim
+            max_tokens: Approximate token budget for the summary and recent turns
+            summarizer: Callable (summary, messages) -> summary; older turns are dropped when None
+            results: Store of the sessions' last query results to describe in the history
+        """
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.results = results
+
+    def prompt_messages(self, history: BaseChatMessageHistory, session_id: Optional[str] = None) -> list[BaseMessage]:
+        """
+        Build the chat history for the prompt, folding old turns into the summary first.
+
+        Args:
+            history: Session history (a SessionHistory keeps the summary between turns)
+            session_id: Session whose saved last result is described, if any
+
+        Returns:
+            An optional summary message followed by the most recent turns and an optional
+            description of the last result
+        """
+        messages = history.messages
+        summary = getattr(history, "summary", "")
+        summarized = getattr(history, "summarized", 0)
+
+        turn_starts = [i for i, m in enumerate(messages) if i >= summarized and isinstance(m, HumanMessage)]
+        if len(turn_starts) >= 2 * self.max_turns:
+            fold_end = turn_starts[-self.max_turns]
+            summary = self._fold(summary, messages[summarized:fold_end])
+            summarized = fold_end
+            if isinstance(history, SessionHistory):
+                history.update_summary(summary, summarized)
+
+        prompt = [SystemMessage(f"Summary of the earlier conversation: {summary}")] if summary else []
+        prompt += messages[summarized:]
+        prompt = trim_messages(
+            prompt,
+            max_tokens=self.max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+            include_system=True,
+        )
+        # Described after trimming so the note is never cut, and only while the result is held
+        note = self.results.describe(session_id) if self.results is not None and session_id is not None else None
+        return prompt + [SystemMessage(note)] if note else prompt
+
+    def _fold(self, summary: str, messages: list) -> str:
+        """Fold messages into the summary, keeping the old summary if summarization fails."""
+        if self.summarizer is None:
+            return summary
+        try:
+            return self.summarizer(summary, messages)
+        except Exception:
+            # A failed summary must not fail the turn; the folded turns are only lost from the prompt
+            return summary
+
+    def session_history(self, session_id: str = "default") -> BaseChatMessageHistory:
+        """
+        Get the prompt view of a session's history, for RunnableWithMessageHistory.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+
+        Returns:
+            History whose messages follow this policy; new messages go to the full history
+        """
+        return PromptHistory(get_session_history(session_id), self, session_id)
+
+
+class PromptHistory(BaseChatMessageHistory):
+    """View of a session history as the agent prompt sees it."""
+
+    def __init__(self, history: BaseChatMessageHistory, policy: HistoryPolicy, session_id: Optional[str] = None):
+        """
+        Initialize the view.
+
+        Args:
+            history: Full session history
+            policy: Policy deciding which messages reach the prompt
+            session_id: Session the history belongs to
+        """
+        self.history = history
+        self.policy = policy
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        """Messages to send to the model."""
+        return self.policy.prompt_messages(self.history, self.session_id)
+
+    def add_messages(self, messages) -> None:
+        """Record new messages in the full session history."""
+        self.history.add_messages(messages)
+
+    def clear(self) -> None:
+        """Clear the full session history."""
+        self.history.clear()
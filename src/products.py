@@ -0,0 +1,210 @@
+"""
+Full-text product lookup: an FTS5 index over the distinct product descriptions.
+"""
+
+import re
+import sqlite3
+from typing import Callable, Optional
+
+from .schema import connect_read_only
+
+# Distinct (StockCode, Description) pairs, kept current by triggers on transactions,
+# and an external-content FTS5 index over them (porter stemming, so "lanterns"
+# finds "LANTERN"; prefix indexes for partial words). The table is named chat_products
+# so a database's own products table is never dropped by a rebuild.
+PRODUCT_SEARCH_DDL = {
+    "chat_products": (
+        "CREATE TABLE chat_products (StockCode TEXT NOT NULL, Description TEXT NOT NULL, "
+        "PRIMARY KEY (StockCode, Description))"
+    ),
+    "product_search": (
+        "CREATE VIRTUAL TABLE product_search USING fts5(Description, StockCode UNINDEXED, "
+        "content='chat_products', tokenize='porter unicode61', prefix='2 3')"
+    ),
+    "chat_products_ai": (
+        "CREATE TRIGGER chat_products_ai AFTER INSERT ON chat_products BEGIN "
+        "INSERT INTO product_search (rowid, Description, StockCode) "
+        "VALUES (new.rowid, new.Description, new.StockCode); END"
+    ),
+    "transactions_products_ai": (
+        "CREATE TRIGGER transactions_products_ai AFTER INSERT ON transactions "
+        "WHEN new.StockCode IS NOT NULL AND new.Description IS NOT NULL BEGIN "
+        "INSERT OR IGNORE INTO chat_products (StockCode, Description) VALUES (new.StockCode, new.Description); "
+        "END"
+    ),
+    "transactions_products_au": (
+        "CREATE TRIGGER transactions_products_au AFTER UPDATE OF StockCode, Description ON transactions "
+        "WHEN new.StockCode IS NOT NULL AND new.Description IS NOT NULL BEGIN "
+        "INSERT OR IGNORE INTO chat_products (StockCode, Description) VALUES (new.StockCode, new.Description); "
+        "END"
+    ),
+}
+
+# System prompt section steering the agent to the lookup tool
+PRODUCT_LOOKUP_PROMPT = """To find products by name or kind (e.g. "lanterns", "heart t-light holders"), call \
+product_lookup first and filter rows with StockCode IN (...) using the codes it returns. Do not use \
+Description LIKE '%...%', which scans the whole table. Fall back to LIKE only if the lookup finds nothing."""
+
+_WORDS = re.compile(r"\w+")
+
+
+def product_search_status(conn: sqlite3.Connection) -> str:
+    """
+    Check the product search objects in a database.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        "ok", "missing" (nothing built) or "stale" (partially built or outdated definitions)
+    """
+    names = list(PRODUCT_SEARCH_DDL)
+    existing = dict(
+        conn.execute(f"SELECT name, sql FROM sqlite_master WHERE name IN ({', '.join('?' for _ in names)})", names)
+    )
+    if not existing:
+        return "missing"
+    if any(_normalize(existing.get(name)) != _normalize(sql) for name, sql in PRODUCT_SEARCH_DDL.items()):
+        return "stale"
+    return "ok"
+
+
+def product_search_state(db_path: str) -> str:
+    """
+    Check the product search objects of a database file without modifying it.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        "ok", "missing" or "stale", as product_search_status()
+
+    Raises:
+        sqlite3.Error: If the database cannot be read
+    """
+    conn = connect_read_only(db_path)
+    try:
+        return product_search_status(conn)
+    finally:
+        conn.close()
+
+
+def ensure_product_search(db_path: str) -> Optional[str]:
+    """
+    Build the product search index if it is missing or outdated.
+
+    Once built, the triggers keep it current as transactions are inserted or updated.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        The previous status ("missing" or "stale") if the index was (re)built, else None
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        status = product_search_status(conn)
+        if status == "ok":
+            return None
+        with conn:
+            for name in reversed(PRODUCT_SEARCH_DDL):
+                kind = "TABLE" if name in ("chat_products", "product_search") else "TRIGGER"
+                conn.execute(f'DROP {kind} IF EXISTS "{name}"')
+            for sql in PRODUCT_SEARCH_DDL.values():
+                conn.execute(sql)
+            conn.execute("DROP TRIGGER chat_products_ai")
+            conn.execute(
+                "INSERT OR IGNORE INTO chat_products (StockCode, Description) "
+                "SELECT DISTINCT StockCode, Description FROM transactions "
+                "WHERE StockCode IS NOT NULL AND Description IS NOT NULL"
+            )
+            # Index the whole catalog in one pass rather than row by row through the trigger
+            conn.execute("INSERT INTO product_search (product_search) VALUES ('rebuild')")
+            conn.execute(PRODUCT_SEARCH_DDL["chat_products_ai"])
+        return status
+    finally:
+        conn.close()
+
+
+def match_query(text: str, any_word: bool = False) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query of prefix terms.
+
+    Args:
+        text: Product words from the question
+        any_word: Match products with any of the words instead of all of them
+
+    Returns:
+        FTS5 MATCH expression, or None if the text has no words
+    """
+    words = _WORDS.findall(text.lower())
+    if not words:
+        return None
+    return (" OR " if any_word else " AND ").join(f'"{word}"*' for word in words)
+
+
+class ProductSearch:
+    """Look up products by description words through the product_search index."""
+
+    def __init__(self, db_path: str, connect: Optional[Callable[[], sqlite3.Connection]] = None):
+        """
+        Initialize the lookup.
+
+        Args:
+            db_path: Path to the SQLite database file
+            connect: Opens the connections lookups run on (defaults to a read-only
+                connection to db_path; e.g. MemorySnapshot.connect)
+        """
+        self.db_path = db_path
+        self.connect = connect or (lambda: connect_read_only(db_path))
+
+    def available(self) -> bool:
+        """Whether the index has been built."""
+        try:
+            conn = self.connect()
+        except sqlite3.Error:
+            return False
+        try:
+            return product_search_status(conn) == "ok"
+        except sqlite3.Error:
+            return False
+        finally:
+            conn.close()
+
+    def search(self, text: str, limit: int = 20) -> list[tuple[str, str]]:
+        """
+        Find products whose description matches the words of a phrase.
+
+        Products matching every word are returned if there are any; otherwise products
+        matching any word, best matches (BM25) first.
+
+        Args:
+            text: Product words, e.g. "white lanterns"
+            limit: Maximum number of products returned
+
+        Returns:
+            List of (StockCode, Description) pairs
+
+        Raises:
+            sqlite3.OperationalError: If the index has not been built
+        """
+        conn = self.connect()
+        try:
+            for any_word in (False, True):
+                query = match_query(text, any_word)
+                if query is None:
+                    return []
+                rows = conn.execute(
+                    "SELECT StockCode, Description FROM product_search WHERE product_search MATCH ? "
+                    "ORDER BY rank, length(Description) LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+                if rows:
+                    return rows
+            return []
+        finally:
+            conn.close()
+
+
+def _normalize(sql: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", sql or "").strip().lower()
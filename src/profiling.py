@@ -0,0 +1,236 @@
+"""
+Per-turn performance instrumentation for the agent.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages.utils import count_tokens_approximately
+
+from .streaming import count_rows
+
+
+class TurnProfiler(BaseCallbackHandler):
+    """
+    Callback handler recording the timing of every LLM and tool call.
+
+    Pass it in the run config (``config={"callbacks": [profiler]}``) and call
+    take_events() after each turn. Each LLM event carries its wall time and
+    prompt/completion token counts (from the provider's usage metadata when
+    available, estimated otherwise); each tool event carries its wall time and,
+    for sql_db_query, the SQL text and the number of rows returned.
+    """
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self._events: list[dict] = []
+        self._started: dict[UUID, dict] = {}
+        self._lock = threading.Lock()
+
+    def take_events(self) -> list[dict]:
+        """
+        Return the events recorded since the last call and start a new turn.
+
+        Returns:
+            List of event dictionaries in completion order
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            return events
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the start of a chat model call and the size of its prompt."""
+        prompt = messages[0] if messages else []
+        self._start(run_id, prompt_tokens=count_tokens_approximately(prompt), prompt_messages=len(prompt))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record a finished LLM call with its token counts."""
+        started = self._finish(run_id)
+        if started is None:
+            return
+        usage = _usage_metadata(response)
+        if usage:
+            started["prompt_tokens"] = usage.get("input_tokens", started["prompt_tokens"])
+        completion_tokens = usage.get("output_tokens") if usage else None
+        if completion_tokens is None:
+            completion_tokens = sum(
+                count_tokens_approximately([g.message])
+                for gs in response.generations
+                for g in gs
+                if hasattr(g, "message")
+            )
+        self._record({"type": "llm", **started, "completion_tokens": completion_tokens})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record a failed LLM call."""
+        started = self._finish(run_id)
+        if started is not None:
+            self._record({"type": "llm", **started, "completion_tokens": 0, "error": str(error)})
+
+    def on_tool_start(
+        self, serialized: dict, input_str: str, *, run_id: UUID, inputs: Optional[dict] = None, **kwargs: Any
+    ) -> None:
+        """Record the start of a tool call."""
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        details = {"tool": name}
+        if name == "sql_db_query":
+            details["sql"] = (inputs or {}).get("query", input_str)
+        self._start(run_id, **details)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record a finished tool call, counting the rows of SQL results."""
+        started = self._finish(run_id)
+        if started is None:
+            return
+        if started["tool"] == "sql_db_query":
+            started["rows"] = count_rows(output)
+        self._record({"type": "tool", **started})
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record a failed tool call."""
+        started = self._finish(run_id)
+        if started is not None:
+            self._record({"type": "tool", **started, "error": str(error)})
+
+    def _start(self, run_id: UUID, **details) -> None:
+        with self._lock:
+            self._started[run_id] = {"start": time.perf_counter(), **details}
+
+    def _finish(self, run_id: UUID) -> Optional[dict]:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        started["seconds"] = round(time.perf_counter() - started.pop("start"), 6)
+        return started
+
+    def _record(self, event: dict) -> None:
+        with self._lock:
+            self._events.append(event)
+
+
+def _usage_metadata(response) -> dict:
+    """Sum provider-reported token usage over an LLMResult's generations."""
+    usage: dict = {}
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            for key in ("input_tokens", "output_tokens"):
+                if metadata and metadata.get(key) is not None:
+                    usage[key] = usage.get(key, 0) + metadata[key]
+    return usage
+
+
+def summarize_turn(events: list[dict]) -> dict:
+    """
+    Aggregate one turn's profiler events.
+
+    Args:
+        events: Events returned by TurnProfiler.take_events()
+
+    Returns:
+        Dictionary with LLM/SQL call counts, times, token counts and rows
+    """
+    llm = [e for e in events if e["type"] == "llm"]
+    sql = [e for e in events if e["type"] == "tool" and e["tool"] == "sql_db_query"]
+    tools = [e for e in events if e["type"] == "tool"]
+    return {
+        # Every agent iteration is one model call, deciding on a tool or answering
+        "iterations": len(llm),
+        "llm_calls": len(llm),
+        "llm_seconds": round(sum(e["seconds"] for e in llm), 6),
+        "prompt_tokens": sum(e["prompt_tokens"] for e in llm),
+        "max_prompt_tokens": max((e["prompt_tokens"] for e in llm), default=0),
+        "completion_tokens": sum(e["completion_tokens"] for e in llm),
+        "tool_calls": len(tools),
+        "tool_seconds": round(sum(e["seconds"] for e in tools), 6),
+        "sql_queries": len(sql),
+        "sql_seconds": round(sum(e["seconds"] for e in sql), 6),
+        "sql_errors": sum(1 for e in sql if e.get("error") or e.get("rows") is None),
+        "rows": sum(e.get("rows") or 0 for e in sql),
+    }
+
+
+class ProfileLog:
+    """Write one JSON line per turn and summarize the session at exit."""
+
+    def __init__(self, log_path: str):
+        """
+        Initialize the log.
+
+        Args:
+            log_path: JSON lines file receiving one record per turn
+        """
+        self.log_path = log_path
+        self.profiler = TurnProfiler()
+        self.turns: list[dict] = []
+
+    def record(self, question: str, seconds: float, cached: bool = False, error: Optional[str] = None) -> dict:
+        """
+        Record a finished turn with the profiler events collected during it.
+
+        Args:
+            question: User question
+            seconds: Wall time of the whole turn
+            cached: Whether the answer came from the answer cache
+            error: Why the turn failed or was cancelled, if it did not finish
+
+        Returns:
+            The recorded turn: timestamp, question, totals and the individual events
+        """
+        events = self.profiler.take_events()
+        turn = {
+            "timestamp": time.time(),
+            "question": question,
+            "seconds": round(seconds, 6),
+            "cached": cached,
+            **summarize_turn(events),
+            "events": events,
+        }
+        if error is not None:
+            turn["error"] = error
+        self.turns.append(turn)
+        try:
+            path = Path(self.log_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as log:
+                log.write(json.dumps(turn, default=str) + "\n")
+        except OSError:
+            pass
+        return turn
+
+    def format_summary(self) -> str:
+        """
+        Format the session's turns as a table splitting each turn's time between the model and SQLite.
+
+        Returns:
+            Table with one row per turn and a total row
+        """
+        lines = [
+            f"{'question':<40} {'total ms':>9} {'LLM ms':>9} {'SQL ms':>8} {'iter':>4} {'SQL':>4} "
+            f"{'rows':>7} {'prompt tok':>10} {'compl tok':>9}"
+        ]
+        for turn in self.turns:
+            question = turn["question"] if len(turn["question"]) <= 40 else turn["question"][:37] + "..."
+            lines.append(_summary_row(question, turn))
+        if self.turns:
+            keys = ("seconds", "llm_seconds", "sql_seconds", "iterations", "sql_queries", "rows")
+            total = {key: sum(turn[key] for turn in self.turns) for key in keys}
+            total["prompt_tokens"] = sum(turn["prompt_tokens"] for turn in self.turns)
+            total["completion_tokens"] = sum(turn["completion_tokens"] for turn in self.turns)
+            lines.append(_summary_row("total", total))
+        return "\n".join(lines)
+
+
+def _summary_row(label: str, turn: dict) -> str:
+    """Format one row of the profile summary table."""
+    return (
+        f"{label:<40} {turn['seconds'] * 1000:>9.1f} {turn['llm_seconds'] * 1000:>9.1f} "
+        f"{turn['sql_seconds'] * 1000:>8.1f} {turn['iterations']:>4} {turn['sql_queries']:>4} "
+        f"{turn['rows']:>7} {turn['prompt_tokens']:>10} {turn['completion_tokens']:>9}"
+    )
@@ -0,0 +1,193 @@
+"""
+Compact serialization of SQL results returned to the agent.
+"""
+
+import re
+from typing import Iterable, Optional
+
+# Separator between the values of a row; literal separators in values are escaped
+SEPARATOR = "|"
+
+_UNESCAPED_SEPARATOR = re.compile(r"(?<!\\)\|")
+
+
+class _ColumnStats:
+    """Running count, sum, min, max and distinct values of one result column."""
+
+    def __init__(self, max_distinct: int):
+        self.max_distinct = max_distinct
+        self.nulls = 0
+        self.numeric = True
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.distinct: Optional[set] = set()
+
+    def add(self, value) -> None:
+        if value is None:
+            self.nulls += 1
+            return
+        if self.distinct is not None:
+            self.distinct.add(value)
+            if len(self.distinct) > self.max_distinct:
+                # Keep memory bounded on huge results; the count is reported as a lower bound
+                self.distinct = None
+        if self.numeric and isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.total += value
+            self.min = value if self.min is None or value < self.min else self.min
+            self.max = value if self.max is None or value > self.max else self.max
+        else:
+            self.numeric = False
+
+    def describe(self) -> str:
+        distinct = f"{self.max_distinct}+" if self.distinct is None else str(len(self.distinct))
+        parts = []
+        if self.numeric and self.min is not None:
+            parts += [
+                f"sum={format_value(self.total)}",
+                f"min={format_value(self.min)}",
+                f"max={format_value(self.max)}",
+            ]
+        parts.append(f"distinct={distinct}")
+        if self.nulls:
+            parts.append(f"nulls={self.nulls}")
+        return " ".join(parts)
+
+
+def format_value(value) -> str:
+    """
+    Format one value for the compact encoding.
+
+    Args:
+        value: Column value
+
+    Returns:
+        Text with floats rounded to 4 decimals, NULL for None and separators escaped
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, float):
+        value = round(value, 4)
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+    return " ".join(str(value).split()).replace(SEPARATOR, "\\" + SEPARATOR)
+
+
+class ResultFormatter:
+    """
+    Format query results as a compact table instead of a Python repr of every tuple.
+
+    Results are written as a header line of column names followed by one line per row,
+    values separated by "|". Only one page of rows is written; when the result has more
+    rows, a footer gives the row count, summary statistics of every column over the
+    scanned rows (sum/min/max of numeric columns, distinct counts, nulls) and tells the
+    agent to call sql_db_query_page for the next page. A row limit stops paging after
+    that many rows, while the count and statistics still cover the scanned rows.
+    """
+
+    def __init__(
+        self, page_rows: int = 50, max_bytes: int = 32 * 1024, max_scan_rows: int = 100_000, max_distinct: int = 10_000
+    ):
+        """
+        Initialize the formatter.
+
+        Args:
+            page_rows: Rows written per page
+            max_bytes: Maximum size of the rows written per page (0 disables the cap)
+            max_scan_rows: Rows scanned for the count and statistics before giving up
+            max_distinct: Distinct values tracked per column before reporting a lower bound
+        """
+        self.page_rows = page_rows
+        self.max_bytes = max_bytes
+        self.max_scan_rows = max_scan_rows
+        self.max_distinct = max_distinct
+        self.pages = 0
+
+    def format(
+        self, columns: list, rows: Iterable[tuple], page: int = 1, more: Optional[str] = None, max_rows: int = 0
+    ) -> str:
+        """
+        Format one page of a result.
+
+        Args:
+            columns: Column names
+            rows: Result rows (consumed up to max_scan_rows)
+            page: 1-based page number
+            more: What the agent should do about rows past the page (defaults to paging
+                through sql_db_query_page)
+            max_rows: Rows that can be read across all pages (0 for no limit); the count and
+                statistics still cover every scanned row
+
+        Returns:
+            The compact table, or "" for an empty result
+        """
+        start = (page - 1) * self.page_rows
+        stats = [_ColumnStats(self.max_distinct) for _ in columns]
+        lines = [SEPARATOR.join(format_value(c) for c in columns)]
+        size = len(lines[0])
+        scanned = 0
+        complete = True
+        for row in rows:
+            if scanned >= self.max_scan_rows:
+                complete = False
+                break
+            readable = not max_rows or scanned < max_rows
+            if (
+                readable
+                and start <= scanned < start + self.page_rows
+                and not (self.max_bytes and size > self.max_bytes)
+            ):
+                line = SEPARATOR.join(format_value(value) for value in row)
+                lines.append(line)
+                size += len(line) + 1
+            for column, value in zip(stats, row):
+                column.add(value)
+            scanned += 1
+
+        if scanned == 0:
+            return ""
+        shown = len(lines) - 1
+        if complete and page == 1 and shown == scanned:
+            return "\n".join(lines)
+
+        self.pages += 1
+        total = f"{scanned}" if complete else f"at least {scanned}"
+        end = start + shown
+        at_limit = bool(max_rows) and end >= max_rows and (scanned > max_rows or not complete)
+        if shown:
+            lines.append(f"-- rows {start + 1}-{end} of {total}")
+            if shown < self.page_rows and end < scanned and not at_limit:
+                lines.append("-- page cut short by its size; select fewer or shorter columns")
+        else:
+            lines.append(f"-- no rows on page {page}; the result has {total} rows")
+        if page == 1:
+            described = "; ".join(f"{name} {column.describe()}" for name, column in zip(columns, stats))
+            lines.append(f"-- stats over {scanned} rows: {described}")
+        if at_limit:
+            lines.append(
+                f"-- only the first {max_rows} rows can be read; aggregate, filter or add a LIMIT "
+                "instead of reading raw rows"
+            )
+        elif end < scanned or not complete:
+            more = more or (
+                f"call sql_db_query_page with the same query and page={page + 1}, "
+                "or aggregate/filter in SQL instead of reading raw rows"
+            )
+            lines.append(f"-- more rows: {more}")
+        return "\n".join(lines)
+
+
+def parse_table(text: str) -> Optional[tuple[int, int]]:
+    """
+    Get the (rows, columns) shape of the page in a compact table.
+
+    Args:
+        text: Output of ResultFormatter.format()
+
+    Returns:
+        Shape of the rows shown, or None if the text is not a compact table
+    """
+    lines = text.split("\n")
+    if not lines[0] or lines[0].startswith(("Error", "-- ")):
+        return None
+    data = [line for line in lines[1:] if not line.startswith("-- ")]
+    return len(data), len(_UNESCAPED_SEPARATOR.split(lines[0]))
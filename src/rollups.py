@@ -0,0 +1,240 @@
+"""
+Materialized rollups of product sales, refreshed incrementally as transactions are appended.
+"""
+
+import re
+import sqlite3
+
+from .schema import connect_read_only
+from .sales import PRODUCT_FILTER
+
+# Bookkeeping of what each rollup has absorbed: its definition, the highest transactions
+# rowid folded in and the number of rows up to it (-1 once absorbed rows were changed)
+STATE_TABLE = "rollup_state"
+
+# Triggers invalidating the rollups that absorbed a deleted or updated row; distinct counts
+# and first/last dates cannot be corrected in place, so those rollups are rebuilt
+INVALIDATE_TRIGGERS = {
+    "transactions_rollups_ad": (
+        "CREATE TRIGGER transactions_rollups_ad AFTER DELETE ON transactions BEGIN "
+        f"UPDATE {STATE_TABLE} SET rows = -1 WHERE last_rowid >= old.rowid; END"
+    ),
+    "transactions_rollups_au": (
+        "CREATE TRIGGER transactions_rollups_au AFTER UPDATE ON transactions BEGIN "
+        f"UPDATE {STATE_TABLE} SET rows = -1 WHERE last_rowid >= min(old.rowid, new.rowid); END"
+    ),
+}
+
+# Rollup keys (column: (type, expression over transactions)); every rollup is restricted
+# to PRODUCT_FILTER, so it answers product questions without re-applying the filters
+_MONTH = ("TEXT", "substr(InvoiceDate, 1, 7)")
+ROLLUPS = {
+    "rollup_month": {"month": _MONTH},
+    "rollup_country_month": {"month": _MONTH, "Country": ("TEXT", "Country")},
+    "rollup_product_month": {
+        "month": _MONTH,
+        "StockCode": ("TEXT", "StockCode"),
+        "Description": ("TEXT", "Description"),
+    },
+    "rollup_customer": {"CustomerID": ("INTEGER", "CustomerID"), "Country": ("TEXT", "Country")},
+}
+
+# Measures (column: (type, aggregate, how a refresh merges it into the stored value)).
+# Invoice counts stay exact across refreshes because invoices are appended whole.
+_MEASURES = {
+    "revenue": ("REAL", "SUM(Quantity * UnitPrice)", "revenue + excluded.revenue"),
+    "quantity": ("INTEGER", "SUM(Quantity)", "quantity + excluded.quantity"),
+    "invoices": ("INTEGER", "COUNT(DISTINCT InvoiceNo)", "invoices + excluded.invoices"),
+    "lines": ("INTEGER", "COUNT(*)", "lines + excluded.lines"),
+}
+_CUSTOMER_MEASURES = {
+    "first_purchase": ("TEXT", "MIN(InvoiceDate)", "min(first_purchase, excluded.first_purchase)"),
+    "last_purchase": ("TEXT", "MAX(InvoiceDate)", "max(last_purchase, excluded.last_purchase)"),
+}
+
+
+def _measures(name: str) -> dict:
+    return {**_MEASURES, **(_CUSTOMER_MEASURES if name == "rollup_customer" else {})}
+
+
+# System prompt section advertising the rollups to the agent
+ROLLUPS_PROMPT = (
+    "Precomputed summary tables (product-only filters already applied; month is 'YYYY-MM'):\n"
+    + "\n".join(f"- {name}({', '.join(list(keys) + list(_measures(name)))})" for name, keys in ROLLUPS.items())
+    + "\nPrefer them over the row-level tables for totals, rankings and trends by month, country, product or "
+    "customer: SUM their measures (do not re-apply the product filters; a month range is a year). Query the "
+    "row-level tables for anything they cannot answer, such as days, cancellations, products by country or "
+    "distinct customers per month."
+)
+
+
+def rollup_ddl(name: str) -> str:
+    """
+    Get the CREATE TABLE statement of a rollup.
+
+    Args:
+        name: Rollup table name
+
+    Returns:
+        SQL statement
+    """
+    keys = ROLLUPS[name]
+    columns = [f"{column} {kind} NOT NULL" for column, (kind, _) in keys.items()]
+    columns += [f"{column} {kind}" for column, (kind, _, _) in _measures(name).items()]
+    return f"CREATE TABLE {name} ({', '.join(columns)}, PRIMARY KEY ({', '.join(keys)})) WITHOUT ROWID"
+
+
+def rollup_select(name: str) -> str:
+    """
+    Get the query aggregating a rowid range of transactions into a rollup.
+
+    Args:
+        name: Rollup table name
+
+    Returns:
+        SQL statement taking the exclusive lower and inclusive upper rowid as parameters
+    """
+    keys = ROLLUPS[name]
+    expressions = [expression for _, expression in keys.values()]
+    aggregates = [aggregate for _, aggregate, _ in _measures(name).values()]
+    not_null = " AND ".join(f"{expression} IS NOT NULL" for expression in expressions)
+    return (
+        f"SELECT {', '.join(expressions + aggregates)} FROM transactions "
+        f"WHERE rowid > ? AND rowid <= ? AND {PRODUCT_FILTER} AND {not_null} "
+        f"GROUP BY {', '.join(str(i) for i in range(1, len(keys) + 1))}"
+    )
+
+
+def _definition(name: str) -> str:
+    return _normalize(f"{rollup_ddl(name)}; {rollup_select(name)}")
+
+
+def _normalize(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip().lower()
+
+
+def rollup_status(conn: sqlite3.Connection) -> dict:
+    """
+    Compare the rollups with the transactions table.
+
+    Only the watermark and the invalidation mark left by the triggers are compared, so
+    this is cheap enough to run per question.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        Dictionary mapping rollup name to "ok", "missing", "stale" (outdated definition,
+        absorbed rows deleted or updated, or no triggers to notice that) or "behind"
+        (transactions appended since the last refresh)
+    """
+    objects = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'trigger')"))
+    if STATE_TABLE not in objects:
+        return {name: "missing" for name in ROLLUPS}
+    triggers_ok = all(
+        _normalize(objects.get(name) or "") == _normalize(sql) for name, sql in INVALIDATE_TRIGGERS.items()
+    )
+    state = {
+        name: (sql, last_rowid, rows) for name, sql, last_rowid, rows in conn.execute(f"SELECT * FROM {STATE_TABLE}")
+    }
+    (max_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions").fetchone()
+    status = {}
+    for name in ROLLUPS:
+        if name not in objects or name not in state:
+            status[name] = "missing"
+        elif not triggers_ok or state[name][0] != _definition(name) or state[name][1] > max_rowid or state[name][2] < 0:
+            status[name] = "stale"
+        elif state[name][1] < max_rowid:
+            status[name] = "behind"
+        else:
+            status[name] = "ok"
+    return status
+
+
+def rollups_current(db_path: str) -> bool:
+    """
+    Check whether every rollup is built and up to date.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        True if queries can be answered from the rollups
+    """
+    try:
+        conn = connect_read_only(db_path)
+    except sqlite3.Error:
+        return False
+    try:
+        return all(state == "ok" for state in rollup_status(conn).values())
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+
+def refresh_rollups(db_path: str) -> dict:
+    """
+    Build missing rollups and fold newly appended transactions into the others.
+
+    A refresh only aggregates the rows past each rollup's watermark (the highest rowid
+    already absorbed) and merges them into the stored totals, so an append costs time
+    proportional to the new rows. Rollups with an outdated definition, or whose
+    absorbed rows were deleted or updated (flagged by triggers on transactions), are
+    rebuilt from scratch.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        Dictionary mapping each changed rollup to "built" or "refreshed"
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        changed = {}
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+                "(name TEXT PRIMARY KEY, sql TEXT NOT NULL, last_rowid INTEGER NOT NULL, rows INTEGER NOT NULL)"
+            )
+            (max_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions").fetchone()
+            absorbed = {
+                name: (last_rowid, rows) for name, _, last_rowid, rows in conn.execute(f"SELECT * FROM {STATE_TABLE}")
+            }
+            status = rollup_status(conn)
+            for name, sql in INVALIDATE_TRIGGERS.items():
+                conn.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+                conn.execute(sql)
+            for name, state in status.items():
+                if state == "ok":
+                    continue
+                last_rowid, rows = absorbed.get(name, (0, 0))
+                if state == "behind" and _count_rows(conn, last_rowid) == rows:
+                    _merge(conn, name, last_rowid, max_rowid)
+                    changed[name] = "refreshed"
+                else:
+                    conn.execute(f"DROP TABLE IF EXISTS {name}")
+                    conn.execute(rollup_ddl(name))
+                    conn.execute(f"INSERT INTO {name} {rollup_select(name)}", (0, max_rowid))
+                    changed[name] = "built"
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, ?)",
+                    (name, _definition(name), max_rowid, _count_rows(conn, max_rowid)),
+                )
+        return changed
+    finally:
+        conn.close()
+
+
+def _count_rows(conn: sqlite3.Connection, rowid: int) -> int:
+    """Count the transactions up to a rowid (fewer than recorded means rows were deleted)."""
+    return conn.execute("SELECT COUNT(*) FROM transactions WHERE rowid <= ?", (rowid,)).fetchone()[0]
+
+
+def _merge(conn: sqlite3.Connection, name: str, after_rowid: int, max_rowid: int) -> None:
+    """Aggregate the transactions past the watermark and add them to the stored totals."""
+    merges = ", ".join(f"{column} = {merge}" for column, (_, _, merge) in _measures(name).items())
+    conn.execute(
+        f"INSERT INTO {name} {rollup_select(name)} ON CONFLICT ({', '.join(ROLLUPS[name])}) DO UPDATE SET {merges}",
+        (after_rowid, max_rowid),
+    )
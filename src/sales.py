@@ -0,0 +1,180 @@
+"""
+Pre-cleaned sales table: product purchases only, with revenue precomputed.
+"""
+
+import re
+import sqlite3
+from typing import Optional
+
+from .schema import connect_read_only
+
+# Descriptions of the administrative and accounting lines (postage, fees, manual
+# adjustments, bad debt, ...); filtering on Description rather than StockCode keeps the
+# queries on the covering indexes
+NON_PRODUCT_DESCRIPTIONS = (
+    "POSTAGE",
+    "DOTCOM POSTAGE",
+    "CARRIAGE",
+    "Manual",
+    "Bank Charges",
+    "AMAZON FEE",
+    "Discount",
+    "SAMPLES",
+    "CRUK Commission",
+    "PADS TO MATCH ALL CUSHIONS",
+)
+
+# The product-only filters SYSTEM_PROMPT asks the agent to apply: real purchases of real
+# products (cancellations have negative quantities)
+PRODUCT_FILTER = (
+    "UnitPrice > 0 AND Quantity > 0 "
+    f"AND Description NOT IN ({', '.join(repr(d) for d in NON_PRODUCT_DESCRIPTIONS)}) "
+    "AND Description NOT LIKE '%adjust%'"
+)
+
+# Columns copied from transactions, after the TransactionID (the transactions rowid)
+_COPIED = "InvoiceNo, StockCode, Description, Quantity, InvoiceDate, UnitPrice, CustomerID, Country"
+
+
+def _select_sales(rows: str) -> str:
+    """Select the product rows of transactions matching a rowid condition in sales column order."""
+    return (
+        f"SELECT rowid, {_COPIED}, Quantity * UnitPrice, substr(InvoiceDate, 1, 7) FROM transactions "
+        f"WHERE {rows} AND {PRODUCT_FILTER}"
+    )
+
+
+# The table, covering indexes for the common groupings and triggers keeping it in step
+# with inserts, deletes and updates of transactions
+SALES_DDL = {
+    "sales": (
+        "CREATE TABLE sales (TransactionID INTEGER PRIMARY KEY, InvoiceNo TEXT, StockCode TEXT, "
+        "Description TEXT, Quantity INTEGER, InvoiceDate TEXT, UnitPrice REAL, CustomerID INTEGER, Country TEXT, "
+        "revenue REAL, InvoiceMonth TEXT)"
+    ),
+    "idx_sales_description": "CREATE INDEX idx_sales_description ON sales (Description, StockCode, Quantity, revenue)",
+    "idx_sales_stockcode": "CREATE INDEX idx_sales_stockcode ON sales (StockCode, Description, Quantity, revenue)",
+    "idx_sales_country": (
+        "CREATE INDEX idx_sales_country ON sales (Country, Description, InvoiceDate, Quantity, revenue)"
+    ),
+    "idx_sales_invoicedate": (
+        "CREATE INDEX idx_sales_invoicedate ON sales (InvoiceDate, Country, CustomerID, Quantity, revenue)"
+    ),
+    "idx_sales_customer": "CREATE INDEX idx_sales_customer ON sales (CustomerID, Country, revenue)",
+    "transactions_sales_ai": (
+        "CREATE TRIGGER transactions_sales_ai AFTER INSERT ON transactions BEGIN "
+        f"INSERT INTO sales {_select_sales('rowid = new.rowid')}; END"
+    ),
+    "transactions_sales_ad": (
+        "CREATE TRIGGER transactions_sales_ad AFTER DELETE ON transactions BEGIN "
+        "DELETE FROM sales WHERE TransactionID = old.rowid; END"
+    ),
+    "transactions_sales_au": (
+        "CREATE TRIGGER transactions_sales_au AFTER UPDATE ON transactions BEGIN "
+        "DELETE FROM sales WHERE TransactionID = old.rowid; "
+        f"INSERT INTO sales {_select_sales('rowid = new.rowid')}; END"
+    ),
+}
+
+# System prompt section pointing the agent at the sales table
+SALES_PROMPT = """For questions about products, revenue, quantities, customers or countries, query the sales \
+table instead of transactions. It holds only real product purchases (adjustments, bad debt, postage, fees, \
+cancellations and non-positive prices are already removed), has revenue = Quantity * UnitPrice precomputed and \
+InvoiceMonth as 'YYYY-MM'. Do not re-apply those filters to it. Use transactions only for cancellations, returns \
+or non-product entries."""
+
+
+def sales_status(conn: sqlite3.Connection) -> str:
+    """
+    Check the sales table, its indexes and triggers.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        "ok", "missing" (nothing built) or "stale" (partially built or outdated definitions,
+        e.g. after the product filters changed)
+    """
+    names = list(SALES_DDL)
+    existing = dict(
+        conn.execute(f"SELECT name, sql FROM sqlite_master WHERE name IN ({', '.join('?' for _ in names)})", names)
+    )
+    if not existing:
+        return "missing"
+    if any(_normalize(existing.get(name)) != _normalize(sql) for name, sql in SALES_DDL.items()):
+        return "stale"
+    return "ok"
+
+
+def sales_state(db_path: str) -> str:
+    """
+    Check the sales table of a database file without modifying it.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        "ok", "missing" or "stale", as sales_status()
+
+    Raises:
+        sqlite3.Error: If the database cannot be read
+    """
+    conn = connect_read_only(db_path)
+    try:
+        return sales_status(conn)
+    finally:
+        conn.close()
+
+
+def sales_available(db_path: str) -> bool:
+    """
+    Check whether the sales table is built and maintained.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        True if queries can read the sales table
+    """
+    try:
+        return sales_state(db_path) == "ok"
+    except sqlite3.Error:
+        return False
+
+
+def ensure_sales_table(db_path: str) -> Optional[str]:
+    """
+    Build the sales table if it is missing or outdated.
+
+    Rows are classified in one pass, then the indexes are built and the triggers created;
+    from then on every insert, delete or update of transactions is mirrored.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        The previous status ("missing" or "stale") if the table was (re)built, else None
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        status = sales_status(conn)
+        if status == "ok":
+            return None
+        with conn:
+            for name in reversed(SALES_DDL):
+                kind = "TABLE" if name == "sales" else "INDEX" if name.startswith("idx_") else "TRIGGER"
+                conn.execute(f'DROP {kind} IF EXISTS "{name}"')
+            conn.execute(SALES_DDL["sales"])
+            conn.execute(f"INSERT INTO sales {_select_sales('1')}")
+            # Indexes are cheaper to build over the filled table than to maintain row by row
+            for name, sql in SALES_DDL.items():
+                if name != "sales":
+                    conn.execute(sql)
+        conn.execute("ANALYZE sales")
+        return status
+    finally:
+        conn.close()
+
+
+def _normalize(sql: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", sql or "").strip().lower()
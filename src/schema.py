@@ -0,0 +1,160 @@
+"""
+Schema introspection cached on disk so the agent can skip introspection tool calls.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Prompt section listing the precomputed schema; filled in by create_sql_agent
+SCHEMA_PROMPT = """The database schema has already been introspected for you, so do not call \
+sql_db_list_tables or sql_db_schema. Write queries directly with sql_db_query.
+
+Tables: {table_names}
+
+{table_info}"""
+
+
+# Shadow tables SQLite creates for FTS5 and R*Tree virtual tables
+_SHADOW_SUFFIXES = ("data", "idx", "content", "docsize", "config", "node", "parent", "rowid")
+
+# Bookkeeping tables of the build steps (e.g. rollup refresh watermarks)
+INTERNAL_TABLES = ("rollup_state",)
+
+
+def connect_read_only(db_path: str) -> sqlite3.Connection:
+    """
+    Open a read-only connection without creating the file if it is missing.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        sqlite3 connection
+    """
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def list_tables(conn: sqlite3.Connection) -> list:
+    """
+    List user tables and views, excluding SQLite internals and full-text indexes.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        Sorted list of table names
+    """
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )
+    hidden = set(hidden_tables(conn))
+    return [row[0] for row in rows if row[0] not in hidden]
+
+
+def hidden_tables(conn: sqlite3.Connection) -> list:
+    """
+    List virtual tables (e.g. FTS5 indexes), their shadow tables and internal bookkeeping tables.
+
+    Full-text indexes are searched through dedicated tools and bookkeeping tables hold no
+    data, so describing them to the agent would only add noise to the schema.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        Names of the hidden tables
+    """
+    virtual = [
+        name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE sql LIKE 'CREATE VIRTUAL TABLE%'")
+    ]
+    shadow = [f"{name}_{suffix}" for name in virtual for suffix in _SHADOW_SUFFIXES]
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [name for name in virtual + shadow + list(INTERNAL_TABLES) if name in existing]
+
+
+def schema_fingerprint(conn: sqlite3.Connection) -> str:
+    """
+    Fingerprint the schema definition of a database.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        Hex digest of every object definition in sqlite_master
+    """
+    digest = hashlib.sha256()
+    for row in conn.execute("SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name"):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_table_info(conn: sqlite3.Connection, sample_rows: int = 3) -> str:
+    """
+    Describe every table the same way SQLDatabase.get_table_info() does.
+
+    Args:
+        conn: SQLite connection
+        sample_rows: Number of sample rows included per table
+
+    Returns:
+        CREATE statements followed by sample rows for each table
+    """
+    sections = []
+    for table in list_tables(conn):
+        (create_sql,) = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+        cursor = conn.execute(f'SELECT * FROM "{table}" LIMIT {int(sample_rows)}')
+        columns = [column[0] for column in cursor.description]
+        rows = ["\t".join(str(value)[:100] for value in row) for row in cursor.fetchall()]
+        sample = "\n".join([f"{sample_rows} rows from {table} table:", "\t".join(columns)] + rows)
+        sections.append(f"{create_sql.strip()}\n\n/*\n{sample}\n*/")
+    return "\n\n".join(sections)
+
+
+def load_schema_info(db_path: str, cache_dir: str) -> Optional[dict]:
+    """
+    Load the table info for a database, introspecting it only when the schema changed.
+
+    The description is cached on disk under a file named after the schema fingerprint,
+    so restarts and other processes reuse it without touching the tables.
+
+    Args:
+        db_path: Path to the SQLite database file
+        cache_dir: Directory holding cached schema descriptions
+
+    Returns:
+        Dictionary with "table_names" and "table_info", or None if the database is unavailable
+    """
+    if not Path(db_path).exists():
+        return None
+
+    try:
+        conn = connect_read_only(db_path)
+    except sqlite3.Error:
+        return None
+
+    try:
+        table_names = ", ".join(list_tables(conn))
+        cache_file = Path(cache_dir) / f"schema-{schema_fingerprint(conn)[:16]}.txt"
+        if cache_file.exists():
+            return {"table_names": table_names, "table_info": cache_file.read_text(encoding="utf-8")}
+
+        table_info = build_table_info(conn)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file
+        partial = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        partial.write_text(table_info, encoding="utf-8")
+        os.replace(partial, cache_file)
+    except OSError:
+        # Caching is an optimization; an unwritable cache dir only costs a re-introspection
+        pass
+    return {"table_names": table_names, "table_info": table_info}
@@ -0,0 +1,393 @@
+"""
+Per-session scratch tables holding the last query result, for refining follow-up questions.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional
+
+# Name under which a session's last result is queried
+LAST_RESULT_TABLE = "last_result"
+
+# Longest SQL quoted in the description of a result
+_MAX_SQL_CHARS = 600
+
+SCRATCH_PROMPT = """The result of your last sql_db_query in this conversation is saved as the table \
+{table} ({rows} rows; columns: {columns}), produced by:
+{sql}
+For follow-ups that filter, re-sort, rank, re-aggregate or pick from that result ("those countries", \
+"the top 3 of them"), query {table} with sql_db_query_last_result instead of re-running the query. \
+Use sql_db_query for anything needing rows or columns it does not hold."""
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_names(columns: list) -> list[str]:
+    """Make result column names usable as table columns (non-empty and unique)."""
+    names = []
+    seen = set()
+    for i, column in enumerate(columns, 1):
+        base = str(column) or f"column{i}"
+        name, n = base, 2
+        while name.lower() in seen:
+            name, n = f"{base}_{n}", n + 1
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+class ResultCapture:
+    """Copy the rows of a result while they are fetched, up to a row limit."""
+
+    def __init__(self, max_rows: int):
+        """
+        Initialize the capture.
+
+        Args:
+            max_rows: Maximum number of rows copied; larger results are not captured
+        """
+        self.max_rows = max_rows
+        self.columns: list = []
+        self.rows: list[tuple] = []
+        self.complete = False
+        self._overflow = False
+
+    def tee(self, columns: list, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        Pass rows through, copying them.
+
+        The capture is complete only if the consumer reads every row and there are at
+        most max_rows of them.
+
+        Args:
+            columns: Column names
+            rows: Result rows
+
+        Yields:
+            The same rows
+        """
+        self.columns = list(columns)
+        for row in rows:
+            if not self._overflow:
+                if len(self.rows) < self.max_rows:
+                    self.rows.append(tuple(row))
+                else:
+                    self._overflow = True
+                    self.rows = []
+            yield row
+        self.complete = not self._overflow
+
+
+class _Entry:
+    """One session's result: a private in-memory database holding it."""
+
+    def __init__(self, conn: sqlite3.Connection, sql: str, columns: list, rows: int, size: int):
+        self.conn = conn
+        self.sql = sql
+        self.columns = columns
+        self.rows = rows
+        self.size = size
+        self.saved_at = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class ScratchResults:
+    """
+    Keep each session's last query result as a small table the agent can query again.
+
+    Every session gets its own in-memory SQLite database holding one table, so sessions
+    never see each other's results and evicting one frees its memory at once. Results
+    are evicted once older than ttl seconds, and least recently used first when their
+    total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 1800.0, max_rows: int = 50_000):
+        """
+        Initialize the store.
+
+        Args:
+            max_bytes: Memory budget for all sessions' results
+            ttl: Seconds a result is kept after it was saved (0 keeps it until evicted by size)
+            max_rows: Maximum number of rows of a saved result
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.evictions = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of sessions holding a result."""
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    def capture(self) -> ResultCapture:
+        """Create a capture sized for this store."""
+        return ResultCapture(self.max_rows)
+
+    def save(self, session_id: str, sql: str, columns: list, rows: list[tuple]) -> bool:
+        """
+        Replace a session's last result.
+
+        Args:
+            session_id: Session the result belongs to
+            sql: Query that produced the result
+            columns: Column names
+            rows: Result rows
+
+        Returns:
+            True if the result was saved, False if it is empty or too large
+        """
+        if not rows or not columns or len(rows) > self.max_rows:
+            self.discard(session_id)
+            return False
+        names = _column_names(columns)
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        try:
+            conn.execute(f"CREATE TABLE {LAST_RESULT_TABLE} ({', '.join(_quote(name) for name in names)})")
+            conn.executemany(f"INSERT INTO {LAST_RESULT_TABLE} VALUES ({', '.join('?' for _ in names)})", rows)
+            conn.commit()
+            (page_count,) = conn.execute("PRAGMA page_count").fetchone()
+            (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+            conn.execute("PRAGMA query_only = ON")
+        except sqlite3.Error:
+            conn.close()
+            self.discard(session_id)
+            return False
+        entry = _Entry(conn, sql, names, len(rows), page_count * page_size)
+        if entry.size > self.max_bytes:
+            conn.close()
+            self.discard(session_id)
+            return False
+
+        with self._lock:
+            self._remove(session_id)
+            self._entries[session_id] = entry
+            self._bytes += entry.size
+            self._expire()
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def reuse(self, session_id: str, sql: str) -> bool:
+        """
+        Make a result another session holds for the same query the session's last result.
+
+        Lets a query answered from the result cache, whose rows are not at hand, still
+        leave a result behind.
+
+        Args:
+            session_id: Session to save the result for
+            sql: Query whose result is wanted
+
+        Returns:
+            True if the session now holds the result of the query
+        """
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.sql == sql:
+                self._entries.move_to_end(session_id)
+                return True
+            source = next((e for e in reversed(self._entries.values()) if e.sql == sql), None)
+        if source is None:
+            self.discard(session_id)
+            return False
+        try:
+            with source.lock:
+                rows = source.conn.execute(f"SELECT * FROM {LAST_RESULT_TABLE}").fetchall()
+        except sqlite3.Error:
+            # Evicted while copying
+            self.discard(session_id)
+            return False
+        return self.save(session_id, sql, source.columns, rows)
+
+    def source(self, session_id: str) -> Optional[str]:
+        """
+        Get the query that produced a session's last result.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            SQL text, or None if the session holds no result
+        """
+        with self._lock:
+            entry = self._get(session_id)
+            return entry.sql if entry is not None else None
+
+    def describe(self, session_id: str) -> Optional[str]:
+        """
+        Describe a session's last result for the prompt.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Prompt text naming the table, its columns and the query behind it, or None
+        """
+        with self._lock:
+            entry = self._get(session_id)
+        if entry is None:
+            return None
+        sql = entry.sql if len(entry.sql) <= _MAX_SQL_CHARS else entry.sql[:_MAX_SQL_CHARS] + " ..."
+        return SCRATCH_PROMPT.format(
+            table=LAST_RESULT_TABLE,
+            rows=entry.rows,
+            columns=", ".join(_quote(name) for name in entry.columns),
+            sql=sql,
+        )
+
+    def query(
+        self,
+        session_id: str,
+        sql: str,
+        consume: Callable[[list, Iterable[tuple]], str],
+        timeout: float = 5.0,
+    ) -> Optional[str]:
+        """
+        Run a read-only query against a session's last result.
+
+        Args:
+            session_id: Session identifier
+            sql: Query over the last_result table
+            consume: Callable (column names, rows) -> text formatting the result
+            timeout: Seconds the query may run before it is cancelled (0 disables the budget)
+
+        Returns:
+            The formatted result, or None if the session holds no result
+
+        Raises:
+            sqlite3.Error: If the query fails or runs out of time
+        """
+        with self._lock:
+            entry = self._get(session_id)
+        if entry is None:
+            return None
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        with entry.lock:
+            if deadline is not None:
+                entry.conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+            try:
+                cursor = entry.conn.execute(sql)
+                try:
+                    if cursor.description is None:
+                        return ""
+                    return consume([d[0] for d in cursor.description], cursor)
+                finally:
+                    cursor.close()
+            finally:
+                entry.conn.set_progress_handler(None, 0)
+
+    def discard(self, session_id: str) -> None:
+        """
+        Drop a session's last result.
+
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._remove(session_id)
+
+    def clear(self) -> None:
+        """Drop every session's result."""
+        with self._lock:
+            for session_id in list(self._entries):
+                self._remove(session_id)
+
+    @property
+    def bytes(self) -> int:
+        """Memory held by the saved results."""
+        with self._lock:
+            return self._bytes
+
+    def _get(self, session_id: str) -> Optional[_Entry]:
+        """Look a result up, marking it recently used (call with the lock held)."""
+        self._expire()
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._entries.move_to_end(session_id)
+        return entry
+
+    def _expire(self) -> None:
+        """Drop the results older than the TTL (call with the lock held)."""
+        if self.ttl <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl
+        for session_id in [s for s, entry in self._entries.items() if entry.saved_at < cutoff]:
+            self._remove(session_id)
+            self.evictions += 1
+
+    def _remove(self, session_id: str) -> None:
+        """Drop a result and close its database (call with the lock held)."""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        # A query still running on it finishes first
+        with entry.lock:
+            entry.conn.close()
+
+
+def session_id_from(run_manager) -> Optional[str]:
+    """
+    Get the session a tool call belongs to.
+
+    Args:
+        run_manager: Callback manager of the tool run
+
+    Returns:
+        Session identifier put in the run metadata by SessionResultsAgent, or None
+    """
+    if run_manager is None:
+        return None
+    return (getattr(run_manager, "metadata", None) or {}).get("session_id")
+
+
+class SessionResultsAgent:
+    """
+    Tag each turn's tool calls with the session, so query tools can save and read its last result.
+
+    RunnableWithMessageHistory keeps the session identifier in the config's "configurable";
+    this copies it into the run metadata, which is inherited by every tool run.
+    """
+
+    def __init__(self, agent):
+        """
+        Initialize the wrapper.
+
+        Args:
+            agent: Agent executor invoked with a "session_id" configurable
+        """
+        self.agent = agent
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def invoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Invoke the agent with the session in the run metadata."""
+        return self.agent.invoke(inputs, config=self._tag(config), **kwargs)
+
+    async def ainvoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Async counterpart of invoke()."""
+        return await self.agent.ainvoke(inputs, config=self._tag(config), **kwargs)
+
+    async def astream_events(self, inputs: dict, config: Optional[dict] = None, **kwargs):
+        """Stream agent events with the session in the run metadata."""
+        async for event in self.agent.astream_events(inputs, config=self._tag(config), **kwargs):
+            yield event
+
+    @staticmethod
+    def _tag(config: Optional[dict]) -> dict:
+        config = dict(config or {})
+        session_id = (config.get("configurable") or {}).get("session_id", "default")
+        config["metadata"] = {**(config.get("metadata") or {}), "session_id": session_id}
+        return config
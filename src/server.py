@@ -0,0 +1,224 @@
+"""
+HTTP/WebSocket server exposing the agent to many concurrent sessions.
+"""
+
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from .memory import clear_memory
+from .streaming import aiter_turn
+
+
+def _require_aiohttp():
+    """Import aiohttp, explaining how to install it when missing."""
+    try:
+        from aiohttp import WSMsgType, web
+    except ImportError as e:  # pragma: no cover - depends on the environment
+        raise ImportError(
+            "Server mode requires aiohttp. Install it with: pip install 'ecommerce-db-chat[server]'"
+        ) from e
+    return web, WSMsgType
+
+
+class ChatService:
+    """Run agent turns for many sessions concurrently."""
+
+    def __init__(self, agent, max_concurrent_turns: int = 64):
+        """
+        Initialize the service.
+
+        Args:
+            agent: Agent executor supporting ainvoke() and astream_events()
+            max_concurrent_turns: Maximum number of turns in flight across all sessions
+        """
+        self.agent = agent
+        self.max_concurrent_turns = max_concurrent_turns
+        self.completed = 0
+        self.failed = 0
+        self._turns = None
+        self._session_locks: dict = {}
+
+    @property
+    def active_sessions(self) -> int:
+        """Number of sessions with a turn running or waiting."""
+        return len(self._session_locks)
+
+    @asynccontextmanager
+    async def session_turn(self, session_id: str):
+        """
+        Admit one turn for a session.
+
+        Turns of the same session run one at a time so the conversation history stays
+        ordered; turns of different sessions run concurrently up to the global bound.
+        """
+        if self._turns is None:
+            self._turns = asyncio.Semaphore(self.max_concurrent_turns)
+        lock, users = self._session_locks.get(session_id, (asyncio.Lock(), 0))
+        self._session_locks[session_id] = (lock, users + 1)
+        try:
+            async with lock, self._turns:
+                yield
+        finally:
+            lock, users = self._session_locks[session_id]
+            if users == 1:
+                del self._session_locks[session_id]
+            else:
+                self._session_locks[session_id] = (lock, users - 1)
+
+    async def ask(self, question: str, session_id: str) -> dict:
+        """
+        Answer a question within a session.
+
+        Args:
+            question: User question
+            session_id: Session identifier for conversation memory
+
+        Returns:
+            Dictionary with the session id, answer and elapsed seconds
+        """
+        start = time.perf_counter()
+        async with self.session_turn(session_id):
+            try:
+                response = await self.agent.ainvoke(
+                    {"input": question},
+                    config={"configurable": {"session_id": session_id}},
+                )
+            except Exception:
+                self.failed += 1
+                raise
+        self.completed += 1
+        return {
+            "session_id": session_id,
+            "answer": response["output"],
+            "cached": bool(response.get("cached")),
+            "elapsed": round(time.perf_counter() - start, 4),
+        }
+
+    async def stream(self, question: str, session_id: str):
+        """
+        Answer a question within a session, yielding progress messages.
+
+        Args:
+            question: User question
+            session_id: Session identifier for conversation memory
+
+        Yields:
+            JSON-serializable progress messages, ending with an "answer" message
+        """
+        start = time.perf_counter()
+        async with self.session_turn(session_id):
+            async for event in aiter_turn(self.agent, question, session_id):
+                if event[0] == "token":
+                    yield {"type": "token", "content": event[1]}
+                elif event[0] == "intermediate":
+                    # The tokens sent so far came from a tool-calling step, not the answer
+                    yield {"type": "intermediate"}
+                elif event[0] == "tool_start":
+                    yield {"type": "tool_start", "tool": event[1]}
+                elif event[0] == "tool_end":
+                    yield {"type": "tool_end", "tool": event[1], "rows": event[2]}
+                else:
+                    self.completed += 1
+                    yield {
+                        "type": "answer",
+                        "session_id": session_id,
+                        "answer": event[1].get("output", ""),
+                        "elapsed": round(time.perf_counter() - start, 4),
+                    }
+
+
+def create_app(agent, max_concurrent_turns: int = 64):
+    """
+    Create the aiohttp application.
+
+    Routes:
+        GET /health: liveness and turn counters
+        POST /chat: {"question": ..., "session_id": ...} -> answer JSON
+        DELETE /sessions/{session_id}: forget a session's conversation history
+        GET /ws: WebSocket; each {"question": ..., "session_id": ...} message streams
+            progress messages followed by an "answer" message
+
+    Args:
+        agent: Agent executor supporting ainvoke() and astream_events()
+        max_concurrent_turns: Maximum number of turns in flight across all sessions
+
+    Returns:
+        aiohttp web.Application
+    """
+    web, WSMsgType = _require_aiohttp()
+    service = ChatService(agent, max_concurrent_turns)
+
+    async def health(request):
+        return web.json_response(
+            {
+                "status": "ok",
+                "active_sessions": service.active_sessions,
+                "completed": service.completed,
+                "failed": service.failed,
+            }
+        )
+
+    async def chat(request):
+        try:
+            body = await request.json()
+            question = str(body["question"]).strip()
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "Expected JSON body with a 'question' field"}, status=400)
+        if not question:
+            return web.json_response({"error": "Question must not be empty"}, status=400)
+
+        session_id = str(body.get("session_id") or uuid.uuid4().hex)
+        try:
+            return web.json_response(await service.ask(question, session_id))
+        except Exception as e:
+            return web.json_response({"session_id": session_id, "error": str(e)}, status=500)
+
+    async def delete_session(request):
+        clear_memory(request.match_info["session_id"])
+        return web.json_response({"deleted": request.match_info["session_id"]})
+
+    async def websocket(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        default_session = uuid.uuid4().hex
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            try:
+                body = message.json()
+                question = str(body["question"]).strip()
+            except (ValueError, KeyError, TypeError):
+                await ws.send_json({"type": "error", "error": "Expected JSON with a 'question' field"})
+                continue
+            session_id = str(body.get("session_id") or default_session)
+            try:
+                async for progress in service.stream(question, session_id):
+                    await ws.send_json(progress)
+            except Exception as e:
+                service.failed += 1
+                await ws.send_json({"type": "error", "session_id": session_id, "error": str(e)})
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    app.router.add_post("/chat", chat)
+    app.router.add_delete("/sessions/{session_id}", delete_session)
+    app.router.add_get("/ws", websocket)
+    return app
+
+
+def run_server(agent, host: str, port: int, max_concurrent_turns: int = 64) -> None:
+    """
+    Serve the agent over HTTP until interrupted.
+
+    Args:
+        agent: Agent executor supporting ainvoke() and astream_events()
+        host: Interface to bind
+        port: Port to listen on
+        max_concurrent_turns: Maximum number of turns in flight across all sessions
+    """
+    web, _ = _require_aiohttp()
+    print(f"Serving the e-commerce chat agent on http://{host}:{port} (POST /chat, GET /ws)")
+    web.run_app(create_app(agent, max_concurrent_turns), host=host, port=port, print=None)
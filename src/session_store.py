@@ -0,0 +1,284 @@
+"""
+Memory-bounded session store with optional SQLite persistence.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from pydantic import PrivateAttr
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# Rough per-message bookkeeping overhead on top of the serialized message
+_MESSAGE_OVERHEAD = 200
+
+
+class SessionHistory(InMemoryChatMessageHistory):
+    """Chat history for one session, with a rolling summary of turns folded out of the prompt."""
+
+    summary: str = ""
+    summarized: int = 0
+
+    _listener: Optional[Callable] = PrivateAttr(default=None)
+    _session_id: str = PrivateAttr(default="")
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Add a message, reporting it to the owning store."""
+        super().add_message(message)
+        if self._listener is not None:
+            self._listener(self, "append", message)
+
+    def clear(self) -> None:
+        """Clear the messages and the summary."""
+        super().clear()
+        self.summary = ""
+        self.summarized = 0
+        if self._listener is not None:
+            self._listener(self, "clear", None)
+
+    def update_summary(self, summary: str, summarized: int) -> None:
+        """
+        Replace the rolling summary.
+
+        Args:
+            summary: Summary of the folded turns
+            summarized: Number of leading messages folded into the summary
+        """
+        self.summary = summary
+        self.summarized = summarized
+        if self._listener is not None:
+            self._listener(self, "summary", None)
+
+
+def _message_size(message: BaseMessage) -> int:
+    """Approximate memory held by a message."""
+    return len(str(message.content)) + _MESSAGE_OVERHEAD
+
+
+def _history_size(history: SessionHistory) -> int:
+    """Approximate memory held by a session history."""
+    return sum(_message_size(m) for m in history.messages) + len(history.summary)
+
+
+class SessionStore:
+    """
+    Keep hot session histories in memory under an LRU and a byte budget.
+
+    With a database path, sessions are persisted to SQLite: evicted sessions are
+    paged back in on the next get(), and changes are queued and written in batches
+    (after flush_interval seconds or flush_batch changes, and at exit). Without a
+    path, evicted sessions are forgotten, which still bounds memory.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_sessions: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        flush_batch: int = 256,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: SQLite file for persistence, or None to keep sessions in memory only
+            max_sessions: Maximum number of sessions kept in memory
+            max_bytes: Approximate memory budget for the sessions kept in memory
+            flush_interval: Seconds a queued change may wait before it is written
+            flush_batch: Number of queued changes that triggers an immediate write
+        """
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.evictions = 0
+        self.loads = 0
+        self._sessions: OrderedDict[str, SessionHistory] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._bytes = 0
+        self._pending: list = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(_SCHEMA)
+            atexit.register(self.close)
+
+    def __len__(self) -> int:
+        """Number of sessions held in memory."""
+        return len(self._sessions)
+
+    @property
+    def bytes(self) -> int:
+        """Approximate memory held by the in-memory sessions."""
+        return self._bytes
+
+    def get(self, session_id: str) -> SessionHistory:
+        """
+        Get a session's history, paging it in from disk or creating it if needed.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+
+        Returns:
+            SessionHistory for the session
+        """
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is not None:
+                self._sessions.move_to_end(session_id)
+                return history
+
+            history = self._load(session_id)
+            history._session_id = session_id
+            history._listener = self._on_change
+            self._sessions[session_id] = history
+            self._sizes[session_id] = _history_size(history)
+            self._bytes += self._sizes[session_id]
+            self._evict(keep=session_id)
+            return history
+
+    def delete(self, session_id: str) -> None:
+        """
+        Forget a session, in memory and on disk.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+        """
+        with self._lock:
+            history = self._sessions.pop(session_id, None)
+            self._bytes -= self._sizes.pop(session_id, 0)
+            if history is not None:
+                history._listener = None
+                history.clear()
+            if self._conn is not None:
+                self._queue(("clear", session_id))
+
+    def flush(self) -> None:
+        """Write all queued changes to disk in one transaction."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._conn is None or not self._pending:
+                self._pending = []
+                return
+            pending, self._pending = self._pending, []
+            now = time.time()
+            with self._conn:
+                for op in pending:
+                    if op[0] == "append":
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO messages (session_id, seq, message) VALUES (?, ?, ?)", op[1:]
+                        )
+                        self._touch(op[1], now)
+                    elif op[0] == "summary":
+                        self._touch(op[1], now)
+                        self._conn.execute(
+                            "UPDATE sessions SET summary = ?, summarized = ? WHERE session_id = ?",
+                            (op[2], op[3], op[1]),
+                        )
+                    else:
+                        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (op[1],))
+                        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (op[1],))
+
+    def close(self) -> None:
+        """Flush queued changes and close the database."""
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _touch(self, session_id: str, now: float) -> None:
+        """Create or refresh a session row."""
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, now),
+        )
+
+    def _load(self, session_id: str) -> SessionHistory:
+        """Read a session from disk, or create an empty one."""
+        if self._conn is None:
+            return SessionHistory()
+        self.flush()
+        row = self._conn.execute(
+            "SELECT summary, summarized FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return SessionHistory()
+        self.loads += 1
+        rows = self._conn.execute(
+            "SELECT message FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        messages = messages_from_dict([json.loads(message) for (message,) in rows])
+        return SessionHistory(messages=messages, summary=row[0], summarized=row[1])
+
+    def _on_change(self, history: SessionHistory, kind: str, message: Optional[BaseMessage]) -> None:
+        """Queue a change to a session for writing and account for its memory."""
+        with self._lock:
+            session_id = history._session_id
+            if self._conn is not None:
+                if kind == "append":
+                    seq = len(history.messages) - 1
+                    self._queue(("append", session_id, seq, json.dumps(message_to_dict(message))))
+                elif kind == "summary":
+                    self._queue(("summary", session_id, history.summary, history.summarized))
+                else:
+                    self._queue(("clear", session_id))
+
+            # Sessions evicted while a turn still holds them are persisted but no longer counted
+            if self._sessions.get(session_id) is history:
+                size = _message_size(message) if kind == "append" else 0
+                if kind == "summary":
+                    size = _history_size(history) - self._sizes[session_id]
+                elif kind == "clear":
+                    size = -self._sizes[session_id]
+                self._sizes[session_id] += size
+                self._bytes += size
+                self._evict(keep=session_id)
+
+    def _queue(self, op: tuple) -> None:
+        """Queue a write, flushing now if the batch is full or scheduling a flush otherwise."""
+        self._pending.append(op)
+        if len(self._pending) >= self.flush_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used sessions (other than keep) until both budgets are met."""
+        while len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+            session_id = next((sid for sid in self._sessions if sid != keep), None)
+            if session_id is None:
+                return
+            self._sessions.pop(session_id)
+            self._bytes -= self._sizes.pop(session_id)
+            self.evictions += 1
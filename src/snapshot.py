@@ -0,0 +1,141 @@
+"""
+In-memory snapshot of the database for read-only sessions, copied with SQLite's backup API.
+"""
+
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from .cache import DatabaseWatcher
+from .schema import connect_read_only
+
+# Pages copied per backup step; progress is reported after each step
+BACKUP_STEP_PAGES = 16384
+
+_names = itertools.count()
+
+
+def database_size(db_path: str) -> int:
+    """
+    Estimate the memory an in-memory copy of a database needs.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        Size of the database pages in bytes
+    """
+    conn = connect_read_only(db_path)
+    try:
+        (page_count,) = conn.execute("PRAGMA page_count").fetchone()
+        (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+        return page_count * page_size
+    finally:
+        conn.close()
+
+
+class MemorySnapshot:
+    """
+    Read-only copy of a database file held in a shared-cache in-memory database.
+
+    The file is copied page by page with the backup API, and every connection handed out
+    reads the same copy, so queries never wait on disk page faults. When the file changes,
+    the next connection triggers a reload into a fresh in-memory database; connections
+    still open on the previous copy keep reading it until they close.
+    """
+
+    def __init__(self, db_path: str, progress: Optional[Callable[[int, int], None]] = None):
+        """
+        Initialize the snapshot (nothing is copied until load() or connect()).
+
+        Args:
+            db_path: Path to the SQLite database file
+            progress: Optional callback receiving (bytes copied, total bytes) while loading
+        """
+        self.db_path = db_path
+        self.progress = progress
+        self.watcher = DatabaseWatcher(db_path)
+        self.loads = 0
+        self.seconds = 0.0
+        self._uri: Optional[str] = None
+        self._keeper: Optional[sqlite3.Connection] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Copy the database file into a new in-memory database and switch connections to it."""
+        with self._lock:
+            self._load_locked()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a read-only connection to the snapshot, reloading it first if the file changed.
+
+        Returns:
+            sqlite3 connection usable from any thread
+        """
+        with self._lock:
+            version = self.watcher.version()
+            # A file moved away or deleted leaves the copy as the only database to read
+            if self._keeper is None or (version != self._version and version != ("missing",)):
+                self._load_locked()
+            uri = self._uri
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def engine_args(self) -> dict:
+        """
+        Build SQLAlchemy engine arguments reading from the snapshot.
+
+        Returns:
+            Keyword arguments for sqlalchemy.create_engine()
+        """
+        # Imported here so commands that never build the agent skip SQLAlchemy's import cost
+        from sqlalchemy.pool import NullPool
+
+        # Opening a connection to the in-memory database is cheap, and a fresh connection
+        # per query is what lets a reload take effect without draining a pool
+        return {"creator": self.connect, "poolclass": NullPool}
+
+    def close(self) -> None:
+        """Release the in-memory copy (once no connection reads it any more)."""
+        with self._lock:
+            if self._keeper is not None:
+                self._keeper.close()
+                self._keeper = None
+            self.watcher.close()
+
+    def _load_locked(self) -> None:
+        start = time.perf_counter()
+        # Read the version first so a change made during the copy triggers another reload
+        version = self.watcher.version()
+        uri = f"file:snapshot-{next(_names)}?mode=memory&cache=shared"
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = connect_read_only(self.db_path)
+        try:
+            (page_size,) = source.execute("PRAGMA page_size").fetchone()
+            (page_count,) = source.execute("PRAGMA page_count").fetchone()
+            if self.progress is not None:
+                self.progress(0, page_count * page_size)
+            source.backup(keeper, pages=BACKUP_STEP_PAGES, progress=self._report(page_size))
+        except BaseException:
+            keeper.close()
+            raise
+        finally:
+            source.close()
+
+        previous, self._keeper, self._uri, self._version = self._keeper, keeper, uri, version
+        if previous is not None:
+            previous.close()
+        self.loads += 1
+        self.seconds = time.perf_counter() - start
+
+    def _report(self, page_size: int):
+        """Adapt the backup progress callback (status, pages remaining, total pages) to bytes."""
+        if self.progress is None:
+            return None
+        return lambda status, remaining, total: self.progress((total - remaining) * page_size, total * page_size)
@@ -0,0 +1,187 @@
+"""
+Token-by-token streaming of agent answers for the CLI.
+"""
+
+import ast
+import asyncio
+import sys
+from typing import Optional, TextIO
+
+from .config import SUMMARY_TAG
+from .results import parse_table
+
+# Friendlier descriptions of the SQL toolkit's tools while they run
+_TOOL_LABELS = {
+    "sql_db_query": "running SQL…",
+    "sql_db_schema": "reading table schema…",
+    "sql_db_list_tables": "listing tables…",
+    "sql_db_query_checker": "checking SQL…",
+    "sql_db_query_page": "fetching more rows…",
+    "transactions_aggregate": "aggregating in memory…",
+    "product_lookup": "looking up products…",
+    "sql_db_query_last_result": "refining the last result…",
+}
+
+
+def count_rows(output) -> Optional[int]:
+    """
+    Count the rows in a sql_db_query result.
+
+    Args:
+        output: Tool output (repr of a list of tuples, a compact table, or an error message)
+
+    Returns:
+        Number of rows, or None if the output is not a result set
+    """
+    text = getattr(output, "content", output)
+    if not isinstance(text, str):
+        return None
+    if text == "":
+        return 0
+    if not text.startswith("["):
+        # Compact tables (see results.ResultFormatter) count the rows of the page shown
+        shape = parse_table(text)
+        return shape[0] if shape is not None else None
+    # Capped results end with a truncation note on its own line
+    text = text.split("\n", 1)[0]
+    try:
+        rows = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return None
+    return len(rows) if isinstance(rows, list) else None
+
+
+async def aiter_turn(agent, question: str, session_id: str = "default", callbacks: Optional[list] = None):
+    """
+    Run one turn through the agent's event stream and yield simplified progress events.
+
+    The turn goes through the same runnable as invoke(), so the message history
+    wrapper still records the question and answer.
+
+    Args:
+        agent: Agent executor (optionally wrapped with memory and caches)
+        question: User question
+        session_id: Session identifier for conversation memory
+        callbacks: Optional callback handlers for the turn (e.g. a TurnProfiler)
+
+    Yields:
+        ("token", text) for answer tokens as they arrive, ("intermediate",) when a model
+        call whose tokens were yielded turns out to be a tool-calling step rather than the
+        answer, ("tool_start", name) and ("tool_end", name, rows) for tool activity, then
+        ("end", response) once
+    """
+    response = {"input": question, "output": ""}
+    config = {"configurable": {"session_id": session_id}}
+    if callbacks:
+        config["callbacks"] = callbacks
+    # Model calls known to be tool-calling steps, and those whose tokens were yielded
+    tool_runs: set = set()
+    streamed_runs: set = set()
+    events = agent.astream_events({"input": question}, config=config, version="v2")
+    async for event in events:
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            if SUMMARY_TAG in (event.get("tags") or ()):
+                continue
+            run_id = event.get("run_id")
+            chunk = event["data"]["chunk"]
+            if run_id not in tool_runs and getattr(chunk, "tool_call_chunks", None):
+                tool_runs.add(run_id)
+                if run_id in streamed_runs:
+                    yield ("intermediate",)
+            if run_id in tool_runs:
+                continue
+            if isinstance(chunk.content, str) and chunk.content:
+                streamed_runs.add(run_id)
+                yield ("token", chunk.content)
+        elif kind == "on_chat_model_end":
+            # Some models only report their tool calls in the final message
+            run_id = event.get("run_id")
+            output = event["data"].get("output")
+            if run_id not in tool_runs and getattr(output, "tool_calls", None) and run_id in streamed_runs:
+                yield ("intermediate",)
+            tool_runs.discard(run_id)
+            streamed_runs.discard(run_id)
+        elif kind == "on_tool_start":
+            yield ("tool_start", event["name"])
+        elif kind == "on_tool_end":
+            rows = count_rows(event["data"].get("output")) if event["name"] == "sql_db_query" else None
+            yield ("tool_end", event["name"], rows)
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            output = event["data"].get("output")
+            if isinstance(output, dict):
+                response = output
+    yield ("end", response)
+
+
+async def astream_answer(
+    agent, question: str, session_id: str = "default", out: TextIO = sys.stdout, callbacks: Optional[list] = None
+) -> dict:
+    """
+    Run one turn, printing answer tokens and agent steps as they happen.
+
+    Args:
+        agent: Agent executor (optionally wrapped with memory and caches)
+        question: User question
+        session_id: Session identifier for conversation memory
+        out: Stream receiving the output
+        callbacks: Optional callback handlers for the turn
+
+    Returns:
+        The agent response dictionary with the final "output"
+    """
+    response: dict = {}
+    answer_started = False
+
+    async for event in aiter_turn(agent, question, session_id, callbacks):
+        if event[0] == "token":
+            if not answer_started:
+                out.write("💡 Answer: ")
+                answer_started = True
+            out.write(event[1])
+        elif event[0] == "intermediate":
+            # The text printed so far led up to a tool call; the answer gets its own line
+            out.write("\n")
+            answer_started = False
+        elif event[0] == "tool_start":
+            out.write(f"   🔧 {_TOOL_LABELS.get(event[1], event[1] + '…')}\n")
+        elif event[0] == "tool_end" and event[1] == "sql_db_query":
+            out.write("   ⚠️  query failed, retrying\n" if event[2] is None else f"   📊 {event[2]} rows\n")
+        elif event[0] == "end":
+            response = event[1]
+        out.flush()
+
+    # Answers that were not produced token by token (e.g. cache hits) are printed whole
+    if not answer_started:
+        out.write(f"💡 Answer: {response.get('output', '')}")
+    out.write("\n")
+    out.flush()
+    return response
+
+
+def stream_answer(
+    agent,
+    question: str,
+    session_id: str = "default",
+    loop=None,
+    out: TextIO = sys.stdout,
+    callbacks: Optional[list] = None,
+) -> dict:
+    """
+    Synchronous wrapper around astream_answer().
+
+    Args:
+        agent: Agent executor (optionally wrapped with memory and caches)
+        question: User question
+        session_id: Session identifier for conversation memory
+        loop: Event loop to run on; reusing one keeps async HTTP clients usable across turns
+        out: Stream receiving the output
+        callbacks: Optional callback handlers for the turn
+
+    Returns:
+        The agent response dictionary with the final "output"
+    """
+    coroutine = astream_answer(agent, question, session_id, out, callbacks)
+    if loop is None:
+        return asyncio.run(coroutine)
+    return loop.run_until_complete(coroutine)
@@ -0,0 +1,445 @@
+"""
+Deterministic fast path answering common question templates with vetted SQL, without the LLM.
+"""
+
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from .cache import DatabaseWatcher
+from .rollups import rollup_status
+from .sales import PRODUCT_FILTER, sales_status
+from .schema import connect_read_only
+
+# Common ways of naming countries that differ from the Country column
+COUNTRY_ALIASES = {
+    "uk": "United Kingdom",
+    "britain": "United Kingdom",
+    "great britain": "United Kingdom",
+    "england": "United Kingdom",
+    "ireland": "EIRE",
+    "us": "USA",
+    "usa": "USA",
+    "united states": "USA",
+}
+
+_NUMBER_WORDS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "fifteen": 15,
+    "twenty": 20,
+}
+
+_ASK = r"(?:(?:what|which) (?:are|were|is|was) |(?:show|tell|give)(?: me)? |list |get )?(?:the )?"
+
+_TEMPLATES = [
+    (
+        "top_products",
+        re.compile(
+            rf"^{_ASK}top (?P<n>\d+|{'|'.join(_NUMBER_WORDS)}) (?:best selling |selling )?products? "
+            r"by (?P<metric>revenue|sales|quantity|units sold|units)(?P<rest>.*)$"
+        ),
+    ),
+    ("monthly_revenue", re.compile(rf"^{_ASK}monthly (?:revenue|sales)(?: trend| breakdown)?(?P<rest>.*)$")),
+    ("total_revenue", re.compile(rf"^{_ASK}total (?:revenue|sales)(?P<rest>.*)$")),
+    (
+        "customer_count",
+        re.compile(
+            r"^(?:how many|what is the number of) (?:unique |distinct )?customers"
+            r"(?: are there| do we have| did we have| were there| are| were)?(?P<rest>.*)$"
+        ),
+    ),
+]
+
+_QUALIFIER = re.compile(r"\s*\b(?:in|for|from|during)\b\s*")
+
+
+class TemplateMatcher:
+    """
+    Recognize parameterized report questions and answer them with vetted SQL.
+
+    Supported templates: top N products by revenue or quantity, monthly revenue,
+    total revenue and customer counts, each optionally restricted to a country and/or
+    a year ("in Germany", "for 2011"). Countries are matched against the values in the
+    database, which are reloaded whenever the database changes. Questions with any
+    other wording or qualifier do not match and go to the agent.
+
+    When the materialized rollups are up to date, the templates they can answer read the
+    rollups (thousands of rows) instead of scanning the transactions table; the others
+    read the pre-cleaned sales table when it is built.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        use_rollups: bool = True,
+        use_sales: bool = True,
+        connect: Optional[Callable[[], sqlite3.Connection]] = None,
+        timeout: float = 0.0,
+    ):
+        """
+        Initialize the matcher.
+
+        Args:
+            db_path: Path to the SQLite database file
+            use_rollups: Whether to answer from the rollups when they are up to date
+            use_sales: Whether to read the sales table instead of filtering transactions
+            connect: Opens the connections answers are queried on (defaults to a read-only
+                connection to db_path; e.g. MemorySnapshot.connect)
+            timeout: Seconds an answer's queries may run before they are cancelled and the
+                question is left to the agent (0 disables the budget)
+        """
+        self.db_path = db_path
+        self.connect = connect or (lambda: connect_read_only(db_path))
+        self.timeout = timeout
+        self.use_rollups = use_rollups
+        self.use_sales = use_sales
+        self.watcher = DatabaseWatcher(db_path)
+        self.hits = 0
+        self.rollup_hits = 0
+        self._answers: dict = {}
+        self._countries: Optional[dict] = None
+        self._rollups: Optional[bool] = None
+        self._sales: Optional[bool] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def match(self, question: str) -> Optional[tuple[str, dict]]:
+        """
+        Match a question against the templates.
+
+        Args:
+            question: User question
+
+        Returns:
+            (template name, parameters), or None if no template matches
+        """
+        text = " ".join(re.sub(r"[^\w\s-]", " ", question.lower()).replace("-", " ").split())
+        for name, pattern in _TEMPLATES:
+            found = pattern.match(text)
+            if found is None:
+                continue
+            params = self._qualifiers(found.group("rest"))
+            if params is None:
+                return None
+            if name == "top_products":
+                n = found.group("n")
+                params["n"] = int(n) if n.isdigit() else _NUMBER_WORDS[n]
+                params["metric"] = "revenue" if found.group("metric") in ("revenue", "sales") else "quantity"
+                if not 0 < params["n"] <= 100:
+                    return None
+            return name, params
+        return None
+
+    def answer(self, question: str) -> Optional[dict]:
+        """
+        Answer a question from a template.
+
+        Args:
+            question: User question
+
+        Returns:
+            Response dictionary like the agent's, or None if no template matches
+        """
+        matched = self.match(question)
+        if matched is None:
+            return None
+        name, params = matched
+        # Answers only change with the data, so each variant is queried once per database version
+        key = (name, tuple(sorted(params.items())))
+        with self._lock:
+            self._check_version()
+            version = self._version
+            output = self._answers.get(key)
+        if output is None:
+            conn = self._open()
+            try:
+                output = getattr(self, f"_{name}")(conn, **params)
+            finally:
+                conn.close()
+            with self._lock:
+                # An answer computed while the database changed belongs to the old version
+                if self._version == version:
+                    self._answers[key] = output
+        self.hits += 1
+        return {"input": question, "output": output, "template": name}
+
+    def _qualifiers(self, rest: str) -> Optional[dict]:
+        """Parse trailing "in <country>" / "for <year>" qualifiers; None if any is not recognized."""
+        parts = _QUALIFIER.split(rest.strip())
+        if parts[0]:
+            return None
+        params: dict = {}
+        for part in parts[1:]:
+            if re.fullmatch(r"(?:19|20)\d\d", part) and "year" not in params:
+                params["year"] = int(part)
+                continue
+            country = self._country(part)
+            if country is None or "country" in params:
+                return None
+            params["country"] = country
+        return params
+
+    def _country(self, name: str) -> Optional[str]:
+        """Resolve a country name to its value in the database."""
+        countries = self._load_countries()
+        if name not in countries:
+            name = name.removeprefix("the ")
+        if name not in countries:
+            name = COUNTRY_ALIASES.get(name, name).lower()
+        return countries.get(name)
+
+    def _load_countries(self) -> dict:
+        """Distinct countries by lowercase name."""
+        with self._lock:
+            self._check_version()
+            if self._countries is None:
+                conn = self._open()
+                try:
+                    rows = conn.execute("SELECT DISTINCT Country FROM transactions WHERE Country IS NOT NULL")
+                    self._countries = {country.lower(): country for (country,) in rows}
+                except sqlite3.OperationalError as e:
+                    # A cancelled scan is retried next time; a database without the column is not
+                    if "interrupted" in str(e):
+                        return {}
+                    self._countries = {}
+                except sqlite3.Error:
+                    self._countries = {}
+                finally:
+                    conn.close()
+            return self._countries
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection whose queries are cancelled once the time budget is spent."""
+        conn = self.connect()
+        if self.timeout > 0:
+            deadline = time.monotonic() + self.timeout
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+        return conn
+
+    def _check_version(self) -> None:
+        """Forget the countries and answers when the database has changed."""
+        version = self.watcher.version()
+        if version != self._version:
+            self._countries = None
+            self._rollups = None
+            self._sales = None
+            self._answers.clear()
+            self._version = version
+
+    def _rollups_current(self, conn) -> bool:
+        """Whether the rollups can answer for the current database version."""
+        if self._rollups is None:
+            try:
+                self._rollups = self.use_rollups and all(s == "ok" for s in rollup_status(conn).values())
+            except sqlite3.Error:
+                self._rollups = False
+        if self._rollups:
+            self.rollup_hits += 1
+        return self._rollups
+
+    def _rows(self, conn, country: Optional[str], year: Optional[int]) -> tuple[str, str, str, list]:
+        """Table, revenue expression and product-only conditions for queries over individual rows."""
+        if self._sales is None:
+            try:
+                self._sales = self.use_sales and sales_status(conn) == "ok"
+            except sqlite3.Error:
+                self._sales = False
+        if self._sales:
+            return ("sales", "revenue", *_where(country, year, cleaned=True))
+        return ("transactions", "Quantity * UnitPrice", *_where(country, year))
+
+    def _top_products(self, conn, n: int, metric: str, country=None, year=None) -> str:
+        if country is None and self._rollups_current(conn):
+            where, args = _rollup_where(None, year)
+            rows = conn.execute(
+                f"SELECT Description, SUM({metric}) AS value FROM rollup_product_month WHERE {where} "
+                "GROUP BY Description ORDER BY value DESC LIMIT ?",
+                (*args, n),
+            ).fetchall()
+        else:
+            table, revenue, where, args = self._rows(conn, country, year)
+            value = f"SUM({revenue})" if metric == "revenue" else "SUM(Quantity)"
+            rows = conn.execute(
+                f"SELECT Description, {value} AS value FROM {table} WHERE {where} "
+                "GROUP BY Description ORDER BY value DESC LIMIT ?",
+                (*args, n),
+            ).fetchall()
+        scope = _scope(country, year)
+        if not rows:
+            return f"No product sales found{scope}."
+        label = "revenue" if metric == "revenue" else "units sold"
+        lines = [f"Top {len(rows)} products by {label}{scope}:"]
+        for rank, (description, total) in enumerate(rows, start=1):
+            lines.append(f"{rank}. {description}: {_number(total, metric == 'revenue')}")
+        return "\n".join(lines)
+
+    def _monthly_revenue(self, conn, country=None, year=None) -> str:
+        if self._rollups_current(conn):
+            where, args = _rollup_where(country, year)
+            rows = conn.execute(
+                f"SELECT month, SUM(revenue) FROM {'rollup_country_month' if country else 'rollup_month'} "
+                f"WHERE {where} GROUP BY month ORDER BY month",
+                args,
+            ).fetchall()
+        else:
+            table, revenue, where, args = self._rows(conn, country, year)
+            rows = conn.execute(
+                f"SELECT substr(InvoiceDate, 1, 7) AS month, SUM({revenue}) FROM {table} "
+                f"WHERE {where} GROUP BY month ORDER BY month",
+                args,
+            ).fetchall()
+        scope = _scope(country, year)
+        if not rows:
+            return f"No product sales found{scope}."
+        return "\n".join([f"Monthly revenue{scope}:"] + [f"{month}: {_number(total)}" for month, total in rows])
+
+    def _total_revenue(self, conn, country=None, year=None) -> str:
+        if self._rollups_current(conn):
+            where, args = _rollup_where(country, year)
+            table = "rollup_country_month" if country else "rollup_month"
+            (total,) = conn.execute(f"SELECT SUM(revenue) FROM {table} WHERE {where}", args).fetchone()
+        else:
+            table, revenue, where, args = self._rows(conn, country, year)
+            (total,) = conn.execute(f"SELECT SUM({revenue}) FROM {table} WHERE {where}", args).fetchone()
+        return f"Total revenue{_scope(country, year)} was {_number(total or 0)}."
+
+    def _customer_count(self, conn, country=None, year=None) -> str:
+        # The customer rollup spans all time, so it cannot answer per-year counts
+        if year is None and self._rollups_current(conn):
+            where, args = _rollup_where(country, None)
+            (count,) = conn.execute(
+                f"SELECT COUNT(DISTINCT CustomerID) FROM rollup_customer WHERE {where}", args
+            ).fetchone()
+        else:
+            table, _, where, args = self._rows(conn, country, year)
+            (count,) = conn.execute(
+                f"SELECT COUNT(DISTINCT CustomerID) FROM {table} WHERE {where} AND CustomerID IS NOT NULL", args
+            ).fetchone()
+        return f"There are {count:,} customers with purchases{_scope(country, year)}."
+
+
+def _where(country: Optional[str], year: Optional[int], cleaned: bool = False) -> tuple[str, list]:
+    """Product-only filter (unless the rows are already cleaned) plus the optional country and year restrictions."""
+    clauses, args = ["1" if cleaned else PRODUCT_FILTER], []
+    if country is not None:
+        clauses.append("Country = ?")
+        args.append(country)
+    if year is not None:
+        clauses.append("InvoiceDate >= ? AND InvoiceDate < ?")
+        args.extend([f"{year}-01-01", f"{year + 1}-01-01"])
+    return " AND ".join(clauses), args
+
+
+def _rollup_where(country: Optional[str], year: Optional[int]) -> tuple[str, list]:
+    """Country and year restrictions on a rollup (already limited to product rows)."""
+    clauses, args = ["1"], []
+    if country is not None:
+        clauses.append("Country = ?")
+        args.append(country)
+    if year is not None:
+        clauses.append("month >= ? AND month < ?")
+        args.extend([f"{year}-01", f"{year + 1}-01"])
+    return " AND ".join(clauses), args
+
+
+def _scope(country: Optional[str], year: Optional[int]) -> str:
+    """Describe the country and year restrictions for an answer."""
+    return (f" in {country}" if country else "") + (f" in {year}" if year else "")
+
+
+def _number(value: float, decimals: bool = True) -> str:
+    """Format a total with thousands separators."""
+    return f"{value:,.2f}" if decimals else f"{value:,.0f}"
+
+
+class TemplateAgent:
+    """Answer template questions directly and pass every other question to the agent."""
+
+    def __init__(
+        self,
+        agent,
+        matcher: TemplateMatcher,
+        get_session_history: Optional[Callable[[str], Any]] = None,
+        discard_results: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize the wrapper.
+
+        Args:
+            agent: Agent executor (optionally wrapped with memory and caches)
+            matcher: Template matcher to try first
+            get_session_history: Session history factory; template answers are recorded
+                there so follow-up questions still see them
+            discard_results: Called with the session id after a template answer, to drop the
+                session's saved last query result, which no longer belongs to the latest answer
+        """
+        self.agent = agent
+        self.matcher = matcher
+        self.get_session_history = get_session_history
+        self.discard_results = discard_results
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def invoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Answer from a template when possible, otherwise invoke the agent."""
+        response = self._answer(inputs, config)
+        if response is not None:
+            return response
+        return self.agent.invoke(inputs, config=config, **kwargs)
+
+    async def ainvoke(self, inputs: dict, config: Optional[dict] = None, **kwargs) -> dict:
+        """Async counterpart of invoke()."""
+        # Uncached answers scan the database; keep them off the event loop
+        response = await asyncio.to_thread(self._answer, inputs, config)
+        if response is not None:
+            return response
+        return await self.agent.ainvoke(inputs, config=config, **kwargs)
+
+    async def astream_events(self, inputs: dict, config: Optional[dict] = None, **kwargs):
+        """Stream agent events, or a single root end event for a template answer."""
+        response = await asyncio.to_thread(self._answer, inputs, config)
+        if response is not None:
+            yield {
+                "event": "on_chain_end",
+                "name": type(self).__name__,
+                "run_id": "",
+                "parent_ids": [],
+                "tags": [],
+                "metadata": {},
+                "data": {"output": response},
+            }
+            return
+        async for event in self.agent.astream_events(inputs, config=config, **kwargs):
+            yield event
+
+    def _answer(self, inputs: dict, config: Optional[dict]) -> Optional[dict]:
+        """Answer a template question, recording the turn in the session history."""
+        try:
+            response = self.matcher.answer(inputs["input"])
+        except sqlite3.Error:
+            # Unusual databases (e.g. missing columns) and answers over the time budget
+            # fall back to the agent
+            return None
+        if response is None:
+            return None
+        session_id = ((config or {}).get("configurable") or {}).get("session_id", "default")
+        if self.discard_results is not None:
+            self.discard_results(session_id)
+        if self.get_session_history is not None:
+            history = self.get_session_history(session_id)
+            history.add_user_message(inputs["input"])
+            history.add_ai_message(response["output"])
+        return response
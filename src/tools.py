@@ -0,0 +1,319 @@
+"""
+SQL toolkit and tools used by the agent.
+"""
+
+import sqlite3
+from contextlib import nullcontext
+from typing import Literal, Optional
+
+from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import BaseSQLDatabaseTool, QuerySQLDatabaseTool
+from langchain_community.utilities.sql_database import truncate_word
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from .cache import QueryResultCache
+from .columnar import DIMENSIONS, METRICS, TransactionsFrame
+from .concurrency import ConcurrencyLimiter
+from .guards import QueryGuard
+from .indexes import QueryPlanAuditor
+from .products import ProductSearch
+from .results import ResultFormatter
+from .scratch import LAST_RESULT_TABLE, ResultCapture, ScratchResults, session_id_from
+
+# Appended to the sql_db_query description when results are formatted compactly
+COMPACT_RESULTS_NOTE = (
+    " Results are a compact table: a header line of column names, then one row per line with values "
+    "separated by |. Large results show the first page plus row count and column statistics."
+)
+
+
+class ChatQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """
+    sql_db_query tool with result caching, query plan auditing, a concurrency limit, execution
+    guards, compact result formatting and per-session scratch copies of the last result.
+    """
+
+    cache: Optional[QueryResultCache] = Field(default=None, exclude=True)
+    auditor: Optional[QueryPlanAuditor] = Field(default=None, exclude=True)
+    limiter: Optional[ConcurrencyLimiter] = Field(default=None, exclude=True)
+    guard: Optional[QueryGuard] = Field(default=None, exclude=True)
+    formatter: Optional[ResultFormatter] = Field(default=None, exclude=True)
+    results: Optional[ScratchResults] = Field(default=None, exclude=True)
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None):
+        """Execute the query, or return its cached result."""
+        session_id = session_id_from(run_manager) if self.results is not None else None
+
+        if self.cache is not None:
+            cached = self.cache.get(query)
+            if cached is not None:
+                # The rows behind a cached result are not at hand: reuse them from a session
+                # holding the same result, or drop the older saved result rather than let it
+                # pass for this one
+                if session_id is not None:
+                    self.results.reuse(session_id, query)
+                return cached
+
+        # Only queries that actually run are audited, not those answered from the cache
+        if self.auditor is not None:
+            self.auditor.record(query)
+        capture = self.results.capture() if session_id is not None else None
+        result = self.execute(query, capture=capture)
+        failed = isinstance(result, str) and result.startswith("Error:")
+
+        # A failed query leaves the last result in place, since the agent usually retries it
+        if capture is not None and not failed:
+            if capture.complete:
+                self.results.save(session_id, query, capture.columns, capture.rows)
+            else:
+                self.results.discard(session_id)
+
+        # Errors are returned as text so the agent can retry; never cache them
+        if self.cache is not None and not failed:
+            self.cache.put(query, result)
+        return result
+
+    def execute(self, query: str, page: int = 1, capture: Optional[ResultCapture] = None):
+        """Run the query under the concurrency limit, guard and formatter."""
+        with self.limiter.hold() if self.limiter is not None else nullcontext():
+            if self.formatter is not None:
+                return (self.guard or QueryGuard(0, 0, 0)).run(self.db, query, self.formatter, page, capture)
+            if self.guard is not None:
+                return self.guard.run(self.db, query, capture=capture)
+            return self.db.run_no_throw(query)
+
+
+class QueryPageInput(BaseModel):
+    """Arguments of the sql_db_query_page tool."""
+
+    query: str = Field(description="The same SQL query that was passed to sql_db_query")
+    page: int = Field(ge=2, description="Page of the result to return (page 1 is what sql_db_query returned)")
+
+
+class QueryPageTool(BaseSQLDatabaseTool, BaseTool):
+    """sql_db_query_page tool: further pages of a result that sql_db_query cut short."""
+
+    name: str = "sql_db_query_page"
+    description: str = (
+        "Return a further page of a sql_db_query result that was cut short. Input is the same SQL query "
+        "and the page number from the result footer. Only page through results you really need row by row."
+    )
+    args_schema: type[BaseModel] = QueryPageInput
+    query_tool: ChatQuerySQLDatabaseTool = Field(exclude=True)
+
+    def _run(self, query: str, page: int, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        """Format the requested page from the session's saved result, or re-run the query."""
+        tool = self.query_tool
+        session_id = session_id_from(run_manager) if tool.results is not None else None
+        if session_id is not None and tool.results.source(session_id) == query:
+            max_rows = tool.guard.max_rows if tool.guard is not None else 0
+
+            def consume(columns, rows):
+                rows = (tuple(truncate_word(value, length=self.db._max_string_length) for value in row) for row in rows)
+                return tool.formatter.format(columns, rows, page, max_rows=max_rows)
+
+            try:
+                result = tool.results.query(
+                    session_id,
+                    f"SELECT * FROM {LAST_RESULT_TABLE}",
+                    consume,
+                    tool.guard.timeout if tool.guard is not None else 5.0,
+                )
+            except sqlite3.Error:
+                result = None
+            if result is not None:
+                return result
+        # The plan of the query was audited when sql_db_query ran it
+        return tool.execute(query, page)
+
+
+class TransactionsAggregateInput(BaseModel):
+    """Arguments of the transactions_aggregate tool."""
+
+    group_by: list[Literal[DIMENSIONS]] = Field(
+        default_factory=list, description="Columns or InvoiceDate buckets to group by; empty for one total row"
+    )
+    metrics: list[Literal[METRICS]] = Field(
+        default_factory=lambda: ["revenue"],
+        description="revenue = SUM(Quantity*UnitPrice), orders/customers = distinct invoices/customers",
+    )
+    countries: Optional[list[str]] = Field(default=None, description="Only these Country values")
+    description_contains: Optional[str] = Field(default=None, description="Case-insensitive Description substring")
+    start_date: Optional[str] = Field(default=None, description="Inclusive start date, YYYY-MM-DD")
+    end_date: Optional[str] = Field(default=None, description="Exclusive end date, YYYY-MM-DD")
+    products_only: bool = Field(default=True, description="Exclude returns, zero prices and non-product lines")
+    returns_only: bool = Field(default=False, description="Only returned/cancelled lines (negative Quantity)")
+    order_by: Optional[str] = Field(default=None, description="Metric or group_by column to sort by")
+    descending: bool = True
+    limit: int = Field(default=20, ge=1, le=200)
+
+
+class TransactionsAggregateTool(BaseTool):
+    """Vectorized aggregates over the in-memory columnar copy of the transactions table."""
+
+    name: str = "transactions_aggregate"
+    description: str = (
+        "Fast aggregates over the transactions table: filter by country, date range and description, "
+        "group by columns or month/year/day/weekday/hour of InvoiceDate, and compute revenue, quantity, "
+        "rows, orders, customers or avg_price, sorted and limited. Prefer it to sql_db_query for totals, "
+        "rankings and trends; use sql_db_query for anything it cannot express. "
+        "Output: rows as a list of tuples, then the column names."
+    )
+    args_schema: type[BaseModel] = TransactionsAggregateInput
+    frame: TransactionsFrame = Field(exclude=True)
+    formatter: Optional[ResultFormatter] = Field(default=None, exclude=True)
+
+    def _run(self, run_manager: Optional[CallbackManagerForToolRun] = None, **kwargs) -> str:
+        """Run the aggregate, or describe why it cannot be answered here."""
+        try:
+            columns, rows = self.frame.aggregate(**kwargs)
+        except (ValueError, TypeError) as e:
+            # Invalid requests point the agent back at SQLite
+            return f"Error: {e}. Use sql_db_query instead."
+        if self.formatter is not None:
+            return self.formatter.format(columns, rows, more="narrow the filters or lower limit")
+        return f"{rows}\nColumns: {', '.join(columns)}"
+
+
+class ProductLookupInput(BaseModel):
+    """Arguments of the product_lookup tool."""
+
+    query: str = Field(description="Product words from the question, e.g. 'lanterns' or 'heart t-light holder'")
+    limit: int = Field(default=20, ge=1, le=200, description="Maximum number of products returned")
+
+
+class ProductLookupTool(BaseTool):
+    """Full-text product lookup resolving product words to stock codes."""
+
+    name: str = "product_lookup"
+    description: str = (
+        "Find products by words in their description (plurals and partial words match) through a full-text "
+        "index. Returns StockCode|Description lines, best matches first; filter transactions with "
+        "StockCode IN (...) using these codes instead of Description LIKE."
+    )
+    args_schema: type[BaseModel] = ProductLookupInput
+    search: ProductSearch = Field(exclude=True)
+
+    def _run(self, query: str, limit: int = 20, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        """Look the products up."""
+        try:
+            products = self.search.search(query, limit)
+        except sqlite3.Error as e:
+            return f"Error: {e}. Use sql_db_query with Description LIKE instead."
+        if not products:
+            return "No matching products. Try other words, or sql_db_query with Description LIKE."
+        return "\n".join(["StockCode|Description"] + [f"{code}|{description}" for code, description in products])
+
+
+class LastResultQueryInput(BaseModel):
+    """Arguments of the sql_db_query_last_result tool."""
+
+    query: str = Field(description=f"SQLite query over the {LAST_RESULT_TABLE} table")
+    page: int = Field(default=1, ge=1, description="1-based page of the result to return")
+
+
+class LastResultQueryTool(BaseTool):
+    """Query the session's saved last result instead of the full tables."""
+
+    name: str = "sql_db_query_last_result"
+    description: str = (
+        f"Run a read-only SQLite query over {LAST_RESULT_TABLE}, the saved result of your last sql_db_query in "
+        "this conversation, to refine it for a follow-up question (filter, re-sort, rank or re-aggregate it) "
+        "without re-running the query over the full tables. Only that table is available here. Results are a "
+        "compact table; pass page for later pages."
+    )
+    args_schema: type[BaseModel] = LastResultQueryInput
+    results: ScratchResults = Field(exclude=True)
+    formatter: Optional[ResultFormatter] = Field(default=None, exclude=True)
+    timeout: float = Field(default=5.0, exclude=True)
+
+    def _run(self, query: str, page: int = 1, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        """Query the saved result."""
+        formatter = self.formatter or ResultFormatter()
+        session_id = session_id_from(run_manager)
+        try:
+            result = (
+                self.results.query(
+                    session_id, query, lambda columns, rows: formatter.format(columns, rows, page), self.timeout
+                )
+                if session_id is not None
+                else None
+            )
+        except sqlite3.Error as e:
+            return f"Error: {e}"
+        if result is None:
+            return "Error: no result is saved for this conversation. Use sql_db_query instead."
+        return result
+
+
+class ChatSQLToolkit(SQLDatabaseToolkit):
+    """SQLDatabaseToolkit with the chatbot's query tool customizations."""
+
+    query_cache: Optional[QueryResultCache] = Field(default=None, exclude=True)
+    plan_auditor: Optional[QueryPlanAuditor] = Field(default=None, exclude=True)
+    sql_limiter: Optional[ConcurrencyLimiter] = Field(default=None, exclude=True)
+    query_guard: Optional[QueryGuard] = Field(default=None, exclude=True)
+    schema_info: Optional[dict] = Field(default=None, exclude=True)
+    columnar: Optional[TransactionsFrame] = Field(default=None, exclude=True)
+    result_formatter: Optional[ResultFormatter] = Field(default=None, exclude=True)
+    product_search: Optional[ProductSearch] = Field(default=None, exclude=True)
+    session_results: Optional[ScratchResults] = Field(default=None, exclude=True)
+
+    def get_tools(self):
+        """Get the tools in the toolkit, swapping in the customized query tool when enabled."""
+        tools = super().get_tools()
+        if self.columnar is not None:
+            aggregate = TransactionsAggregateTool(frame=self.columnar, formatter=self.result_formatter)
+            if self.result_formatter is not None:
+                aggregate.description = aggregate.description.replace(
+                    " Output: rows as a list of tuples, then the column names.", COMPACT_RESULTS_NOTE
+                )
+            tools.append(aggregate)
+        if self.product_search is not None:
+            tools.append(ProductLookupTool(search=self.product_search))
+        if self.session_results is not None:
+            tools.append(
+                LastResultQueryTool(
+                    results=self.session_results,
+                    formatter=self.result_formatter,
+                    timeout=self.query_guard.timeout if self.query_guard is not None else 5.0,
+                )
+            )
+        customizations = (
+            self.query_cache,
+            self.plan_auditor,
+            self.sql_limiter,
+            self.query_guard,
+            self.result_formatter,
+            self.session_results,
+        )
+        if all(c is None for c in customizations):
+            return tools
+
+        customized = []
+        for tool in tools:
+            if not isinstance(tool, QuerySQLDatabaseTool):
+                customized.append(tool)
+                continue
+            query_tool = ChatQuerySQLDatabaseTool(
+                db=self.db,
+                description=tool.description + (COMPACT_RESULTS_NOTE if self.result_formatter is not None else ""),
+                cache=self.query_cache,
+                auditor=self.plan_auditor,
+                limiter=self.sql_limiter,
+                guard=self.query_guard,
+                formatter=self.result_formatter,
+                results=self.session_results,
+            )
+            customized.append(query_tool)
+            if self.result_formatter is not None:
+                customized.append(QueryPageTool(db=self.db, query_tool=query_tool))
+        return customized
+
+    def get_context(self) -> dict:
+        """Return db context for the agent prompt, preferring the precomputed schema."""
+        if self.schema_info is not None:
+            return dict(self.schema_info)
+        return super().get_context()
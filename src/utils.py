@@ -45,3 +45,48 @@ class Spinner:
             sys.stdout.flush()
             idx = (idx + 1) % len(spinner_chars)
             time.sleep(0.1)
+
+
+class BackgroundAgent:
+    """Build an agent on a background thread and forward calls to it once it is ready."""
+
+    def __init__(self, factory, *args, **kwargs):
+        """
+        Start building the agent.
+
+        Args:
+            factory: Callable returning the agent executor
+            *args: Positional arguments for the factory
+            **kwargs: Keyword arguments for the factory
+        """
+        self._agent = None
+        self._error = None
+        self._thread = threading.Thread(target=self._build, args=(factory, args, kwargs), name="agent-setup")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _build(self, factory, args, kwargs):
+        """Run the factory, keeping its result or error for result()."""
+        try:
+            self._agent = factory(*args, **kwargs)
+        except BaseException as e:
+            self._error = e
+
+    def result(self):
+        """
+        Wait for the agent to be built.
+
+        Returns:
+            The agent executor
+
+        Raises:
+            Exception: Whatever the factory raised
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._agent
+
+    def __getattr__(self, name):
+        """Delegate attribute access (invoke, astream_events, ...) to the built agent."""
+        return getattr(self.result(), name)
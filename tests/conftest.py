@@ -18,6 +18,18 @@ def mock_env_vars(monkeypatch):
     yield
 
 
+@pytest.fixture(autouse=True)
+def isolated_example_store(monkeypatch, tmp_path):
+    """Keep questions answered in tests out of the real few-shot example store."""
+    monkeypatch.setattr("src.agent.EXAMPLE_STORE_PATH", str(tmp_path / "sql_examples.db"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_query_plan_log(monkeypatch, tmp_path):
+    """Keep plans of queries run in tests out of the real query plan log."""
+    monkeypatch.setattr("src.agent.QUERY_PLAN_LOG", str(tmp_path / "query_plans.jsonl"))
+
+
 @pytest.fixture
 def temp_db():
     """Create a temporary database file for testing."""
@@ -29,8 +41,7 @@ def temp_db():
 
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute(
-        """
+    cursor.execute("""
         CREATE TABLE transactions (
             InvoiceNo TEXT,
             StockCode TEXT,
@@ -41,16 +52,13 @@ def temp_db():
             CustomerID REAL,
             Country TEXT
         )
-    """
-    )
-    cursor.execute(
-        """
+    """)
+    cursor.execute("""
         INSERT INTO transactions VALUES
         ('123', 'A001', 'Test Product', 5, '2024-01-01', 10.0, 1001.0, 'USA'),
         ('124', 'A002', 'Another Product', 3, '2024-01-02', 15.0, 1002.0, 'UK'),
         ('125', 'ADJ', 'Adjustment', 1, '2024-01-03', -5.0, 1003.0, 'USA')
-    """
-    )
+    """)
     conn.commit()
     conn.close()
 
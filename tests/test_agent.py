@@ -15,7 +15,7 @@ def test_setup_agent_creates_database_connection(mock_env_vars, mock_openai, moc
 
     importlib.reload(config)
 
-    with patch("src.agent.SQLDatabase") as mock_db, patch("src.agent.SQLDatabaseToolkit") as mock_toolkit:
+    with patch("src.agent.SQLDatabase") as mock_db, patch("src.agent.ChatSQLToolkit") as mock_toolkit:
         mock_db.from_uri.return_value = Mock()
         mock_toolkit.return_value = Mock()
         agent.setup_agent()
@@ -29,7 +29,7 @@ def test_setup_agent_initializes_llm(mock_env_vars, mock_openai, mock_sql_agent)
     """Test that setup_agent initializes LLM with correct parameters."""
     from src import agent
 
-    with patch("src.agent.SQLDatabase"), patch("src.agent.SQLDatabaseToolkit"):
+    with patch("src.agent.SQLDatabase"), patch("src.agent.ChatSQLToolkit"):
         agent.setup_agent()
 
         mock_openai.assert_called_once()
@@ -42,7 +42,7 @@ def test_setup_agent_creates_sql_agent(mock_env_vars, mock_openai, mock_sql_agen
     """Test that setup_agent creates SQL agent with toolkit."""
     from src import agent
 
-    with patch("src.agent.SQLDatabase"), patch("src.agent.SQLDatabaseToolkit") as mock_toolkit:
+    with patch("src.agent.SQLDatabase"), patch("src.agent.ChatSQLToolkit") as mock_toolkit:
 
         agent.setup_agent()
 
@@ -54,7 +54,7 @@ def test_setup_agent_verbose_mode(mock_env_vars, mock_openai, mock_sql_agent):
     """Test that verbose flag is passed to agent."""
     from src import agent
 
-    with patch("src.agent.SQLDatabase"), patch("src.agent.SQLDatabaseToolkit"):
+    with patch("src.agent.SQLDatabase"), patch("src.agent.ChatSQLToolkit"):
 
         agent.setup_agent(verbose=True)
 
@@ -67,7 +67,7 @@ def test_setup_agent_includes_system_prompt(mock_env_vars, mock_openai, mock_sql
     from src import agent
     from src.config import SYSTEM_PROMPT
 
-    with patch("src.agent.SQLDatabase"), patch("src.agent.SQLDatabaseToolkit"):
+    with patch("src.agent.SQLDatabase"), patch("src.agent.ChatSQLToolkit"):
 
         agent.setup_agent()
 
@@ -85,7 +85,7 @@ def test_setup_agent_uses_openai_tools_type(mock_env_vars, mock_openai, mock_sql
     """Test that agent uses openai-tools agent type."""
     from src import agent
 
-    with patch("src.agent.SQLDatabase"), patch("src.agent.SQLDatabaseToolkit"):
+    with patch("src.agent.SQLDatabase"), patch("src.agent.ChatSQLToolkit"):
 
         agent.setup_agent()
 
@@ -98,7 +98,7 @@ def test_setup_agent_with_memory(mock_env_vars, mock_openai, mock_sql_agent):
     from src import agent
     from src.memory import get_session_history
 
-    with patch("src.agent.SQLDatabase"), patch("src.agent.SQLDatabaseToolkit"):
+    with patch("src.agent.SQLDatabase"), patch("src.agent.ChatSQLToolkit"):
 
         agent_executor = agent.setup_agent(verbose=False)
 
@@ -123,7 +123,7 @@ def test_agent_invocation_with_memory(mock_env_vars, temp_db, monkeypatch):
         patch("src.agent.create_sql_agent") as mock_create,
         patch("src.agent.RunnableWithMessageHistory") as mock_runnable,
         patch("src.agent.SQLDatabase"),
-        patch("src.agent.SQLDatabaseToolkit"),
+        patch("src.agent.ChatSQLToolkit"),
     ):
 
         mock_agent = Mock()
@@ -146,3 +146,86 @@ def test_agent_invocation_with_memory(mock_env_vars, temp_db, monkeypatch):
 
         # Verify wrapped agent was called
         mock_wrapped.invoke.assert_called_once()
+
+
+def test_setup_agent_precomputes_schema(mock_env_vars, mock_openai, mock_sql_agent, temp_db, tmp_path):
+    """Test that the cached schema is added to the prompt and toolkit context."""
+    from src import agent
+    from src.schema import SCHEMA_PROMPT
+
+    with (
+        patch("src.agent.DB_PATH", temp_db),
+        patch("src.agent.CACHE_DIR", str(tmp_path)),
+        patch("src.agent.SQLDatabase"),
+        patch("src.agent.ChatSQLToolkit") as mock_toolkit,
+    ):
+        agent.setup_agent(precompute_schema=True)
+
+        schema_info = mock_toolkit.call_args[1]["schema_info"]
+        assert "CREATE TABLE transactions" in schema_info["table_info"]
+        prompt_messages = mock_sql_agent.call_args[1]["prompt"].messages
+        assert prompt_messages[1].prompt.template == SCHEMA_PROMPT
+
+
+def test_setup_agent_without_precomputed_schema(mock_env_vars, mock_openai, mock_sql_agent, temp_db, tmp_path):
+    """Test that the introspection tools are left in place when the mode is off."""
+    from src import agent
+
+    with (
+        patch("src.agent.DB_PATH", temp_db),
+        patch("src.agent.CACHE_DIR", str(tmp_path)),
+        patch("src.agent.SQLDatabase"),
+        patch("src.agent.ChatSQLToolkit") as mock_toolkit,
+    ):
+        agent.setup_agent(precompute_schema=False)
+
+        assert mock_toolkit.call_args[1]["schema_info"] is None
+        assert "table_info" not in mock_sql_agent.call_args[1]["prompt"].input_variables
+
+
+def test_setup_agent_uses_engine_profile(mock_env_vars, mock_openai, mock_sql_agent):
+    """Test that setup_agent connects with the configured SQLite engine profile."""
+    from src import agent
+
+    with (
+        patch("src.agent.SQLDatabase") as mock_db,
+        patch("src.agent.ChatSQLToolkit"),
+        patch("src.agent.SQLITE_PROFILE", "tuned"),
+        patch("src.agent.SQLITE_POOL_SIZE", 3),
+    ):
+        agent.setup_agent()
+        assert mock_db.from_uri.call_args[1]["engine_args"]["pool_size"] == 3
+
+    with (
+        patch("src.agent.SQLDatabase") as mock_db,
+        patch("src.agent.ChatSQLToolkit"),
+        patch("src.agent.SQLITE_PROFILE", "default"),
+    ):
+        agent.setup_agent()
+        assert mock_db.from_uri.call_args[1]["engine_args"] == {}
+
+
+def test_setup_agent_points_prompt_at_built_tables(mock_env_vars, mock_openai, mock_sql_agent, temp_db, tmp_path):
+    """Test that the sales table, product lookup and rollups are advertised once they are built."""
+    from src import agent
+    from src.products import PRODUCT_LOOKUP_PROMPT, ensure_product_search
+    from src.rollups import ROLLUPS_PROMPT, refresh_rollups
+    from src.sales import SALES_PROMPT, ensure_sales_table
+
+    def system_prompts():
+        with (
+            patch("src.agent.DB_PATH", temp_db),
+            patch("src.agent.CACHE_DIR", str(tmp_path)),
+            patch("src.agent.SQLDatabase"),
+            patch("src.agent.ChatSQLToolkit"),
+        ):
+            agent.setup_agent(precompute_schema=False)
+        messages = mock_sql_agent.call_args[1]["prompt"].messages
+        return [m.prompt.template for m in messages if hasattr(m, "prompt")]
+
+    assert not {SALES_PROMPT, PRODUCT_LOOKUP_PROMPT, ROLLUPS_PROMPT} & set(system_prompts())
+
+    ensure_product_search(temp_db)
+    ensure_sales_table(temp_db)
+    refresh_rollups(temp_db)
+    assert {SALES_PROMPT, PRODUCT_LOOKUP_PROMPT, ROLLUPS_PROMPT} <= set(system_prompts())
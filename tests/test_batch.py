@@ -0,0 +1,67 @@
+"""Tests for batch module."""
+
+import json
+from unittest.mock import AsyncMock, Mock
+
+
+def _agent(fail_on=()):
+    """Agent whose ainvoke echoes the question, failing for the given questions."""
+
+    async def ainvoke(inputs, config=None):
+        if inputs["input"] in fail_on:
+            raise RuntimeError("model unavailable")
+        return {"output": f"answer to {inputs['input']}"}
+
+    agent = Mock()
+    agent.ainvoke = AsyncMock(side_effect=ainvoke)
+    return agent
+
+
+def test_load_questions_parses_plain_and_json_lines():
+    """Test that plain lines get their own session and JSON lines can share one."""
+    from src.batch import group_chains, load_questions
+
+    questions = load_questions(
+        [
+            "# monthly report",
+            "Total revenue?",
+            "",
+            '{"question": "Top product?", "session_id": "products", "id": "p1"}',
+            '{"question": "And its revenue?", "session_id": "products", "id": "p2"}',
+        ]
+    )
+
+    assert [q["id"] for q in questions] == ["2", "p1", "p2"]
+    assert questions[0]["session_id"] == "batch-2"
+    assert [[q["id"] for q in chain] for chain in group_chains(questions)] == [["2"], ["p1", "p2"]]
+
+
+def test_run_batch_writes_results_and_resumes(tmp_path):
+    """Test that results go to JSON lines and a rerun only retries failed chains."""
+    from src.batch import load_questions, run_batch
+
+    output = tmp_path / "results.jsonl"
+    questions = load_questions(
+        [
+            "Total revenue?",
+            '{"question": "Top product?", "session_id": "products"}',
+            '{"question": "And its revenue?", "session_id": "products"}',
+            '{"question": "Its best month?", "session_id": "products"}',
+        ]
+    )
+
+    summary = run_batch(_agent(fail_on={"And its revenue?"}), questions, str(output), concurrency=2)
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert summary["answered"] == 2 and summary["failed"] == 1
+    assert {r["question"] for r in records} == {"Total revenue?", "Top product?", "And its revenue?"}
+    assert "RuntimeError" in next(r["error"] for r in records if r["question"] == "And its revenue?")
+
+    agent = _agent()
+    summary = run_batch(agent, questions, str(output))
+
+    # The failed chain reruns from its first question; the finished question is skipped
+    assert summary == {"answered": 3, "failed": 0, "skipped": 1, "seconds": summary["seconds"]}
+    asked = [call.args[0]["input"] for call in agent.ainvoke.call_args_list]
+    assert asked == ["Top product?", "And its revenue?", "Its best month?"]
+    assert agent.ainvoke.call_args_list[0].kwargs["config"]["configurable"]["session_id"] == "products"
@@ -0,0 +1,65 @@
+"""Tests for benchmark module."""
+
+SCENARIO = [
+    {
+        "question": "How many transactions are there?",
+        "steps": [{"sql": "SELECT COUNT(*) FROM transactions"}, {"answer": "There are 500."}],
+    },
+    {
+        "question": "And how many of them are returns?",
+        "steps": [
+            {"sql": "SELECT COUNT(*) FROM transaction WHERE Quantity < 0"},
+            {"sql": "SELECT COUNT(*) FROM transactions WHERE Quantity < 0"},
+            {"answer": "A few."},
+        ],
+    },
+]
+
+
+def test_run_benchmark_reports_per_question_metrics(tmp_path):
+    """Test that the real pipeline runs offline and reports latency, SQL and LLM metrics."""
+    from src.benchmark import format_report, run_benchmark
+    from src.datagen import generate_database
+
+    db_path = str(tmp_path / "bench.db")
+    generate_database(db_path, 500)
+
+    results = run_benchmark(db_path, SCENARIO, rounds=2)
+
+    assert len(results) == 4
+    first, follow_up = results[0], results[1]
+    assert first["llm_calls"] == 2 and first["sql_queries"] == 1 and first["sql_errors"] == 0
+    assert follow_up["llm_calls"] == 3 and follow_up["sql_queries"] == 2 and follow_up["sql_errors"] == 1
+    assert follow_up["max_prompt_tokens"] > first["max_prompt_tokens"]
+    assert all(r["seconds"] >= r["sql_seconds"] for r in results)
+    assert "How many transactions are there?" in format_report(results)
+
+
+def test_find_regressions():
+    """Test that slower questions and extra LLM hops are reported against a baseline."""
+    from src.benchmark import find_regressions
+
+    results = [
+        {
+            "question": "fast",
+            "seconds": 0.1,
+            "sql_seconds": 0.0,
+            "sql_queries": 1,
+            "llm_calls": 2,
+            "max_prompt_tokens": 1,
+        },
+        {
+            "question": "slow",
+            "seconds": 0.5,
+            "sql_seconds": 0.0,
+            "sql_queries": 1,
+            "llm_calls": 3,
+            "max_prompt_tokens": 1,
+        },
+    ]
+    baseline = {"fast": {"seconds": 0.1, "llm_calls": 2}, "slow": {"seconds": 0.2, "llm_calls": 2}}
+
+    regressions = find_regressions(results, baseline)
+
+    assert len(regressions) == 2
+    assert all(r.startswith("slow:") for r in regressions)
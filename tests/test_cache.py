@@ -0,0 +1,251 @@
+"""Tests for cache module."""
+
+import sqlite3
+from unittest.mock import Mock
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_question():
+    """Test that trivial differences in phrasing normalize to the same text."""
+    from src.cache import normalize_question
+
+    assert normalize_question("  What is the   Revenue? ") == "what is the revenue"
+    assert normalize_question("what is the revenue") == "what is the revenue"
+
+
+def test_answer_key_depends_on_recent_history():
+    """Test that the key fingerprints only the recent turns of history."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from src.cache import make_answer_key
+
+    old_turn = [HumanMessage("Top product?"), AIMessage("Lanterns")]
+    recent_turn = [HumanMessage("Top country?"), AIMessage("UK")]
+
+    assert make_answer_key("How many sold?") == make_answer_key("how many sold")
+    assert make_answer_key("How many sold?", recent_turn) != make_answer_key("How many sold?")
+    # Turns outside the window do not affect the key
+    assert make_answer_key("How many sold?", old_turn + recent_turn, history_turns=1) == make_answer_key(
+        "How many sold?", recent_turn, history_turns=1
+    )
+
+
+def test_answer_cache_lru_eviction():
+    """Test that the least recently used answer is evicted when full."""
+    from src.cache import AnswerCache
+
+    cache = AnswerCache(max_size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+
+
+def test_answer_cache_ttl_expiry():
+    """Test that answers expire after the TTL."""
+    from src.cache import AnswerCache
+
+    clock = FakeClock()
+    cache = AnswerCache(ttl=10, clock=clock)
+    cache.put("a", "1")
+
+    clock.now = 9
+    assert cache.get("a") == "1"
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_answer_cache_skips_agent_failures():
+    """Test that iteration-limit messages are not cached."""
+    from src.cache import AnswerCache
+
+    cache = AnswerCache()
+    cache.put("a", "Agent stopped due to max iterations.")
+    assert cache.get("a") is None
+
+
+def test_answer_cache_invalidated_on_database_change(temp_db):
+    """Test that writing to the database flushes cached answers."""
+    from src.cache import AnswerCache, DatabaseWatcher
+
+    watcher = DatabaseWatcher(temp_db)
+    cache = AnswerCache(watcher=watcher)
+    cache.put("a", "1")
+    assert cache.get("a") == "1"
+
+    conn = sqlite3.connect(temp_db)
+    conn.execute("INSERT INTO transactions VALUES ('126', 'A003', 'New', 1, '2024-01-04', 1.0, 1004.0, 'UK')")
+    conn.commit()
+    conn.close()
+
+    assert cache.get("a") is None
+    watcher.close()
+
+
+def test_database_watcher_missing_file(tmp_path):
+    """Test that a missing database yields a stable version token."""
+    from src.cache import DatabaseWatcher
+
+    watcher = DatabaseWatcher(str(tmp_path / "missing.db"))
+    assert watcher.version() == watcher.version() == ("missing",)
+
+
+def test_cached_agent_serves_repeated_question():
+    """Test that a repeated question is answered without invoking the agent."""
+    from src.cache import AnswerCache, CachedAgent
+
+    agent = Mock()
+    agent.invoke.return_value = {"output": "Total revenue is $100"}
+    cached_agent = CachedAgent(agent, AnswerCache())
+
+    first = cached_agent.invoke({"input": "What is the total revenue?"})
+    second = cached_agent.invoke({"input": "what is the total revenue"})
+
+    assert agent.invoke.call_count == 1
+    assert first["output"] == second["output"] == "Total revenue is $100"
+    assert second["cached"] is True
+
+
+def test_cached_agent_records_hits_in_history():
+    """Test that cache hits are appended to the session history."""
+    from src.cache import AnswerCache, CachedAgent
+    from src.memory import clear_memory, get_session_history
+
+    agent = Mock()
+    agent.invoke.return_value = {"output": "$100"}
+    cached_agent = CachedAgent(agent, AnswerCache(), get_session_history)
+    config = {"configurable": {"session_id": "cache_session"}}
+
+    # Prime the cache from a fresh session, then ask again in another fresh session
+    cached_agent.invoke({"input": "Revenue?"}, config={"configurable": {"session_id": "cache_primer"}})
+    cached_agent.invoke({"input": "Revenue?"}, config=config)
+
+    history = get_session_history("cache_session")
+    assert [m.content for m in history.messages] == ["Revenue?", "$100"]
+    assert agent.invoke.call_count == 1
+
+    # The same question after that turn has different context and misses
+    cached_agent.invoke({"input": "Revenue?"}, config=config)
+    assert agent.invoke.call_count == 2
+
+    clear_memory("cache_session")
+    clear_memory("cache_primer")
+
+
+def test_cached_agent_discards_session_result_on_hits():
+    """Test that a cache hit drops the session's saved result, which belongs to an older answer."""
+    from src.cache import AnswerCache, CachedAgent
+
+    agent = Mock()
+    agent.invoke.return_value = {"output": "$100"}
+    discarded = []
+    cached_agent = CachedAgent(agent, AnswerCache(), discard_results=discarded.append)
+
+    cached_agent.invoke({"input": "Revenue?"}, config={"configurable": {"session_id": "a"}})
+    assert discarded == []
+    cached_agent.invoke({"input": "Revenue?"}, config={"configurable": {"session_id": "b"}})
+    assert discarded == ["b"]
+
+
+def test_cached_agent_does_not_cache_failures():
+    """Test that failed turns are retried rather than served from cache."""
+    from src.cache import AnswerCache, CachedAgent
+
+    agent = Mock()
+    agent.invoke.return_value = {"output": "Agent stopped due to max iterations."}
+    cached_agent = CachedAgent(agent, AnswerCache())
+
+    cached_agent.invoke({"input": "q"})
+    cached_agent.invoke({"input": "q"})
+    assert agent.invoke.call_count == 2
+
+
+def test_canonicalize_sql():
+    """Test that formatting differences canonicalize to the same SQL."""
+    from src.cache import canonicalize_sql
+
+    a = "SELECT Description, SUM(Quantity)\n  FROM transactions -- top\n WHERE Country = 'United Kingdom';"
+    b = "select description, sum(quantity) from /* c */ transactions where country = 'United Kingdom'"
+
+    assert canonicalize_sql(a) == canonicalize_sql(b)
+    # String literals keep their case
+    assert canonicalize_sql("SELECT 'UK'") != canonicalize_sql("SELECT 'uk'")
+
+
+def test_query_cache_hit_and_miss_counters():
+    """Test that the query cache tracks hits and misses."""
+    from src.cache import QueryResultCache
+
+    cache = QueryResultCache()
+    assert cache.get("SELECT 1") is None
+    cache.put("SELECT 1", "[(1,)]")
+    assert cache.get("select  1;") == "[(1,)]"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_query_cache_evicts_by_size():
+    """Test that the least recently used results are evicted to respect the byte budget."""
+    from src.cache import QueryResultCache
+
+    cache = QueryResultCache(max_bytes=10)
+    cache.put("SELECT 1", "x", size=4)
+    cache.put("SELECT 2", "y", size=4)
+    cache.get("SELECT 1")
+    cache.put("SELECT 3", "z", size=4)
+
+    assert cache.get("SELECT 2") is None
+    assert cache.get("SELECT 1") == "x"
+    assert cache.current_bytes == 8
+    assert cache.stats()["evictions"] == 1
+
+    # Results larger than the whole budget are never stored
+    cache.put("SELECT 4", "big", size=11)
+    assert cache.get("SELECT 4") is None
+
+
+def test_query_cache_ignores_writes():
+    """Test that non-SELECT statements are never cached."""
+    from src.cache import QueryResultCache
+
+    cache = QueryResultCache()
+    cache.put("DELETE FROM transactions", "")
+    assert cache.get("DELETE FROM transactions") is None
+    assert len(cache) == 0
+
+
+def test_query_cache_invalidated_on_database_change(temp_db):
+    """Test that writing to the database flushes cached results."""
+    from src.cache import DatabaseWatcher, QueryResultCache
+
+    watcher = DatabaseWatcher(temp_db)
+    cache = QueryResultCache(watcher=watcher)
+    cache.put("SELECT COUNT(*) FROM transactions", "[(3,)]")
+
+    conn = sqlite3.connect(temp_db)
+    conn.execute("DELETE FROM transactions WHERE StockCode = 'ADJ'")
+    conn.commit()
+    conn.close()
+
+    assert cache.get("SELECT COUNT(*) FROM transactions") is None
+    assert cache.current_bytes == 0
+    watcher.close()
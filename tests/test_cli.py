@@ -149,3 +149,255 @@ def test_main_handles_fatal_errors(mock_env_vars, mock_agent):
 
         main()
         assert exc_info.value.code == 1
+
+
+def test_parse_args_indexes_command():
+    """Test argument parsing for the indexes command."""
+    from src.cli import parse_args
+
+    with patch("sys.argv", ["chat_cli.py"]):
+        assert parse_args().command is None
+
+    with patch("sys.argv", ["chat_cli.py", "indexes", "--check"]):
+        args = parse_args()
+        assert args.command == "indexes"
+        assert args.check is True
+
+
+def test_main_runs_indexes_command(temp_db, capsys):
+    """Test that the indexes command builds indexes without requiring an API key."""
+    from src.cli import main
+
+    with (
+        patch("src.cli.validate_database"),
+        patch("src.cli.DB_PATH", temp_db),
+        patch("sys.argv", ["chat_cli.py", "indexes"]),
+        patch("src.cli.setup_agent") as mock_setup,
+    ):
+        main()
+
+    captured = capsys.readouterr()
+    assert "Created idx_transactions_country" in captured.out
+    mock_setup.assert_not_called()
+
+
+def test_check_indexes_warns_when_missing(temp_db, capsys):
+    """Test that the startup check warns about missing indexes."""
+    from src.cli import check_indexes
+
+    with patch("src.cli.DB_PATH", temp_db):
+        check_indexes()
+
+    assert "Missing indexes" in capsys.readouterr().out
+
+
+def test_chat_loop_stream_mode(capsys):
+    """Test that stream mode routes questions through stream_answer."""
+    from src.cli import chat_loop
+
+    agent = Mock()
+    with (
+        patch("builtins.input", side_effect=["Top product?", "exit"]),
+        patch("src.cli.stream_answer") as mock_stream,
+    ):
+        chat_loop(agent, stream=True)
+
+    mock_stream.assert_called_once()
+    assert mock_stream.call_args[0][:3] == (agent, "Top product?", "default")
+    agent.invoke.assert_not_called()
+
+
+def test_parse_args_serve_command():
+    """Test argument parsing for the serve command."""
+    from src.cli import parse_args
+
+    with patch("sys.argv", ["chat_cli.py", "serve", "--port", "9000"]):
+        args = parse_args()
+        assert args.command == "serve"
+        assert args.port == 9000
+
+
+def test_cli_import_skips_langchain():
+    """Test that importing the CLI does not import the agent's heavy dependencies."""
+    import subprocess
+
+    code = "import sys, src.cli; print(any(m.startswith(('langchain', 'openai')) for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
+
+
+def test_main_builds_agent_in_background(mock_env_vars, mock_agent):
+    """Test that main hands chat_loop an agent that is being built in the background."""
+    from src.cli import main
+    from src.utils import BackgroundAgent
+
+    with (
+        patch("src.cli.validate_config"),
+        patch("src.cli.setup_agent", return_value=mock_agent) as mock_setup,
+        patch("src.cli.chat_loop") as mock_chat_loop,
+        patch("src.cli.parse_args", return_value=Mock(verbose=False, no_cache=True, command=None)),
+    ):
+        main()
+
+    background = mock_chat_loop.call_args[0][0]
+    assert isinstance(background, BackgroundAgent)
+    assert background.result() is mock_agent
+    assert mock_setup.call_args[1]["use_cache"] is False
+
+
+def test_main_runs_generate_command(tmp_path, capsys):
+    """Test that the generate command writes an indexed database without requiring an API key."""
+    from src.cli import main
+    from src.indexes import missing_indexes
+
+    output = str(tmp_path / "synthetic.db")
+    with (
+        patch("sys.argv", ["chat_cli.py", "generate", "--rows", "1000", "--output", output]),
+        patch("src.cli.validate_config") as mock_validate,
+    ):
+        main()
+
+    assert "Wrote 1,000 rows" in capsys.readouterr().out
+    assert missing_indexes(output) == []
+    mock_validate.assert_not_called()
+
+    with (
+        patch("sys.argv", ["chat_cli.py", "generate", "--rows", "1000", "--output", output]),
+        pytest.raises(SystemExit),
+    ):
+        main()
+
+
+def test_main_runs_ingest_command(tmp_path, capsys):
+    """Test that the ingest command builds and then appends to a database without an API key."""
+    from src.cli import main
+
+    source = tmp_path / "retail.csv"
+    source.write_text(
+        "InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country\n"
+        "536365,85123A,WHITE HANGING HEART T-LIGHT HOLDER,6,12/1/2010 8:26,2.55,17850.0,United Kingdom\n"
+    )
+    output = str(tmp_path / "ecommerce.db")
+    with (
+        patch("sys.argv", ["chat_cli.py", "ingest", str(source), "--output", output]),
+        patch("src.cli.validate_config") as mock_validate,
+    ):
+        main()
+    assert "Loaded 1 rows" in capsys.readouterr().out
+    mock_validate.assert_not_called()
+
+    with patch("sys.argv", ["chat_cli.py", "ingest", str(source), "--output", output]), pytest.raises(SystemExit):
+        main()
+
+    with patch("sys.argv", ["chat_cli.py", "ingest", str(source), "--output", output, "--append"]):
+        main()
+    assert "Appended 0 rows" in capsys.readouterr().out
+
+
+def test_chat_loop_profile_mode(mock_agent, tmp_path, capsys):
+    """Test that profile mode passes a profiler to the agent and prints a summary at exit."""
+    from src.cli import chat_loop
+    from src.profiling import TurnProfiler
+
+    log_path = tmp_path / "profile.jsonl"
+    with patch("builtins.input", side_effect=["What is the revenue?", "exit"]):
+        chat_loop(mock_agent, verbose=True, profile=str(log_path))
+
+    callbacks = mock_agent.invoke.call_args[1]["config"]["callbacks"]
+    assert isinstance(callbacks[0], TurnProfiler)
+    assert len(log_path.read_text().splitlines()) == 1
+    assert "Profile (" in capsys.readouterr().out
+
+
+def test_profile_flag_does_not_take_the_command(tmp_path):
+    """Test that --profile is a plain flag, with the log path given by --profile-log."""
+    from src.cli import parse_args
+
+    with patch("sys.argv", ["chat_cli.py", "--profile", "indexes", "--check"]):
+        args = parse_args()
+    assert args.profile and args.command == "indexes" and args.check
+
+    log_path = str(tmp_path / "turns.jsonl")
+    with patch("sys.argv", ["chat_cli.py", "--profile-log", log_path]):
+        assert parse_args().profile_log == log_path
+
+
+def test_chat_loop_profile_records_failed_turns(mock_agent, tmp_path):
+    """Test that a failed turn is recorded with its error and its events do not leak into the next turn."""
+    import json
+    from uuid import uuid4
+
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+
+    from src.cli import chat_loop
+
+    log_path = tmp_path / "profile.jsonl"
+
+    def invoke(inputs, config):
+        profiler, run_id = config["callbacks"][0], uuid4()
+        profiler.on_chat_model_start({}, [[HumanMessage(inputs["input"])]], run_id=run_id)
+        profiler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage("..."))]]), run_id=run_id)
+        if inputs["input"] == "bad question":
+            raise ValueError("boom")
+        return {"output": "Test response"}
+
+    mock_agent.invoke.side_effect = invoke
+    with patch("builtins.input", side_effect=["bad question", "good question", "exit"]):
+        chat_loop(mock_agent, verbose=True, profile=str(log_path))
+
+    failed, good = (json.loads(line) for line in log_path.read_text().splitlines())
+    assert failed["error"] == "boom" and len(failed["events"]) == 1
+    assert "error" not in good and len(good["events"]) == 1
+
+
+def test_chat_loop_ctrl_c_cancels_turn_not_session(mock_agent, capsys):
+    """Test that Ctrl-C during a question cancels it and keeps the session going."""
+    from src.cli import chat_loop
+
+    mock_agent.invoke.side_effect = [KeyboardInterrupt(), {"output": "Test response"}]
+    with (
+        patch("builtins.input", side_effect=["slow question", "next question", "exit"]),
+        patch("src.guards.cancel_running_queries") as mock_cancel,
+    ):
+        chat_loop(mock_agent, verbose=True)
+
+    mock_cancel.assert_called_once()
+    captured = capsys.readouterr().out
+    assert "Cancelled" in captured
+    assert "Test response" in captured
+    assert mock_agent.invoke.call_count == 2
+
+
+def test_parse_args_batch_command():
+    """Test argument parsing for the batch command."""
+    from src.cli import parse_args
+
+    with patch("sys.argv", ["chat_cli.py", "batch", "questions.txt", "--concurrency", "4"]):
+        args = parse_args()
+        assert args.command == "batch"
+        assert args.questions == "questions.txt"
+        assert args.concurrency == 4
+        assert args.output is None
+
+
+def test_main_loads_in_memory_snapshot_before_chat(mock_env_vars, mock_agent):
+    """Test that --in-memory builds the agent on a snapshot and waits for it before the chat starts."""
+    from src.cli import main, parse_args, report_snapshot
+
+    with patch("sys.argv", ["chat_cli.py", "--in-memory"]):
+        assert parse_args().in_memory is True
+
+    with (
+        patch("src.cli.validate_config"),
+        patch("src.cli.check_indexes"),
+        patch("src.cli.setup_agent", return_value=mock_agent) as mock_setup,
+        patch("src.cli.chat_loop") as mock_chat_loop,
+        patch("src.cli.parse_args", return_value=Mock(verbose=False, no_cache=True, command=None, in_memory=True)),
+    ):
+        main()
+
+    assert mock_setup.call_args[1]["in_memory"] is True
+    assert mock_setup.call_args[1]["snapshot_progress"] is report_snapshot
+    assert mock_chat_loop.call_args[0][0]._thread.is_alive() is False
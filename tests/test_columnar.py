@@ -0,0 +1,163 @@
+"""Tests for columnar module."""
+
+import sqlite3
+
+import pytest
+
+
+def test_frame_loads_compact_columns(temp_db):
+    """Test that the table is loaded once with categorical text and narrow numeric types."""
+    from src.columnar import TransactionsFrame
+
+    frame = TransactionsFrame(temp_db)
+    df = frame.frame()
+
+    assert len(df) == 3
+    assert str(df["Description"].dtype) == "category"
+    assert str(df["Country"].dtype) == "category"
+    assert str(df["Quantity"].dtype) == "int32"
+    assert str(df["UnitPrice"].dtype) == "float32"
+    assert str(df["InvoiceDate"].dtype).startswith("datetime64")
+    frame.frame()
+    assert frame.loads == 1
+
+
+def test_aggregate_matches_sql(temp_db):
+    """Test that vectorized group-bys match the equivalent product-only SQL."""
+    from src.columnar import TransactionsFrame
+    from src.sales import PRODUCT_FILTER
+
+    frame = TransactionsFrame(temp_db)
+
+    columns, rows = frame.aggregate(group_by=["Country"], metrics=["revenue", "quantity", "customers"])
+    assert columns == ["Country", "revenue", "quantity", "customers"]
+    conn = sqlite3.connect(temp_db)
+    expected = conn.execute(
+        "SELECT Country, SUM(Quantity * UnitPrice) AS revenue, SUM(Quantity), COUNT(DISTINCT CustomerID) "
+        f"FROM transactions WHERE {PRODUCT_FILTER} GROUP BY Country ORDER BY revenue DESC"
+    ).fetchall()
+    conn.close()
+    assert rows == expected == [("USA", 50.0, 5, 1), ("UK", 45.0, 3, 1)]
+
+    assert frame.aggregate(metrics=["revenue", "rows"]) == (["revenue", "rows"], [(95.0, 2)])
+    assert frame.aggregate(metrics=["rows"], products_only=False) == (["rows"], [(3,)])
+
+
+def test_aggregate_filters_and_date_buckets(temp_db):
+    """Test country, description and date filters, date buckets, ordering and limits."""
+    from src.columnar import TransactionsFrame
+
+    frame = TransactionsFrame(temp_db)
+
+    assert frame.aggregate(group_by=["month"], metrics=["revenue"]) == (["month", "revenue"], [("2024-01", 95.0)])
+    assert frame.aggregate(group_by=["day"], order_by="day", descending=False)[1] == [
+        ("2024-01-01", 50.0),
+        ("2024-01-02", 45.0),
+    ]
+    assert frame.aggregate(group_by=["Description"], countries=["UK"])[1] == [("Another Product", 45.0)]
+    assert frame.aggregate(group_by=["Description"], description_contains="test")[1] == [("Test Product", 50.0)]
+    assert frame.aggregate(start_date="2024-01-02", end_date="2024-01-03")[1] == [(45.0,)]
+    assert frame.aggregate(group_by=["Description"], limit=1)[1] == [("Test Product", 50.0)]
+
+
+def test_aggregate_groups_text_columns_by_category(temp_db):
+    """Test that text dimensions are labelled, sorted by label and skip missing values."""
+    from src.columnar import TransactionsFrame
+
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("INSERT INTO transactions VALUES ('126', NULL, 'Aardvark', 1, '2024-02-01', 5.0, 1004.0, NULL)")
+    conn.close()
+    frame = TransactionsFrame(temp_db)
+
+    assert frame.aggregate(group_by=["Description"], order_by="Description", descending=False)[1] == [
+        ("Aardvark", 5.0),
+        ("Another Product", 45.0),
+        ("Test Product", 50.0),
+    ]
+    assert frame.aggregate(group_by=["Country", "StockCode"])[1] == [("USA", "A001", 50.0), ("UK", "A002", 45.0)]
+
+    # The product mask belongs to one loaded frame; a stale one is never applied to another
+    df = frame.frame()
+    assert len(frame._product_mask(df)) == len(df)
+    frame._products = (df.iloc[:1], frame._products[1][:1])
+    assert frame.aggregate()[1] == [(100.0,)]
+
+
+def test_aggregate_rejects_unknown_requests(temp_db):
+    """Test that unsupported dimensions, metrics and sort keys raise ValueError."""
+    from src.columnar import TransactionsFrame
+
+    frame = TransactionsFrame(temp_db)
+
+    with pytest.raises(ValueError):
+        frame.aggregate(group_by=["Color"])
+    with pytest.raises(ValueError):
+        frame.aggregate(metrics=["profit"])
+    with pytest.raises(ValueError):
+        frame.aggregate(metrics=["revenue"], order_by="quantity")
+
+
+def test_frame_reloads_when_database_changes(temp_db):
+    """Test that new rows are picked up after the database file changes."""
+    from src.columnar import TransactionsFrame
+
+    frame = TransactionsFrame(temp_db)
+    assert frame.aggregate()[1] == [(95.0,)]
+
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("INSERT INTO transactions VALUES ('126', 'A003', 'New', 1, '2024-02-01', 5.0, 1004.0, 'UK')")
+    conn.close()
+
+    assert frame.aggregate()[1] == [(100.0,)]
+    assert frame.loads == 2
+
+
+def test_aggregate_tool_output_and_fallback(temp_db):
+    """Test that the agent tool returns rows with column names and points errors to sql_db_query."""
+    from langchain_community.utilities import SQLDatabase
+    from langchain_core.language_models import FakeListChatModel
+
+    from src.columnar import TransactionsFrame
+    from src.streaming import count_rows
+    from src.tools import ChatSQLToolkit
+
+    toolkit = ChatSQLToolkit(
+        db=SQLDatabase.from_uri(f"sqlite:///{temp_db}"),
+        llm=FakeListChatModel(responses=[]),
+        columnar=TransactionsFrame(temp_db),
+    )
+    tool = next(tool for tool in toolkit.get_tools() if tool.name == "transactions_aggregate")
+
+    output = tool.run({"group_by": ["Country"], "metrics": ["revenue"]})
+    assert output == "[('USA', 50.0), ('UK', 45.0)]\nColumns: Country, revenue"
+    assert count_rows(output) == 2
+
+    error = tool.run({"group_by": ["Country"], "start_date": "not a date"})
+    assert error.startswith("Error:") and "sql_db_query" in error
+
+
+def test_aggregate_tool_uses_compact_results(temp_db):
+    """Test that the aggregate tool formats its rows like the other tools when compact results are on."""
+    from langchain_community.utilities import SQLDatabase
+    from langchain_core.language_models import FakeListChatModel
+
+    from src.columnar import TransactionsFrame
+    from src.results import ResultFormatter
+    from src.streaming import count_rows
+    from src.tools import ChatSQLToolkit
+
+    toolkit = ChatSQLToolkit(
+        db=SQLDatabase.from_uri(f"sqlite:///{temp_db}"),
+        llm=FakeListChatModel(responses=[]),
+        columnar=TransactionsFrame(temp_db),
+        result_formatter=ResultFormatter(page_rows=1),
+    )
+    tool = next(tool for tool in toolkit.get_tools() if tool.name == "transactions_aggregate")
+
+    assert "compact table" in tool.description
+    output = tool.run({"group_by": ["Country"], "metrics": ["revenue"]})
+    assert output.startswith("Country|revenue\nUSA|50\n-- rows 1-1 of 2")
+    assert "narrow the filters" in output and "sql_db_query_page" not in output
+    assert count_rows(output) == 1
@@ -0,0 +1,154 @@
+"""Tests for concurrency module."""
+
+import asyncio
+import threading
+import time
+
+from langchain_core.messages import HumanMessage
+
+
+def test_limiter_bounds_threads():
+    """Test that hold() never admits more threads than the limit."""
+    from src.concurrency import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter(2)
+
+    def work():
+        with limiter.hold():
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert limiter.peak == 2
+    assert limiter.in_flight == 0
+
+
+def test_limited_chat_model_bounds_async_calls():
+    """Test that concurrent ainvoke calls are limited upstream."""
+    from src.concurrency import ConcurrencyLimiter, LimitedChatModel
+    from src.fake_llm import ScriptedChatModel
+
+    limiter = ConcurrencyLimiter(3)
+    model = LimitedChatModel(model=ScriptedChatModel(default_answer="ok", latency=0.02), limiter=limiter)
+
+    async def run():
+        return await asyncio.gather(*[model.ainvoke([HumanMessage(f"q{i}")]) for i in range(10)])
+
+    results = asyncio.run(run())
+
+    assert [r.content for r in results] == ["ok"] * 10
+    assert limiter.peak == 3
+
+
+def test_limited_chat_model_binds_tools_through_wrapper():
+    """Test that tool binding keeps calls routed through the limiter."""
+    from src.concurrency import ConcurrencyLimiter, LimitedChatModel
+    from src.fake_llm import ScriptedChatModel
+
+    limiter = ConcurrencyLimiter(1)
+    model = LimitedChatModel(model=ScriptedChatModel(default_answer="ok"), limiter=limiter)
+
+    bound = model.bind_tools([])
+    assert bound.invoke([HumanMessage("q")]).content == "ok"
+    assert limiter.peak == 1
+
+
+def test_limited_chat_model_still_streams():
+    """Test that a wrapped streaming model still emits tokens, sync and async, within the limit."""
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+    from src.concurrency import ConcurrencyLimiter, LimitedChatModel
+
+    limiter = ConcurrencyLimiter(1)
+    model = LimitedChatModel(
+        model=GenericFakeChatModel(messages=iter(["three word answer", "three word answer"])), limiter=limiter
+    )
+
+    assert len(list(model.stream([HumanMessage("q")]))) > 1
+
+    async def run():
+        return [
+            event["event"]
+            async for event in model.astream_events([HumanMessage("q")], version="v2")
+            if event["event"] == "on_chat_model_stream"
+        ]
+
+    assert len(asyncio.run(run())) > 1
+    assert limiter.peak == 1 and limiter.in_flight == 0
+
+
+def test_limiter_shares_slots_between_threads_and_coroutines():
+    """Test that sync and async holders together never exceed the limit."""
+    from src.concurrency import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter(2)
+
+    def work():
+        with limiter.hold():
+            time.sleep(0.02)
+
+    async def awork():
+        async with limiter.ahold():
+            await asyncio.sleep(0.02)
+
+    async def run():
+        await asyncio.gather(*[awork() for _ in range(4)])
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    asyncio.run(run())
+    for thread in threads:
+        thread.join()
+
+    assert limiter.peak == 2
+    assert limiter.in_flight == 0
+
+
+def test_limiter_works_across_event_loops():
+    """Test that ahold() keeps working when the limiter is reused by a second event loop."""
+    from src.concurrency import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter(1)
+
+    async def run():
+        async def awork():
+            async with limiter.ahold():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(awork(), awork())
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+    assert limiter.peak == 1
+    assert limiter.in_flight == 0
+
+
+def test_limiter_releases_slot_of_cancelled_waiter():
+    """Test that cancelling a coroutine waiting in ahold() does not leak a slot."""
+    from src.concurrency import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter(1)
+
+    async def run():
+        async def holder():
+            async with limiter.ahold():
+                await asyncio.sleep(0.05)
+
+        first = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(limiter.ahold().__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await first
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    assert limiter._semaphore.acquire(blocking=False)
+    limiter._semaphore.release()
@@ -23,6 +23,7 @@ def test_config_loads_env_vars(mock_env_vars, monkeypatch):
     assert config.MODEL == "gpt-4o-mini"
     assert config.TEMPERATURE == 0.0
     assert config.DB_PATH == "ecommerce.db"
+    assert config.QUERY_PLAN_LOG == os.path.join(".cache", "query_plans.jsonl")
 
 
 def test_config_uses_defaults(monkeypatch):
@@ -31,6 +32,8 @@ def test_config_uses_defaults(monkeypatch):
     monkeypatch.delenv("MODEL", raising=False)
     monkeypatch.delenv("TEMPERATURE", raising=False)
     monkeypatch.delenv("DB_PATH", raising=False)
+    monkeypatch.delenv("CACHE_DIR", raising=False)
+    monkeypatch.delenv("QUERY_PLAN_LOG", raising=False)
 
     # Reload config module to pick up changes
     import importlib
@@ -0,0 +1,79 @@
+"""Tests for datagen module."""
+
+import sqlite3
+
+
+def test_generate_batches_yields_exact_row_count():
+    """Test that batches add up to exactly the requested number of rows."""
+    from src.datagen import generate_batches
+
+    batches = list(generate_batches(2_500, seed=1, batch_size=1_000))
+
+    assert [len(b) for b in batches] == [1_000, 1_000, 500]
+    assert all(len(row) == 8 for batch in batches for row in batch)
+
+
+def test_generate_batches_is_deterministic():
+    """Test that the same seed produces the same rows and a different seed does not."""
+    from src.datagen import generate_batches
+
+    first = [row for batch in generate_batches(1_000, seed=7) for row in batch]
+    again = [row for batch in generate_batches(1_000, seed=7) for row in batch]
+    other = [row for batch in generate_batches(1_000, seed=8) for row in batch]
+
+    assert first == again
+    assert first != other
+
+
+def test_generate_database_has_realistic_distributions(tmp_path):
+    """Test that the data has returns, missing customers, adjustments and a UK-heavy country mix."""
+    from src.datagen import generate_database
+
+    db_path = str(tmp_path / "synthetic.db")
+    assert generate_database(db_path, 50_000, seed=3) == 50_000
+
+    conn = sqlite3.connect(db_path)
+    count = lambda where: conn.execute(f"SELECT COUNT(*) FROM transactions WHERE {where}").fetchone()[0]  # noqa: E731
+    assert count("1") == 50_000
+    assert count("InvoiceNo LIKE 'C%' AND Quantity < 0") > 0
+    assert 0.1 < count("CustomerID IS NULL") / 50_000 < 0.4
+    assert count("StockCode = 'POST'") > 0
+    assert count("Country = 'United Kingdom'") / 50_000 > 0.7
+    top = conn.execute("SELECT Country FROM transactions GROUP BY Country ORDER BY COUNT(*) DESC").fetchone()[0]
+    assert top == "United Kingdom"
+    conn.close()
+
+
+def test_generate_database_replaces_output_atomically(tmp_path):
+    """Test that the database is written to a partial file and renamed when complete."""
+    from src.datagen import generate_database
+
+    db_path = tmp_path / "synthetic.db"
+    db_path.write_text("old")
+    seen = []
+
+    generate_database(str(db_path), 300, batch_size=100, progress=lambda rows, _: seen.append(rows))
+
+    assert seen == [100, 200, 300]
+    assert not (tmp_path / "synthetic.db.partial").exists()
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 300
+    conn.close()
+
+
+def test_generate_database_discards_partial_file_on_error(tmp_path):
+    """Test that an interrupted run leaves neither a partial file nor a truncated database."""
+    import pytest
+
+    from src.datagen import generate_database
+
+    db_path = tmp_path / "synthetic.db"
+
+    def interrupt(rows, seconds):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        generate_database(str(db_path), 300, batch_size=100, progress=interrupt)
+
+    assert not db_path.exists()
+    assert not (tmp_path / "synthetic.db.partial").exists()
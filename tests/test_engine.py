@@ -0,0 +1,57 @@
+"""Tests for engine module."""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def test_tuned_connection_is_read_only_with_pragmas(temp_db):
+    """Test that tuned connections apply the PRAGMA profile and reject writes."""
+    from src.engine import connect_tuned
+
+    conn = connect_tuned(temp_db, mmap_size=1024 * 1024, cache_size=2 * 1024 * 1024, temp_store="memory")
+    try:
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 1024 * 1024
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM transactions")
+    finally:
+        conn.close()
+
+
+def test_engine_args_profiles(temp_db):
+    """Test that the default profile is untouched and unknown profiles are rejected."""
+    from src.engine import engine_args
+
+    assert engine_args(temp_db, "default") == {}
+    assert engine_args(temp_db, "tuned", pool_size=3)["pool_size"] == 3
+    with pytest.raises(ValueError):
+        engine_args(temp_db, "fast")
+    with pytest.raises(ValueError):
+        engine_args(temp_db, temp_store="ram")
+
+
+def test_tuned_engine_serves_concurrent_queries(temp_db):
+    """Test that the pooled read-only engine answers queries from many threads."""
+    from langchain_community.utilities import SQLDatabase
+
+    from src.engine import engine_args
+
+    db = SQLDatabase.from_uri(f"sqlite:///{temp_db}", engine_args=engine_args(temp_db, pool_size=2))
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: db.run("SELECT COUNT(*) FROM transactions"), range(12)))
+
+    assert results == ["[(3,)]"] * 12
+    assert db.run_no_throw("DROP TABLE transactions").startswith("Error:")
+
+
+def test_enable_wal(temp_db):
+    """Test that WAL is enabled once and persists on the database file."""
+    from src.engine import enable_wal, journal_mode
+
+    assert enable_wal(temp_db) is True
+    assert journal_mode(temp_db) == "wal"
+    assert enable_wal(temp_db) is False
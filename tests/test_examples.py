@@ -0,0 +1,83 @@
+"""Tests for examples module."""
+
+
+def test_example_store_finds_similar_questions():
+    """Test that retrieval ranks lexically similar questions first and drops unrelated ones."""
+    from src.examples import ExampleStore
+
+    store = ExampleStore()
+    store.add("What are the top 5 products by revenue in Germany?", "SELECT germany", (5, 2))
+    store.add("How many customers are in France?", "SELECT customers", (1, 1))
+    store.add("Monthly revenue for 2011", "SELECT monthly", (12, 2))
+
+    results = store.search("top 10 products by revenue in Spain", k=2)
+
+    assert [r["sql"] for r in results] == ["SELECT germany"]
+    assert results[0]["similarity"] >= 0.3
+    assert store.search("weather forecast") == []
+
+
+def test_example_store_replaces_and_persists(tmp_path):
+    """Test that a repeated question keeps its latest SQL and examples survive a restart."""
+    from src.examples import ExampleStore
+
+    db_path = str(tmp_path / "examples.db")
+    store = ExampleStore(db_path, max_examples=2)
+    store.add("How many customers are in France?", "SELECT 1", (1, 1))
+    store.add("how many customers are in france", "SELECT 2", (1, 1))
+    store.add("Monthly revenue for 2011", "SELECT monthly", (12, 2))
+    store.add("Top products by revenue", "SELECT top", (10, 2))
+    store.close()
+
+    reloaded = ExampleStore(db_path)
+    assert len(reloaded) == 2
+    assert reloaded.search("How many customers are in France?") == []
+    assert reloaded.search("monthly revenue 2011")[0]["sql"] == "SELECT monthly"
+
+
+def test_example_agent_hints_and_learns(temp_db):
+    """Test that a successful turn is stored and hinted to the model for a similar question."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from src.agent import setup_agent
+    from src.examples import ExampleStore
+    from src.fake_llm import ScriptedChatModel
+
+    first = "How many transactions are there in the USA?"
+    second = "How many transactions are there in the UK?"
+    sql = "SELECT COUNT(*) FROM transactions WHERE Country = 'USA'"
+    llm = ScriptedChatModel(scripts={first: [{"sql": sql}, {"answer": "2"}], second: [{"answer": "1"}]})
+    store = ExampleStore()
+    agent = setup_agent(llm=llm, use_cache=False, db_path=temp_db, query_plan_log="", example_store=store)
+
+    prompts = []
+
+    class Spy(BaseCallbackHandler):
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            prompts.append(messages[0])
+
+    for question in (first, second):
+        agent.invoke({"input": question}, config={"configurable": {"session_id": "examples"}, "callbacks": [Spy()]})
+
+    assert store.search(second)[0]["sql"] == sql
+    assert not any("Similar questions" in str(m.content) for m in prompts[0])
+    assert any(sql in str(m.content) for m in prompts[-1] if m.type == "system")
+
+
+def test_example_agent_skips_follow_up_questions():
+    """Test that questions resolved through earlier turns are not stored as examples."""
+    from unittest.mock import Mock
+
+    from src.examples import ExampleAgent, ExampleStore, _SQLRecorder
+
+    store = ExampleStore()
+    agent = ExampleAgent(Mock(), store)
+    recorder = _SQLRecorder()
+    recorder.queries.append(("SELECT COUNT(*) FROM transactions WHERE Country = 'UK'", (1, 1)))
+
+    for question in ("And in the UK?", "What about the UK?", "How many of those were in the UK?"):
+        agent._learn(question, recorder)
+    assert len(store) == 0
+
+    agent._learn("How many transactions are there in the UK?", recorder)
+    assert len(store) == 1
@@ -0,0 +1,39 @@
+"""Tests for fake_llm module."""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+
+def test_scripted_model_replays_steps_in_order():
+    """Test that the step is chosen from the AI messages since the question."""
+    from src.fake_llm import ScriptedChatModel
+
+    model = ScriptedChatModel(scripts={"Revenue?": [{"sql": "SELECT SUM(UnitPrice)"}, {"answer": "$100"}]})
+
+    first = model.invoke([HumanMessage("Revenue?")])
+    assert first.tool_calls[0]["name"] == "sql_db_query"
+    assert first.tool_calls[0]["args"] == {"query": "SELECT SUM(UnitPrice)"}
+
+    second = model.invoke(
+        [HumanMessage("Revenue?"), first, ToolMessage("[(100,)]", tool_call_id=first.tool_calls[0]["id"])]
+    )
+    assert second.content == "$100"
+    assert model.calls == 2
+
+
+def test_scripted_model_ignores_previous_turns():
+    """Test that earlier turns in the chat history do not advance the script."""
+    from src.fake_llm import ScriptedChatModel
+
+    model = ScriptedChatModel(scripts={"Top country?": [{"answer": "UK"}]})
+    history = [HumanMessage("Revenue?"), AIMessage("$100")]
+
+    assert model.invoke(history + [HumanMessage("Top country?")]).content == "UK"
+
+
+def test_scripted_model_default_answer():
+    """Test that unscripted questions get the default answer."""
+    from src.fake_llm import ScriptedChatModel
+
+    model = ScriptedChatModel(default_answer="No idea")
+    assert model.invoke([HumanMessage("Anything?")]).content == "No idea"
+    assert model.bind_tools([]) is model
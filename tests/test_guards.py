@@ -0,0 +1,87 @@
+"""Tests for guards module."""
+
+import threading
+
+RUNAWAY = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+
+
+def _db(path):
+    from langchain_community.utilities import SQLDatabase
+
+    return SQLDatabase.from_uri(f"sqlite:///{path}")
+
+
+def test_guard_formats_results_like_sqldatabase(temp_db):
+    """Test that small results and errors match SQLDatabase.run_no_throw()."""
+    from src.guards import QueryGuard
+
+    db = _db(temp_db)
+    guard = QueryGuard()
+
+    for query in ("SELECT InvoiceNo, Quantity FROM transactions", "SELECT * FROM missing", "SELECT 1 WHERE 0"):
+        assert guard.run(db, query) == db.run_no_throw(query)
+
+
+def test_guard_cancels_queries_over_time_budget(temp_db):
+    """Test that a runaway query is cancelled with feedback for the agent."""
+    from src.guards import QueryGuard
+
+    guard = QueryGuard(timeout=0.2)
+
+    result = guard.run(_db(temp_db), RUNAWAY)
+
+    assert result.startswith("Error: query cancelled after exceeding the 0.2s time budget")
+    assert guard.timeouts == 1
+
+
+def test_guard_caps_rows_and_bytes(temp_db):
+    """Test that large results are truncated with a note and still count as rows."""
+    from src.guards import QueryGuard
+    from src.streaming import count_rows
+
+    db = _db(temp_db)
+
+    result = QueryGuard(max_rows=2).run(db, "SELECT InvoiceNo FROM transactions")
+    assert result.startswith("[('123',), ('124',)]\n[Result truncated to the first 2 rows")
+    assert count_rows(result) == 2
+
+    result = QueryGuard(max_bytes=20).run(db, "SELECT InvoiceNo, Description FROM transactions")
+    assert "truncated to the first 1 rows" in result
+
+
+def test_guard_row_limit_caps_compact_pages(temp_db):
+    """Test that with compact results the row limit caps what can be paged through, not the count."""
+    from src.guards import QueryGuard
+    from src.results import ResultFormatter
+
+    db = _db(temp_db)
+    guard = QueryGuard(max_rows=2, max_bytes=1024)
+    formatter = ResultFormatter(page_rows=1, max_bytes=1024)
+    query = "SELECT InvoiceNo FROM transactions ORDER BY InvoiceNo"
+
+    first = guard.run(db, query, formatter, page=1)
+    assert first.splitlines()[:3] == ["InvoiceNo", "123", "-- rows 1-1 of 3"]
+    assert "page=2" in first
+
+    second = guard.run(db, query, formatter, page=2).splitlines()
+    assert second[:3] == ["InvoiceNo", "124", "-- rows 2-2 of 3"]
+    assert second[-1].startswith("-- only the first 2 rows can be read")
+
+    assert "no rows on page 3" in guard.run(db, query, formatter, page=3)
+
+
+def test_cancel_running_queries_interrupts_other_threads(temp_db):
+    """Test that cancelling (e.g. on Ctrl-C) interrupts a query running on another thread."""
+    import time
+
+    from src.guards import QueryGuard, cancel_running_queries
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(QueryGuard(timeout=0).run(_db(temp_db), RUNAWAY)))
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not cancel_running_queries() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.join(timeout=5)
+
+    assert results == ["Error: query cancelled by the user."]
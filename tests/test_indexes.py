@@ -0,0 +1,95 @@
+"""Tests for indexes module."""
+
+import json
+import sqlite3
+
+
+def test_missing_indexes_reports_all_on_fresh_database(temp_db):
+    """Test that every managed index is reported missing on a fresh database."""
+    from src.indexes import INDEXES, missing_indexes
+
+    assert missing_indexes(temp_db) == list(INDEXES)
+
+
+def test_ensure_indexes_creates_and_analyzes(temp_db):
+    """Test that ensure_indexes creates the indexes and planner statistics."""
+    from src.indexes import ensure_indexes, missing_indexes
+
+    changed = ensure_indexes(temp_db)
+    assert set(changed.values()) == {"missing"}
+    assert missing_indexes(temp_db) == []
+
+    conn = sqlite3.connect(temp_db)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0] == 1
+    conn.close()
+
+    # A second run has nothing left to do
+    assert ensure_indexes(temp_db) == {}
+
+
+def test_ensure_indexes_rebuilds_stale_index(temp_db):
+    """Test that an index with an outdated definition is rebuilt."""
+    from src.indexes import ensure_indexes, missing_indexes
+
+    conn = sqlite3.connect(temp_db)
+    conn.execute("CREATE INDEX idx_transactions_country ON transactions (Country)")
+    conn.commit()
+    conn.close()
+
+    changed = ensure_indexes(temp_db)
+    assert changed["idx_transactions_country"] == "stale"
+    assert missing_indexes(temp_db) == []
+
+
+def test_full_scans_detection(temp_db):
+    """Test that full table scans are detected in query plans."""
+    from src.indexes import ensure_indexes, explain_query_plan, full_scans
+
+    query = "SELECT SUM(Quantity) FROM transactions WHERE Country = 'UK'"
+    conn = sqlite3.connect(temp_db)
+    assert full_scans(explain_query_plan(conn, query)) == ["transactions"]
+    conn.close()
+
+    ensure_indexes(temp_db)
+    conn = sqlite3.connect(temp_db)
+    assert full_scans(explain_query_plan(conn, query + ";")) == []
+    conn.close()
+
+
+def test_query_plan_auditor_logs_plans(temp_db, tmp_path):
+    """Test that the auditor records plans and summarizes full scans."""
+    from src.indexes import QueryPlanAuditor, summarize_audit_log
+
+    log_path = tmp_path / "plans.jsonl"
+    auditor = QueryPlanAuditor(temp_db, str(log_path))
+
+    entry = auditor.record("SELECT * FROM transactions WHERE Description LIKE '%Product%'")
+    auditor.record("SELECT * FROM transactions WHERE Description LIKE '%Product%'")
+    assert entry["full_scans"] == ["transactions"]
+    assert auditor.record("SELECT missing FROM nowhere") is None
+
+    lines = log_path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["plan"]
+
+    summary = summarize_audit_log(str(log_path))
+    assert summary == [(2, "SELECT * FROM transactions WHERE Description LIKE '%Product%'", ["transactions"])]
+    assert auditor.full_scan_queries == 2
+
+
+def test_audit_log_rotates_and_skips_broken_lines(temp_db, tmp_path):
+    """Test that the audit log is rotated past its size and summarized across truncated lines."""
+    from src.indexes import QueryPlanAuditor, summarize_audit_log
+
+    log_path = tmp_path / "plans.jsonl"
+    auditor = QueryPlanAuditor(temp_db, str(log_path), max_bytes=1)
+    query = "SELECT * FROM transactions WHERE Description LIKE '%Product%'"
+
+    for _ in range(3):
+        auditor.record(query)
+    with log_path.open("a", encoding="utf-8") as log:
+        log.write('{"timestamp": 1, "sql": "SELECT')
+
+    assert len(log_path.read_text().splitlines()) == 2
+    assert len((tmp_path / "plans.jsonl.1").read_text().splitlines()) == 1
+    assert summarize_audit_log(str(log_path)) == [(2, query, ["transactions"])]
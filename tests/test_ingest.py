@@ -0,0 +1,187 @@
+"""Tests for ingest module."""
+
+import sqlite3
+
+import pytest
+
+CSV = """InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country
+536365,85123A,WHITE HANGING HEART T-LIGHT HOLDER ,6,12/1/2010 8:26,2.55,17850.0,United Kingdom
+536365,71053,WHITE METAL LANTERN,6,12/1/2010 8:26,3.39,17850.0,United Kingdom
+C536379,D,Discount,-1,12/1/2010 9:41,27.5,,United Kingdom
+536380,22961,JAM MAKING SET PRINTED,24,not a date,1.45,17809.0,United Kingdom
+"""
+
+MORE_CSV = """Invoice,StockCode,Description,Quantity,InvoiceDate,Price,Customer ID,Country
+536365,85123A,WHITE HANGING HEART T-LIGHT HOLDER,6,2010-12-01 08:26:00,2.55,17850,United Kingdom
+581587,22613,PACK OF 20 SPACEBOY NAPKINS,12,2011-12-09 12:50:00,0.85,12680,France
+"""
+
+
+def write(tmp_path, name, text):
+    """Write a source file and return its path."""
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_read_source_types_and_derived_columns(tmp_path):
+    """Test that rows are typed, trimmed and given year/month columns, and bad rows are dropped."""
+    from src.ingest import read_source
+
+    rows = [row for batch in read_source(write(tmp_path, "retail.csv", CSV)) for row in batch]
+
+    assert rows == [
+        (
+            "536365",
+            "85123A",
+            "WHITE HANGING HEART T-LIGHT HOLDER",
+            6,
+            "2010-12-01 08:26:00",
+            2.55,
+            17850,
+            "United Kingdom",
+            2010,
+            "2010-12",
+        ),
+        (
+            "536365",
+            "71053",
+            "WHITE METAL LANTERN",
+            6,
+            "2010-12-01 08:26:00",
+            3.39,
+            17850,
+            "United Kingdom",
+            2010,
+            "2010-12",
+        ),
+        ("C536379", "D", "Discount", -1, "2010-12-01 09:41:00", 27.5, None, "United Kingdom", 2010, "2010-12"),
+    ]
+
+
+def test_read_source_rejects_unknown_layouts(tmp_path):
+    """Test that files without the required columns or of unknown types are rejected."""
+    from src.ingest import read_source
+
+    with pytest.raises(ValueError):
+        list(read_source(write(tmp_path, "other.csv", "a,b\n1,2\n")))
+    with pytest.raises(ValueError):
+        list(read_source(write(tmp_path, "retail.json", "[]")))
+
+
+def test_ingest_builds_indexed_database(tmp_path):
+    """Test that a rebuild writes typed rows, the managed indexes and planner statistics."""
+    from src.indexes import missing_indexes
+    from src.ingest import ingest_sources
+
+    db_path = str(tmp_path / "ecommerce.db")
+    summary = ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)], chunk_size=2)
+
+    assert summary["inserted"] == 3
+    assert missing_indexes(db_path) == []
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT typeof(CustomerID), InvoiceMonth FROM transactions LIMIT 1").fetchone() == (
+        "integer",
+        "2010-12",
+    )
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    conn.close()
+    assert not (tmp_path / "ecommerce.db.partial").exists()
+
+
+def test_ingest_appends_only_new_invoices(tmp_path, temp_db):
+    """Test that appends skip invoices already loaded and work on databases without derived columns."""
+    from src.ingest import ingest_sources
+
+    db_path = str(tmp_path / "ecommerce.db")
+    ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)])
+    more = write(tmp_path, "retail_ii.csv", MORE_CSV)
+
+    assert ingest_sources(db_path, [more], append=True)["inserted"] == 1
+    again = ingest_sources(db_path, [more], append=True)
+    assert (again["inserted"], again["skipped"]) == (0, 2)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT Country, InvoiceYear FROM transactions WHERE InvoiceNo = '581587'").fetchall() == [
+        ("France", 2011)
+    ]
+    conn.close()
+
+    # The test fixture's layout has no InvoiceYear/InvoiceMonth columns
+    assert ingest_sources(temp_db, [more], append=True, build_indexes=False)["inserted"] == 2
+
+
+def test_ingest_failure_keeps_existing_database(tmp_path):
+    """Test that a failed rebuild leaves the previous database untouched."""
+    from src.ingest import ingest_sources
+
+    db_path = str(tmp_path / "ecommerce.db")
+    ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)])
+
+    with pytest.raises(ValueError):
+        ingest_sources(db_path, [write(tmp_path, "broken.csv", "a,b\n1,2\n")])
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 3
+    conn.close()
+    assert not (tmp_path / "ecommerce.db.partial").exists()
+
+
+def test_interrupted_append_leaves_no_partial_invoices(tmp_path, monkeypatch):
+    """Test that an append failing mid-source rolls the source back so a re-run loads it whole."""
+    from src import ingest
+    from src.ingest import ingest_sources
+
+    db_path = str(tmp_path / "ecommerce.db")
+    ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)])
+    more = write(tmp_path, "retail_ii.csv", MORE_CSV.replace("536365,", "581586,"))
+    read_source = ingest.read_source
+
+    def interrupted(*args, **kwargs):
+        batches = read_source(*args, **kwargs)
+        yield next(batches)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ingest, "read_source", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_sources(db_path, [more], append=True, chunk_size=1, build_indexes=False)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 3
+    conn.close()
+
+    monkeypatch.setattr(ingest, "read_source", read_source)
+    assert ingest_sources(db_path, [more], append=True)["inserted"] == 2
+
+
+def test_rebuild_recovers_leftover_wal_and_refuses_open_databases(tmp_path):
+    """Test that a WAL left by a crash is not replayed onto a rebuilt database, and open databases are kept."""
+    import os
+    import shutil
+
+    from src.ingest import ingest_sources
+
+    db_path = str(tmp_path / "ecommerce.db")
+    ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)])
+
+    writer = sqlite3.connect(db_path)
+    writer.execute("PRAGMA journal_mode = WAL")
+    writer.execute("PRAGMA wal_autocheckpoint = 0")
+    with writer:
+        writer.execute("DELETE FROM transactions")
+    with pytest.raises(RuntimeError):
+        ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)])
+    assert not (tmp_path / "ecommerce.db.partial").exists()
+
+    # Keep the uncheckpointed WAL as a crashed process would have left it
+    for suffix in ("-wal", "-shm"):
+        shutil.copy(db_path + suffix, str(tmp_path / f"saved{suffix}"))
+    writer.close()
+    for suffix in ("-wal", "-shm"):
+        shutil.copy(str(tmp_path / f"saved{suffix}"), db_path + suffix)
+
+    ingest_sources(db_path, [write(tmp_path, "retail.csv", CSV)])
+
+    assert not os.path.exists(db_path + "-wal")
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 3
+    conn.close()
@@ -23,7 +23,7 @@ def test_full_query_flow_with_mock_llm(mock_env_vars, temp_db, monkeypatch):
         patch("src.agent.create_sql_agent") as mock_create,
         patch("src.agent.RunnableWithMessageHistory") as mock_runnable,
         patch("src.agent.SQLDatabase"),
-        patch("src.agent.SQLDatabaseToolkit"),
+        patch("src.agent.ChatSQLToolkit"),
     ):
 
         mock_llm.return_value = Mock()
@@ -36,7 +36,8 @@ def test_full_query_flow_with_mock_llm(mock_env_vars, temp_db, monkeypatch):
         mock_wrapped.invoke.return_value = mock_response
         mock_runnable.return_value = mock_wrapped
 
-        agent_executor = agent.setup_agent(verbose=False)
+        # Templates would answer this question from temp_db without reaching the mocked agent
+        agent_executor = agent.setup_agent(verbose=False, use_templates=False)
         response = agent_executor.invoke(
             {"input": "What is the total revenue?"},
             config={"configurable": {"session_id": "test_session"}},
@@ -46,6 +47,31 @@ def test_full_query_flow_with_mock_llm(mock_env_vars, temp_db, monkeypatch):
         mock_create.assert_called_once()
 
 
+def test_template_question_skips_mock_llm(mock_env_vars, temp_db):
+    """Test that a template question is answered from the database without invoking the agent."""
+    from src import agent
+    from src.memory import clear_memory
+
+    with (
+        patch("src.agent.ChatOpenAI"),
+        patch("src.agent.create_sql_agent") as mock_create,
+        patch("src.agent.SQLDatabase"),
+        patch("src.agent.ChatSQLToolkit"),
+    ):
+        mock_agent = Mock()
+        mock_create.return_value = mock_agent
+
+        agent_executor = agent.setup_agent(verbose=False, use_cache=False, db_path=temp_db, use_templates=True)
+        response = agent_executor.invoke(
+            {"input": "What is the total revenue?"},
+            config={"configurable": {"session_id": "template_session"}},
+        )
+
+    assert response["output"] == "Total revenue was 95.00."
+    mock_agent.invoke.assert_not_called()
+    clear_memory("template_session")
+
+
 def test_database_connection_with_real_db(monkeypatch):
     """Test that agent can connect to the real database."""
     # Set up environment for real database
@@ -111,3 +137,46 @@ def test_config_validation_integration(tmp_path, monkeypatch):
 
     with pytest.raises(ValueError):
         config.validate_config()
+
+
+def test_full_pipeline_with_scripted_llm(temp_db, tmp_path):
+    """Test the real agent pipeline offline with a scripted chat model."""
+    import asyncio
+
+    from src import agent
+    from src.fake_llm import ScriptedChatModel
+    from src.memory import clear_memory, get_session_history
+
+    llm = ScriptedChatModel(
+        scripts={
+            "How many transactions?": [
+                {"sql": "SELECT COUNT(*) FROM transactions"},
+                {"answer": "There are 3 transactions."},
+            ]
+        }
+    )
+
+    with (
+        patch("src.agent.DB_PATH", temp_db),
+        patch("src.agent.CACHE_DIR", str(tmp_path)),
+        patch("src.agent.QUERY_PLAN_LOG", str(tmp_path / "plans.jsonl")),
+    ):
+        agent_executor = agent.setup_agent(llm=llm, llm_concurrency=2, sql_concurrency=2)
+
+    async def ask_concurrently():
+        return await asyncio.gather(
+            *[
+                agent_executor.ainvoke(
+                    {"input": "How many transactions?"},
+                    config={"configurable": {"session_id": f"scripted_{i}"}},
+                )
+                for i in range(4)
+            ]
+        )
+
+    responses = asyncio.run(ask_concurrently())
+
+    assert [r["output"] for r in responses] == ["There are 3 transactions."] * 4
+    assert len(get_session_history("scripted_0").messages) == 2
+    for i in range(4):
+        clear_memory(f"scripted_{i}")
@@ -73,3 +73,135 @@ def test_memory_session_isolation():
     assert len(session1.messages) == 1
     assert len(session2.messages) == 1
     assert session1.messages[0].content != session2.messages[0].content
+
+
+def add_turns(history, start, count):
+    """Add numbered question/answer turns to a history."""
+    for i in range(start, start + count):
+        history.add_user_message(f"Question {i}")
+        history.add_ai_message(f"Answer {i}")
+
+
+def test_history_policy_keeps_recent_turns_verbatim():
+    """Test that short histories are sent to the model unchanged."""
+    from src.memory import HistoryPolicy, SessionHistory
+
+    history = SessionHistory()
+    add_turns(history, 0, 3)
+
+    assert HistoryPolicy(max_turns=2).prompt_messages(history) == history.messages
+
+
+def test_history_policy_folds_old_turns_into_summary():
+    """Test that old turns are summarized once and the last N turns stay verbatim."""
+    from langchain_core.messages import SystemMessage
+
+    from src.memory import HistoryPolicy, SessionHistory
+
+    calls = []
+
+    def summarizer(summary, messages):
+        calls.append([m.content for m in messages])
+        return f"{summary} user asked about {len(messages) // 2} things".strip()
+
+    history = SessionHistory()
+    policy = HistoryPolicy(max_turns=2, summarizer=summarizer)
+    add_turns(history, 0, 4)
+
+    prompt = policy.prompt_messages(history)
+
+    assert calls == [["Question 0", "Answer 0", "Question 1", "Answer 1"]]
+    assert isinstance(prompt[0], SystemMessage)
+    assert "user asked about 2 things" in prompt[0].content
+    assert [m.content for m in prompt[1:]] == ["Question 2", "Answer 2", "Question 3", "Answer 3"]
+    assert len(history.messages) == 8
+
+    # The summary is reused until another batch of turns is pending
+    add_turns(history, 4, 1)
+    policy.prompt_messages(history)
+    assert len(calls) == 1
+
+
+def test_history_policy_prompt_size_stays_flat():
+    """Test that the prompt does not grow with the length of the session."""
+    from langchain_core.messages.utils import count_tokens_approximately
+
+    from src.memory import HistoryPolicy, SessionHistory
+
+    history = SessionHistory()
+    policy = HistoryPolicy(max_turns=3, max_tokens=200, summarizer=lambda summary, messages: "earlier questions")
+    sizes = []
+    for i in range(60):
+        add_turns(history, i, 1)
+        sizes.append(count_tokens_approximately(policy.prompt_messages(history)))
+
+    assert max(sizes[10:]) <= 200
+    assert max(sizes[20:]) == max(sizes[10:20])
+
+
+def test_history_policy_enforces_token_budget():
+    """Test that the oldest verbatim turns are trimmed to fit the token budget."""
+    from langchain_core.messages import HumanMessage
+
+    from src.memory import HistoryPolicy, SessionHistory
+
+    history = SessionHistory()
+    for i in range(3):
+        history.add_user_message(f"Question {i} " + "word " * 100)
+        history.add_ai_message(f"Answer {i}")
+
+    prompt = HistoryPolicy(max_turns=6, max_tokens=150).prompt_messages(history)
+
+    assert isinstance(prompt[0], HumanMessage)
+    assert prompt[0].content.startswith("Question 2")
+
+
+def test_history_policy_survives_summarizer_errors():
+    """Test that a failing summarizer does not fail the turn."""
+    from src.memory import HistoryPolicy, SessionHistory
+
+    def summarizer(summary, messages):
+        raise RuntimeError("rate limited")
+
+    history = SessionHistory()
+    add_turns(history, 0, 4)
+
+    prompt = HistoryPolicy(max_turns=2, summarizer=summarizer).prompt_messages(history)
+
+    assert [m.content for m in prompt] == ["Question 2", "Answer 2", "Question 3", "Answer 3"]
+
+
+def test_prompt_history_records_into_session():
+    """Test that the prompt view writes new messages to the full session history."""
+    from src.memory import HistoryPolicy, clear_memory, get_session_history
+
+    view = HistoryPolicy(max_turns=1).session_history("policy_session")
+    view.add_messages([HumanMessage("Top product?"), AIMessage("Mugs")])
+
+    history = get_session_history("policy_session")
+    assert [m.content for m in history.messages] == ["Top product?", "Mugs"]
+
+    history.summary, history.summarized = "old", 2
+    view.clear()
+    assert history.summary == "" and history.summarized == 0
+    clear_memory("policy_session")
+
+
+def test_summarizer_runs_outside_turn_callbacks():
+    """Test that summary tokens do not surface as the turn's stream events."""
+    import asyncio
+
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.runnables import RunnableLambda
+
+    from src.memory import summarize_with
+
+    summarize = summarize_with(GenericFakeChatModel(messages=iter(["user asked about mugs"])))
+    turn = RunnableLambda(lambda question: summarize("", [HumanMessage(question)]))
+
+    async def run():
+        return [event async for event in turn.astream_events("Mugs?", version="v2")]
+
+    events = asyncio.run(run())
+    assert events[-1]["data"]["output"] == "user asked about mugs"
+    assert not any(event["event"].startswith("on_chat_model") for event in events)
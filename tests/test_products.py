@@ -0,0 +1,123 @@
+"""Tests for products module."""
+
+import sqlite3
+
+import pytest
+
+
+def test_ensure_product_search_builds_once(temp_db):
+    """Test that the index is built from distinct products and left alone once up to date."""
+    from src.products import ensure_product_search, product_search_state
+
+    assert product_search_state(temp_db) == "missing"
+    assert ensure_product_search(temp_db) == "missing"
+    assert product_search_state(temp_db) == "ok"
+    assert ensure_product_search(temp_db) is None
+
+    conn = sqlite3.connect(temp_db)
+    assert conn.execute("SELECT COUNT(*) FROM chat_products").fetchone() == (3,)
+    conn.close()
+
+
+def test_ensure_product_search_keeps_a_products_table_of_the_database(temp_db):
+    """Test that building the index leaves a products table it did not create untouched."""
+    from src.products import ensure_product_search
+
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO products (name) VALUES ('catalog row')")
+    conn.close()
+
+    assert ensure_product_search(temp_db) == "missing"
+
+    conn = sqlite3.connect(temp_db)
+    assert conn.execute("SELECT name FROM products").fetchall() == [("catalog row",)]
+    conn.close()
+
+
+def test_search_stems_prefixes_and_falls_back_to_any_word(temp_db):
+    """Test that plurals and partial words match and unmatched words widen the search."""
+    from src.products import ProductSearch, ensure_product_search
+
+    ensure_product_search(temp_db)
+    search = ProductSearch(temp_db)
+
+    assert search.available()
+    assert search.search("test products") == [("A001", "Test Product")]
+    assert search.search("anoth") == [("A002", "Another Product")]
+    assert [code for code, _ in search.search("product")] == ["A001", "A002"]
+    assert search.search("another widget") == [("A002", "Another Product")]
+    assert search.search("lantern") == []
+    assert search.search("%!") == []
+
+
+def test_triggers_keep_index_current(temp_db):
+    """Test that new transactions add their products to the index."""
+    from src.products import ProductSearch, ensure_product_search
+
+    ensure_product_search(temp_db)
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute(
+            "INSERT INTO transactions VALUES ('126', 'B001', 'GLASS LANTERN', 2, '2024-02-01', 4.0, 1004.0, 'UK')"
+        )
+        conn.execute(
+            "INSERT INTO transactions VALUES ('127', 'B001', 'GLASS LANTERN', 1, '2024-02-02', 4.0, 1005.0, 'UK')"
+        )
+    conn.close()
+
+    assert ProductSearch(temp_db).search("lanterns") == [("B001", "GLASS LANTERN")]
+
+
+def test_search_without_index(temp_db):
+    """Test that a database without the index is reported unavailable."""
+    from src.products import ProductSearch
+
+    search = ProductSearch(temp_db)
+
+    assert not search.available()
+    with pytest.raises(sqlite3.OperationalError):
+        search.search("test")
+
+
+def test_list_tables_hides_search_index(temp_db):
+    """Test that the FTS5 table and its shadow tables stay out of the agent's schema."""
+    from src.products import ensure_product_search
+    from src.schema import hidden_tables, list_tables
+
+    ensure_product_search(temp_db)
+    conn = sqlite3.connect(temp_db)
+    try:
+        assert list_tables(conn) == ["chat_products", "transactions"]
+        assert "product_search" in hidden_tables(conn)
+        assert "product_search_data" in hidden_tables(conn)
+    finally:
+        conn.close()
+
+
+def test_product_lookup_tool(temp_db):
+    """Test that the toolkit exposes the lookup as a compact table and points errors to LIKE."""
+    from langchain_community.utilities import SQLDatabase
+    from langchain_core.language_models import FakeListChatModel
+
+    from src.products import ProductSearch, ensure_product_search
+    from src.streaming import count_rows
+    from src.tools import ChatSQLToolkit
+
+    def lookup_tool():
+        toolkit = ChatSQLToolkit(
+            db=SQLDatabase.from_uri(f"sqlite:///{temp_db}"),
+            llm=FakeListChatModel(responses=[]),
+            product_search=ProductSearch(temp_db),
+        )
+        return next(tool for tool in toolkit.get_tools() if tool.name == "product_lookup")
+
+    error = lookup_tool().run({"query": "test"})
+    assert error.startswith("Error:") and "LIKE" in error
+
+    ensure_product_search(temp_db)
+    output = lookup_tool().run({"query": "test"})
+    assert output == "StockCode|Description\nA001|Test Product"
+    assert count_rows(output) == 1
+    assert lookup_tool().run({"query": "lantern"}).startswith("No matching products")
@@ -0,0 +1,85 @@
+"""Tests for profiling module."""
+
+from langchain_core.messages import HumanMessage
+
+
+def test_profiler_records_llm_calls():
+    """Test that chat model calls are timed with prompt and completion token counts."""
+    from src.fake_llm import ScriptedChatModel
+    from src.profiling import TurnProfiler
+
+    profiler = TurnProfiler()
+    model = ScriptedChatModel(default_answer="Total revenue was $100")
+    model.invoke([HumanMessage("What was the total revenue?")], config={"callbacks": [profiler]})
+
+    events = profiler.take_events()
+    assert len(events) == 1
+    assert events[0]["type"] == "llm"
+    assert events[0]["seconds"] >= 0
+    assert events[0]["prompt_tokens"] > 0
+    assert events[0]["completion_tokens"] > 0
+    assert profiler.take_events() == []
+
+
+def test_profiler_records_sql_tool_calls(temp_db):
+    """Test that sql_db_query calls record the SQL text and rows returned."""
+    from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+    from langchain_community.utilities import SQLDatabase
+
+    from src.profiling import TurnProfiler
+
+    profiler = TurnProfiler()
+    tool = QuerySQLDatabaseTool(db=SQLDatabase.from_uri(f"sqlite:///{temp_db}"))
+    tool.invoke({"query": "SELECT * FROM transactions"}, config={"callbacks": [profiler]})
+    tool.invoke({"query": "SELECT * FROM missing"}, config={"callbacks": [profiler]})
+
+    events = profiler.take_events()
+    assert [e["tool"] for e in events] == ["sql_db_query", "sql_db_query"]
+    assert events[0]["sql"] == "SELECT * FROM transactions"
+    assert events[0]["rows"] == 3
+    assert events[1]["rows"] is None
+
+
+def test_summarize_turn():
+    """Test that a turn's events are aggregated into counts and totals."""
+    from src.profiling import summarize_turn
+
+    events = [
+        {"type": "llm", "seconds": 0.5, "prompt_tokens": 100, "completion_tokens": 10},
+        {"type": "tool", "tool": "sql_db_query", "seconds": 0.2, "sql": "SELECT 1", "rows": 4},
+        {"type": "tool", "tool": "sql_db_query", "seconds": 0.1, "sql": "SELECT x", "rows": None},
+        {"type": "llm", "seconds": 0.25, "prompt_tokens": 150, "completion_tokens": 20},
+    ]
+
+    summary = summarize_turn(events)
+
+    assert summary["llm_calls"] == 2
+    assert summary["llm_seconds"] == 0.75
+    assert summary["max_prompt_tokens"] == 150
+    assert summary["completion_tokens"] == 30
+    assert summary["sql_queries"] == 2
+    assert summary["sql_errors"] == 1
+    assert summary["rows"] == 4
+
+
+def test_profile_log_writes_turns_and_summary(tmp_path):
+    """Test that each turn is appended as a JSON line and summarized in a table."""
+    import json
+
+    from src.fake_llm import ScriptedChatModel
+    from src.profiling import ProfileLog
+
+    log_path = tmp_path / "profile.jsonl"
+    profile = ProfileLog(str(log_path))
+    model = ScriptedChatModel(default_answer="Total revenue was $100")
+    model.invoke([HumanMessage("What was the total revenue?")], config={"callbacks": [profile.profiler]})
+
+    turn = profile.record("What was the total revenue?", 0.25)
+
+    assert turn["iterations"] == 1
+    assert turn["events"][0]["type"] == "llm"
+    assert json.loads(log_path.read_text().splitlines()[0])["question"] == "What was the total revenue?"
+    table = profile.format_summary().splitlines()
+    assert table[1].startswith("What was the total revenue?")
+    assert table[-1].startswith("total")
+    assert "250.0" in table[-1]
@@ -0,0 +1,61 @@
+"""Tests for results module."""
+
+
+def test_small_result_is_a_plain_table():
+    """Test that a result fitting on one page is just a header and rows."""
+    from src.results import ResultFormatter
+
+    text = ResultFormatter().format(["Country", "revenue"], [("USA", 50.0), ("U|K", 45.123456), (None, 1)])
+
+    assert text == "Country|revenue\nUSA|50\nU\\|K|45.1235\nNULL|1"
+
+
+def test_empty_result_is_empty_text():
+    """Test that an empty result formats like run_no_throw()."""
+    from src.results import ResultFormatter
+
+    assert ResultFormatter().format(["a"], []) == ""
+
+
+def test_large_result_shows_one_page_with_stats_and_paging_hint():
+    """Test that large results are capped at a page with count, statistics and a next-page hint."""
+    from src.results import ResultFormatter
+
+    rows = [(f"P{i % 4}", i, None if i % 10 == 0 else 1.5) for i in range(25)]
+    formatter = ResultFormatter(page_rows=10)
+
+    first = formatter.format(["product", "n", "price"], rows).splitlines()
+    assert first[0] == "product|n|price"
+    assert first[1:11] == [f"P{i % 4}|{i}|{'NULL' if i % 10 == 0 else '1.5'}" for i in range(10)]
+    assert first[11] == "-- rows 1-10 of 25"
+    assert first[12] == (
+        "-- stats over 25 rows: product distinct=4; n sum=300 min=0 max=24 distinct=25; "
+        "price sum=33 min=1.5 max=1.5 distinct=1 nulls=3"
+    )
+    assert "page=2" in first[13]
+
+    last = formatter.format(["product", "n", "price"], rows, page=3).splitlines()
+    assert last[1:] == [f"P{i % 4}|{i}|{'NULL' if i % 10 == 0 else '1.5'}" for i in range(20, 25)] + [
+        "-- rows 21-25 of 25"
+    ]
+    assert formatter.pages == 2
+
+
+def test_scan_and_distinct_limits():
+    """Test that huge results stop scanning and report lower bounds."""
+    from src.results import ResultFormatter
+
+    text = ResultFormatter(page_rows=2, max_scan_rows=100, max_distinct=10).format(["n"], ((i,) for i in range(1000)))
+
+    assert "-- rows 1-2 of at least 100" in text
+    assert "distinct=10+" in text
+    assert "page=2" in text
+
+
+def test_parse_table_shape():
+    """Test that the shape of the page is read back from a compact table."""
+    from src.results import ResultFormatter, parse_table
+
+    assert parse_table("a|b\\|c\n1|x") == (1, 2)
+    assert parse_table(ResultFormatter(page_rows=2).format(["n", "m"], [(i, i) for i in range(5)])) == (2, 2)
+    assert parse_table("Error: no such table") is None
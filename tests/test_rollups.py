@@ -0,0 +1,122 @@
+"""Tests for rollups module."""
+
+import sqlite3
+
+
+def test_refresh_builds_product_only_rollups(temp_db):
+    """Test that the rollups hold the product-only totals and a second refresh is a no-op."""
+    from src.rollups import ROLLUPS, refresh_rollups, rollups_current
+
+    assert not rollups_current(temp_db)
+    assert refresh_rollups(temp_db) == {name: "built" for name in ROLLUPS}
+    assert rollups_current(temp_db)
+    assert refresh_rollups(temp_db) == {}
+
+    conn = sqlite3.connect(temp_db)
+    try:
+        assert conn.execute("SELECT * FROM rollup_month").fetchall() == [("2024-01", 95.0, 8, 2, 2)]
+        assert conn.execute("SELECT Country, revenue FROM rollup_country_month ORDER BY Country").fetchall() == [
+            ("UK", 45.0),
+            ("USA", 50.0),
+        ]
+        assert conn.execute("SELECT * FROM rollup_customer WHERE CustomerID = 1001").fetchall() == [
+            (1001, "USA", 50.0, 5, 1, 1, "2024-01-01", "2024-01-01")
+        ]
+    finally:
+        conn.close()
+
+
+def test_refresh_folds_in_appended_rows(temp_db):
+    """Test that appended transactions are merged into the stored totals without a rebuild."""
+    from src.rollups import ROLLUPS, refresh_rollups, rollups_current
+
+    refresh_rollups(temp_db)
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute(
+            "INSERT INTO transactions VALUES ('126', 'A001', 'Test Product', 2, '2024-02-01', 10.0, 1001, 'USA')"
+        )
+        conn.execute("INSERT INTO transactions VALUES ('127', 'POST', 'POSTAGE', 1, '2024-02-01', 40.0, 1001, 'USA')")
+    conn.close()
+
+    assert not rollups_current(temp_db)
+    assert refresh_rollups(temp_db) == {name: "refreshed" for name in ROLLUPS}
+
+    conn = sqlite3.connect(temp_db)
+    try:
+        assert conn.execute("SELECT month, revenue FROM rollup_month ORDER BY month").fetchall() == [
+            ("2024-01", 95.0),
+            ("2024-02", 20.0),
+        ]
+        assert conn.execute(
+            "SELECT revenue, invoices, first_purchase, last_purchase FROM rollup_customer WHERE CustomerID = 1001"
+        ).fetchone() == (70.0, 2, "2024-01-01", "2024-02-01")
+    finally:
+        conn.close()
+
+
+def test_refresh_rebuilds_after_deletes(temp_db):
+    """Test that rollups are rebuilt when rows they absorbed were deleted."""
+    from src.rollups import ROLLUPS, refresh_rollups
+
+    refresh_rollups(temp_db)
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("DELETE FROM transactions WHERE InvoiceNo = '123'")
+        conn.execute(
+            "INSERT INTO transactions VALUES ('126', 'A002', 'Another Product', 1, '2024-02-01', 15.0, 1002, 'UK')"
+        )
+    conn.close()
+
+    assert refresh_rollups(temp_db) == {name: "built" for name in ROLLUPS}
+
+    conn = sqlite3.connect(temp_db)
+    try:
+        assert conn.execute("SELECT SUM(revenue) FROM rollup_month").fetchone() == (60.0,)
+    finally:
+        conn.close()
+
+
+def test_rollup_state_is_hidden_from_schema(temp_db):
+    """Test that the rollups are listed for the agent but their bookkeeping table is not."""
+    from src.rollups import refresh_rollups
+    from src.schema import list_tables
+
+    refresh_rollups(temp_db)
+    conn = sqlite3.connect(temp_db)
+    try:
+        assert list_tables(conn) == [
+            "rollup_country_month",
+            "rollup_customer",
+            "rollup_month",
+            "rollup_product_month",
+            "transactions",
+        ]
+    finally:
+        conn.close()
+
+
+def test_deletes_and_updates_of_absorbed_rows_invalidate_rollups(temp_db):
+    """Test that changing rows below the watermark stops templates using the rollups until a rebuild."""
+    from src.rollups import ROLLUPS, refresh_rollups, rollups_current
+    from src.templates import TemplateMatcher
+
+    refresh_rollups(temp_db)
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("DELETE FROM transactions WHERE InvoiceNo = '124'")
+        conn.execute("UPDATE transactions SET Quantity = 20 WHERE InvoiceNo = '123'")
+    conn.close()
+
+    assert not rollups_current(temp_db)
+    matcher = TemplateMatcher(temp_db, use_sales=False)
+    assert "200.00" in matcher.answer("total revenue")["output"]
+    assert matcher.rollup_hits == 0
+
+    assert refresh_rollups(temp_db) == {name: "built" for name in ROLLUPS}
+    assert rollups_current(temp_db)
+    conn = sqlite3.connect(temp_db)
+    try:
+        assert conn.execute("SELECT SUM(revenue) FROM rollup_month").fetchone() == (200.0,)
+    finally:
+        conn.close()
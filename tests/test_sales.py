@@ -0,0 +1,62 @@
+"""Tests for sales module."""
+
+import sqlite3
+
+
+def test_ensure_sales_table_keeps_product_rows(temp_db):
+    """Test that only product rows are copied, with revenue and month precomputed."""
+    from src.sales import ensure_sales_table, sales_state
+
+    assert sales_state(temp_db) == "missing"
+    assert ensure_sales_table(temp_db) == "missing"
+    assert sales_state(temp_db) == "ok"
+    assert ensure_sales_table(temp_db) is None
+
+    conn = sqlite3.connect(temp_db)
+    try:
+        rows = conn.execute("SELECT TransactionID, StockCode, revenue, InvoiceMonth FROM sales ORDER BY 1").fetchall()
+        assert rows == [(1, "A001", 50.0, "2024-01"), (2, "A002", 45.0, "2024-01")]
+    finally:
+        conn.close()
+
+
+def test_triggers_mirror_transaction_changes(temp_db):
+    """Test that inserts, updates and deletes of transactions are reflected in sales."""
+    from src.sales import ensure_sales_table
+
+    ensure_sales_table(temp_db)
+    conn = sqlite3.connect(temp_db)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO transactions VALUES ('126', 'A003', 'New Product', 2, '2024-02-01', 4.0, 1004, 'UK')"
+            )
+            conn.execute(
+                "INSERT INTO transactions VALUES ('127', 'POST', 'POSTAGE', 1, '2024-02-01', 40.0, 1004, 'UK')"
+            )
+            conn.execute("UPDATE transactions SET UnitPrice = 0 WHERE InvoiceNo = '124'")
+            conn.execute("UPDATE transactions SET Quantity = 10 WHERE InvoiceNo = '123'")
+        assert conn.execute("SELECT InvoiceNo, revenue FROM sales ORDER BY InvoiceNo").fetchall() == [
+            ("123", 100.0),
+            ("126", 8.0),
+        ]
+        with conn:
+            conn.execute("DELETE FROM transactions WHERE InvoiceNo = '126'")
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone() == (1,)
+    finally:
+        conn.close()
+
+
+def test_stale_definition_is_rebuilt(temp_db):
+    """Test that a sales table built with other definitions is reported stale and rebuilt."""
+    from src.sales import ensure_sales_table, sales_state
+
+    ensure_sales_table(temp_db)
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("DROP INDEX idx_sales_country")
+    conn.close()
+
+    assert sales_state(temp_db) == "stale"
+    assert ensure_sales_table(temp_db) == "stale"
+    assert sales_state(temp_db) == "ok"
@@ -0,0 +1,54 @@
+"""Tests for schema module."""
+
+import sqlite3
+
+
+def test_build_table_info_includes_schema_and_samples(temp_db):
+    """Test that table info contains the CREATE statement and sample rows."""
+    from src.schema import build_table_info
+
+    conn = sqlite3.connect(temp_db)
+    info = build_table_info(conn)
+    conn.close()
+
+    assert "CREATE TABLE transactions" in info
+    assert "3 rows from transactions table:" in info
+    assert "Test Product" in info
+
+
+def test_schema_fingerprint_changes_with_schema(temp_db):
+    """Test that the fingerprint tracks schema changes but not data changes."""
+    from src.schema import schema_fingerprint
+
+    conn = sqlite3.connect(temp_db)
+    before = schema_fingerprint(conn)
+    conn.execute("INSERT INTO transactions VALUES ('126', 'A003', 'New', 1, '2024-01-04', 1.0, 1004.0, 'UK')")
+    conn.commit()
+    assert schema_fingerprint(conn) == before
+
+    conn.execute("CREATE INDEX idx_country ON transactions (Country)")
+    assert schema_fingerprint(conn) != before
+    conn.close()
+
+
+def test_load_schema_info_uses_disk_cache(temp_db, tmp_path):
+    """Test that the schema is introspected once and then read from disk."""
+    from src.schema import load_schema_info
+
+    first = load_schema_info(temp_db, str(tmp_path))
+    assert first["table_names"] == "transactions"
+    cache_files = list(tmp_path.glob("schema-*.txt"))
+    assert len(cache_files) == 1
+
+    cache_files[0].write_text("cached description", encoding="utf-8")
+    second = load_schema_info(temp_db, str(tmp_path))
+    assert second["table_info"] == "cached description"
+
+
+def test_load_schema_info_missing_database(tmp_path):
+    """Test that a missing database yields no schema and is not created."""
+    from src.schema import load_schema_info
+
+    db_path = tmp_path / "missing.db"
+    assert load_schema_info(str(db_path), str(tmp_path)) is None
+    assert not db_path.exists()
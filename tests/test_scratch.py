@@ -0,0 +1,138 @@
+"""Tests for scratch module."""
+
+import sqlite3
+
+import pytest
+
+
+def test_results_are_saved_per_session_and_read_only():
+    """Test that each session queries its own last result and cannot modify it."""
+    from src.scratch import ScratchResults
+
+    results = ScratchResults()
+    assert results.save("a", "SELECT 1", ["Country", "revenue"], [("UK", 45.0), ("USA", 50.0)])
+    assert results.save("b", "SELECT 2", ["Country", "Country"], [("FR", "DE")])
+
+    def rows(columns, cursor):
+        return repr([tuple(columns)] + list(cursor))
+
+    assert results.query("a", "SELECT Country FROM last_result WHERE revenue > 46", rows) == "[('Country',), ('USA',)]"
+    assert results.query("b", "SELECT * FROM last_result", rows) == "[('Country', 'Country_2'), ('FR', 'DE')]"
+    assert results.query("c", "SELECT * FROM last_result", rows) is None
+    assert '"Country", "revenue"' in results.describe("a") and "SELECT 1" in results.describe("a")
+    with pytest.raises(sqlite3.OperationalError):
+        results.query("a", "DELETE FROM last_result", rows)
+
+    assert not results.save("a", "SELECT 3", ["Country"], [])
+    assert results.describe("a") is None
+
+
+def test_results_are_evicted_by_memory_and_age(monkeypatch):
+    """Test that the least recently used results go past the budget and old ones expire."""
+    from src import scratch
+    from src.scratch import ScratchResults
+
+    rows = [(i, "x" * 100) for i in range(200)]
+    probe = ScratchResults()
+    probe.save("probe", "SELECT 1", ["n", "s"], rows)
+    size = probe.bytes
+
+    results = ScratchResults(max_bytes=2 * size + size // 2, ttl=60)
+    for session_id in ("a", "b"):
+        results.save(session_id, "SELECT 1", ["n", "s"], rows)
+    results.source("a")
+    results.save("c", "SELECT 1", ["n", "s"], rows)
+    assert results.source("b") is None and results.source("a") and results.source("c")
+    assert results.bytes <= results.max_bytes and results.evictions == 1
+
+    now = scratch.time.monotonic()
+    monkeypatch.setattr(scratch.time, "monotonic", lambda: now + 61)
+    assert len(results) == 0 and results.bytes == 0
+
+
+def test_capture_is_complete_only_for_fully_read_small_results():
+    """Test that results read partially or over the row limit are not captured."""
+    from src.scratch import ResultCapture
+
+    capture = ResultCapture(max_rows=3)
+    assert list(capture.tee(["n"], [(1,), (2,)])) == [(1,), (2,)]
+    assert capture.complete and capture.rows == [(1,), (2,)]
+
+    capture = ResultCapture(max_rows=3)
+    assert len(list(capture.tee(["n"], [(i,) for i in range(5)]))) == 5
+    assert not capture.complete and capture.rows == []
+
+    capture = ResultCapture(max_rows=3)
+    next(iter(capture.tee(["n"], [(1,), (2,)])))
+    assert not capture.complete
+
+
+def test_follow_up_refines_the_last_result(temp_db):
+    """Test that a follow-up question queries the previous turn's result described in the history."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from src.agent import setup_agent
+    from src.fake_llm import ScriptedChatModel
+    from src.memory import clear_memory, get_session_results
+
+    first = "Revenue by country?"
+    second = "Which of those countries made more than 40?"
+    sql = "SELECT Country, SUM(Quantity * UnitPrice) AS revenue FROM transactions GROUP BY Country"
+    refine = "SELECT Country FROM last_result WHERE revenue > 40 ORDER BY Country"
+    llm = ScriptedChatModel(
+        scripts={
+            first: [{"sql": sql}, {"answer": "USA 45, UK 45"}],
+            second: [{"tool": "sql_db_query_last_result", "args": {"query": refine}}, {"answer": "Both"}],
+        }
+    )
+    agent = setup_agent(llm=llm, use_cache=False, use_templates=False, db_path=temp_db, query_plan_log="")
+
+    prompts, outputs = [], []
+
+    class Spy(BaseCallbackHandler):
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            prompts.append(messages[0])
+
+        def on_tool_end(self, output, **kwargs):
+            outputs.append(output)
+
+    for question in (first, second):
+        agent.invoke({"input": question}, config={"configurable": {"session_id": "scratch"}, "callbacks": [Spy()]})
+
+    assert get_session_results().source("scratch") == sql
+    assert any(sql in str(m.content) for m in prompts[-1] if m.type == "system")
+    assert outputs[-1] == "Country\nUK\nUSA"
+    clear_memory("scratch")
+    assert get_session_results().source("scratch") is None
+
+
+def test_template_answer_drops_the_last_result(temp_db):
+    """Test that a template turn drops the saved result so follow-ups do not refine an older answer."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from src.agent import setup_agent
+    from src.fake_llm import ScriptedChatModel
+    from src.memory import clear_memory, get_session_results
+
+    sql = "SELECT Country, SUM(Quantity * UnitPrice) AS revenue FROM transactions GROUP BY Country"
+    llm = ScriptedChatModel(
+        scripts={"Revenue by country?": [{"sql": sql}, {"answer": "USA 45, UK 45"}]}, default_answer="ok"
+    )
+    agent = setup_agent(llm=llm, use_cache=False, db_path=temp_db, query_plan_log="")
+    config = {"configurable": {"session_id": "scratch_template"}}
+
+    prompts = []
+
+    class Spy(BaseCallbackHandler):
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            prompts.append(messages[0])
+
+    agent.invoke({"input": "Revenue by country?"}, config=config)
+    assert get_session_results().source("scratch_template") == sql
+
+    assert agent.invoke({"input": "Total revenue"}, config=config)["output"] == "Total revenue was 95.00."
+    assert get_session_results().source("scratch_template") is None
+
+    agent.invoke({"input": "And the top 3 of them?"}, config={**config, "callbacks": [Spy()]})
+    assert not any("last_result" in str(m.content) for m in prompts[0] if m.type == "system")
+    clear_memory("scratch_template")
@@ -0,0 +1,138 @@
+"""Tests for server module."""
+
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+
+class FakeAsyncAgent:
+    """Agent stand-in that answers after a delay and tracks concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.order = []
+
+    async def ainvoke(self, inputs, config=None):
+        session_id = config["configurable"]["session_id"]
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.order.append((session_id, inputs["input"]))
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return {"output": f"answer to {inputs['input']}"}
+
+    async def astream_events(self, inputs, config=None, **kwargs):
+        yield {"event": "on_tool_start", "name": "sql_db_query", "parent_ids": ["root"], "data": {}}
+        yield {"event": "on_tool_end", "name": "sql_db_query", "parent_ids": ["root"], "data": {"output": "[(1,)]"}}
+        yield {"event": "on_chain_end", "name": "agent", "parent_ids": [], "data": {"output": {"output": "done"}}}
+
+
+def run_with_client(app, scenario):
+    """Run an async scenario against the app with a test client."""
+
+    async def runner():
+        async with TestClient(TestServer(app)) as client:
+            return await scenario(client)
+
+    return asyncio.run(runner())
+
+
+def test_chat_endpoint_answers_question():
+    """Test that POST /chat returns the agent's answer for the session."""
+    from src.server import create_app
+
+    async def scenario(client):
+        response = await client.post("/chat", json={"question": "Revenue?", "session_id": "s1"})
+        return response.status, await response.json()
+
+    status, body = run_with_client(create_app(FakeAsyncAgent()), scenario)
+
+    assert status == 200
+    assert body["answer"] == "answer to Revenue?"
+    assert body["session_id"] == "s1"
+    assert body["elapsed"] >= 0
+
+
+def test_chat_endpoint_rejects_bad_requests():
+    """Test that malformed requests get a 400 response."""
+    from src.server import create_app
+
+    async def scenario(client):
+        missing = await client.post("/chat", json={"session_id": "s1"})
+        empty = await client.post("/chat", json={"question": "  "})
+        return missing.status, empty.status
+
+    assert run_with_client(create_app(FakeAsyncAgent()), scenario) == (400, 400)
+
+
+def test_sessions_run_concurrently():
+    """Test that different sessions are served concurrently."""
+    from src.server import create_app
+
+    agent = FakeAsyncAgent()
+
+    async def scenario(client):
+        requests = [client.post("/chat", json={"question": "q", "session_id": f"s{i}"}) for i in range(20)]
+        responses = await asyncio.gather(*requests)
+        return [r.status for r in responses]
+
+    statuses = run_with_client(create_app(agent), scenario)
+
+    assert statuses == [200] * 20
+    assert agent.peak == 20
+
+
+def test_concurrency_bounded_and_same_session_serialized():
+    """Test the global turn bound and that one session's turns never overlap."""
+    from src.server import create_app
+
+    agent = FakeAsyncAgent()
+
+    async def scenario(client):
+        requests = [client.post("/chat", json={"question": f"q{i}", "session_id": "same"}) for i in range(3)]
+        requests += [client.post("/chat", json={"question": "q", "session_id": f"s{i}"}) for i in range(6)]
+        await asyncio.gather(*requests)
+        health = await client.get("/health")
+        return await health.json()
+
+    health = run_with_client(create_app(agent, max_concurrent_turns=4), scenario)
+
+    assert agent.peak == 4
+    assert health["completed"] == 9
+    assert health["active_sessions"] == 0
+
+
+def test_websocket_streams_progress():
+    """Test that the WebSocket endpoint streams tool progress and the answer."""
+    from src.server import create_app
+
+    async def scenario(client):
+        async with client.ws_connect("/ws") as ws:
+            await ws.send_json({"question": "Revenue?", "session_id": "ws1"})
+            messages = []
+            while not messages or messages[-1]["type"] != "answer":
+                messages.append(await ws.receive_json())
+            return messages
+
+    messages = run_with_client(create_app(FakeAsyncAgent()), scenario)
+
+    assert [m["type"] for m in messages] == ["tool_start", "tool_end", "answer"]
+    assert messages[1]["rows"] == 1
+    assert messages[-1]["answer"] == "done"
+
+
+def test_delete_session_clears_memory():
+    """Test that DELETE /sessions/{id} forgets the session history."""
+    from src.memory import get_session_history
+    from src.server import create_app
+
+    get_session_history("to_delete").add_user_message("hello")
+
+    async def scenario(client):
+        response = await client.delete("/sessions/to_delete")
+        return response.status
+
+    assert run_with_client(create_app(FakeAsyncAgent()), scenario) == 200
+    assert get_session_history("to_delete").messages == []
@@ -0,0 +1,126 @@
+"""Tests for session_store module."""
+
+import sqlite3
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+def count_rows(db_path, table):
+    """Count the rows of a table in the store's database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_store_evicts_least_recently_used_sessions():
+    """Test that only max_sessions sessions stay in memory, oldest evicted first."""
+    from src.session_store import SessionStore
+
+    store = SessionStore(max_sessions=2)
+    store.get("a").add_user_message("hello")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    assert len(store) == 2
+    assert store.evictions == 1
+    # Without persistence an evicted session starts over
+    assert store.get("b").messages == []
+    assert store.get("a").messages == []
+
+
+def test_store_enforces_byte_budget():
+    """Test that sessions are evicted when the byte budget is exceeded."""
+    from src.session_store import SessionStore
+
+    store = SessionStore(max_bytes=2000)
+    for session_id in ("a", "b", "c"):
+        store.get(session_id).add_user_message("x" * 600)
+
+    assert store.bytes <= 2000
+    assert store.evictions >= 1
+    assert len(store.get("c").messages) == 1
+
+
+def test_store_pages_evicted_sessions_back_in(tmp_path):
+    """Test that persisted sessions are loaded lazily after eviction."""
+    from src.session_store import SessionStore
+
+    store = SessionStore(str(tmp_path / "sessions.db"), max_sessions=1)
+    history = store.get("a")
+    history.add_user_message("Top country?")
+    history.add_ai_message("United Kingdom")
+    history.update_summary("asked about revenue", 0)
+    store.get("b")
+
+    reloaded = store.get("a")
+
+    assert reloaded is not history
+    assert [m.content for m in reloaded.messages] == ["Top country?", "United Kingdom"]
+    assert isinstance(reloaded.messages[0], HumanMessage) and isinstance(reloaded.messages[1], AIMessage)
+    assert reloaded.summary == "asked about revenue"
+    assert store.loads == 1
+    store.close()
+
+
+def test_store_survives_restart(tmp_path):
+    """Test that sessions written by one store are read by the next one."""
+    from src.session_store import SessionStore
+
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path)
+    store.get("a").add_user_message("Revenue in 2011?")
+    store.close()
+
+    assert [m.content for m in SessionStore(db_path).get("a").messages] == ["Revenue in 2011?"]
+
+
+def test_store_batches_writes(tmp_path):
+    """Test that changes are queued and written together."""
+    from src.session_store import SessionStore
+
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path, flush_interval=60, flush_batch=3)
+    history = store.get("a")
+    history.add_user_message("one")
+    history.add_ai_message("two")
+    assert count_rows(db_path, "messages") == 0
+
+    history.add_user_message("three")
+    assert count_rows(db_path, "messages") == 3
+    store.close()
+
+
+def test_store_flushes_after_interval(tmp_path):
+    """Test that queued changes are written after flush_interval seconds."""
+    from src.session_store import SessionStore
+
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path, flush_interval=0.05)
+    store.get("a").add_user_message("hello")
+
+    deadline = time.monotonic() + 2
+    while count_rows(db_path, "messages") == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert count_rows(db_path, "messages") == 1
+    store.close()
+
+
+def test_store_delete_forgets_session_on_disk(tmp_path):
+    """Test that delete() removes a session from memory and disk."""
+    from src.session_store import SessionStore
+
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path)
+    store.get("a").add_user_message("hello")
+    store.delete("a")
+    store.flush()
+
+    assert count_rows(db_path, "sessions") == 0
+    assert count_rows(db_path, "messages") == 0
+    assert store.get("a").messages == []
+    store.close()
@@ -0,0 +1,145 @@
+"""Tests for snapshot module."""
+
+import sqlite3
+
+import pytest
+
+
+def test_snapshot_copies_database_with_progress(temp_db):
+    """Test that the database is copied into memory, reporting progress up to its size."""
+    from src.snapshot import MemorySnapshot, database_size
+
+    reports = []
+    snapshot = MemorySnapshot(temp_db, lambda copied, total: reports.append((copied, total)))
+    snapshot.load()
+
+    size = database_size(temp_db)
+    assert reports[0] == (0, size) and reports[-1] == (size, size)
+    conn = snapshot.connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone() == (3,)
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM transactions")
+    finally:
+        conn.close()
+        snapshot.close()
+
+
+def test_snapshot_reloads_when_file_changes(temp_db):
+    """Test that connections opened after a change read a fresh copy."""
+    from src.snapshot import MemorySnapshot
+
+    snapshot = MemorySnapshot(temp_db)
+    old = snapshot.connect()
+
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("INSERT INTO transactions VALUES ('126', 'A003', 'New', 1, '2024-02-01', 5.0, 1004.0, 'UK')")
+    conn.close()
+
+    new = snapshot.connect()
+    try:
+        assert new.execute("SELECT COUNT(*) FROM transactions").fetchone() == (4,)
+        assert old.execute("SELECT COUNT(*) FROM transactions").fetchone() == (3,)
+        assert snapshot.loads == 2
+    finally:
+        old.close()
+        new.close()
+        snapshot.close()
+
+
+def test_agent_queries_run_against_snapshot(temp_db):
+    """Test that SQLDatabase queries go through the in-memory copy rather than the file."""
+    from langchain_community.utilities import SQLDatabase
+
+    from src.snapshot import MemorySnapshot
+
+    snapshot = MemorySnapshot(temp_db)
+    db = SQLDatabase.from_uri(f"sqlite:///{temp_db}", engine_args=snapshot.engine_args())
+    assert db.run("SELECT COUNT(*) FROM transactions") == "[(3,)]"
+    assert snapshot.loads == 1
+
+    # The next query after a change to the file reloads the copy
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("DELETE FROM transactions")
+    conn.close()
+    assert db.run("SELECT COUNT(*) FROM transactions") == "[(0,)]"
+    assert snapshot.loads == 2
+    snapshot.close()
+
+
+def test_setup_agent_answers_templates_from_snapshot(temp_db):
+    """Test that --in-memory template answers read the snapshot, which is released with the agent."""
+    import gc
+
+    from src.agent import setup_agent
+    from src.fake_llm import ScriptedChatModel
+    from src.snapshot import MemorySnapshot
+
+    agent = setup_agent(
+        llm=ScriptedChatModel(), use_cache=False, use_memory=False, db_path=temp_db, query_plan_log="", in_memory=True
+    )
+    snapshot = agent.matcher.connect.__self__
+
+    assert isinstance(snapshot, MemorySnapshot)
+    assert agent.invoke({"input": "Total revenue"})["output"] == "Total revenue was 95.00."
+    assert snapshot.loads == 1
+
+    del agent
+    gc.collect()
+    assert snapshot._keeper is None
+
+
+def test_in_memory_agent_keeps_answering_without_the_file(temp_db, tmp_path):
+    """Test that every tool of an --in-memory agent reads the copy, even once the file is gone."""
+    import os
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from src.agent import setup_agent
+    from src.fake_llm import ScriptedChatModel
+    from src.products import ensure_product_search
+
+    ensure_product_search(temp_db)
+    question = "How many Test Products were sold?"
+    sql = "SELECT SUM(Quantity) FROM transactions WHERE StockCode IN ('A001')"
+    llm = ScriptedChatModel(
+        scripts={
+            question: [
+                {"tool": "product_lookup", "args": {"query": "test product"}},
+                {"tool": "transactions_aggregate", "args": {"metrics": ["quantity"]}},
+                {"sql": sql},
+                {"answer": "5"},
+            ]
+        }
+    )
+    agent = setup_agent(
+        llm=llm,
+        use_cache=False,
+        use_memory=False,
+        use_templates=False,
+        db_path=temp_db,
+        query_plan_log=str(tmp_path / "plans.jsonl"),
+        in_memory=True,
+        columnar=True,
+        product_lookup=True,
+    )
+
+    outputs = []
+
+    class Spy(BaseCallbackHandler):
+        def on_tool_end(self, output, **kwargs):
+            outputs.append(str(getattr(output, "content", output)))
+
+    moved = str(tmp_path / "moved.db")
+    os.replace(temp_db, moved)
+    try:
+        agent.invoke({"input": question}, config={"callbacks": [Spy()]})
+    finally:
+        os.replace(moved, temp_db)
+
+    assert outputs[0] == "StockCode|Description\nA001|Test Product"
+    assert "8" in outputs[1]
+    assert "5" in outputs[2] and "Error" not in outputs[2]
+    assert len((tmp_path / "plans.jsonl").read_text().splitlines()) == 1
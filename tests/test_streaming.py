@@ -0,0 +1,215 @@
+"""Tests for streaming module."""
+
+from io import StringIO
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+class FakeStreamingAgent:
+    """Agent stand-in that replays a fixed list of stream events."""
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    async def astream_events(self, inputs, config=None, **kwargs):
+        self.calls.append((inputs, config, kwargs))
+        for event in self.events:
+            yield event
+
+
+def make_events(answer_tokens, sql_output="[('Lantern', 10), ('Mug', 5)]"):
+    """Build the event sequence of a turn that runs one SQL query."""
+    return (
+        [
+            {"event": "on_tool_start", "name": "sql_db_query", "parent_ids": ["root"], "data": {}},
+            {"event": "on_tool_end", "name": "sql_db_query", "parent_ids": ["root"], "data": {"output": sql_output}},
+        ]
+        + [
+            {
+                "event": "on_chat_model_stream",
+                "name": "llm",
+                "run_id": "answer",
+                "parent_ids": ["root"],
+                "data": {"chunk": AIMessageChunk(t)},
+            }
+            for t in answer_tokens
+        ]
+        + [
+            {
+                "event": "on_chat_model_end",
+                "name": "llm",
+                "run_id": "answer",
+                "parent_ids": ["root"],
+                "data": {"output": AIMessage("".join(answer_tokens))},
+            }
+        ]
+        + [
+            {
+                "event": "on_chain_end",
+                "name": "agent",
+                "parent_ids": [],
+                "data": {"output": {"output": "".join(answer_tokens)}},
+            }
+        ]
+    )
+
+
+def test_count_rows():
+    """Test row counting on query tool outputs."""
+    from src.streaming import count_rows
+
+    assert count_rows("[('a', 1), ('b', 2)]") == 2
+    assert count_rows("") == 0
+    assert count_rows("Error: no such table") is None
+    assert count_rows("Country|revenue\nUSA|50\nUK|45") == 2
+
+
+def test_stream_answer_prints_steps_and_tokens():
+    """Test that tool steps and answer tokens are printed as they arrive."""
+    from src.streaming import stream_answer
+
+    agent = FakeStreamingAgent(make_events(["Lantern ", "sold ", "most."]))
+    out = StringIO()
+
+    response = stream_answer(agent, "Top product?", "s1", out=out)
+
+    assert response["output"] == "Lantern sold most."
+    text = out.getvalue()
+    assert "running SQL" in text
+    assert "2 rows" in text
+    assert text.index("2 rows") < text.index("💡 Answer: Lantern sold most.")
+
+    inputs, config, kwargs = agent.calls[0]
+    assert inputs == {"input": "Top product?"}
+    assert config == {"configurable": {"session_id": "s1"}}
+    assert kwargs["version"] == "v2"
+
+
+def test_stream_answer_prints_unstreamed_answers_whole():
+    """Test that answers without token events (e.g. cache hits) are still printed."""
+    from src.streaming import stream_answer
+
+    events = [{"event": "on_chain_end", "name": "agent", "parent_ids": [], "data": {"output": {"output": "$100"}}}]
+    out = StringIO()
+
+    response = stream_answer(FakeStreamingAgent(events), "Revenue?", out=out)
+
+    assert response["output"] == "$100"
+    assert "💡 Answer: $100" in out.getvalue()
+
+
+def test_cached_agent_streams_and_caches():
+    """Test that a streamed answer is cached and replayed on the next identical question."""
+    from src.cache import AnswerCache, CachedAgent
+    from src.streaming import stream_answer
+
+    inner = FakeStreamingAgent(make_events(["Lantern"]))
+    agent = CachedAgent(inner, AnswerCache())
+
+    stream_answer(agent, "Top product?", out=StringIO())
+    out = StringIO()
+    response = stream_answer(agent, "Top product?", out=out)
+
+    assert len(inner.calls) == 1
+    assert response["cached"] is True
+    assert "💡 Answer: Lantern" in out.getvalue()
+
+
+def test_stream_answer_skips_history_summary_tokens():
+    """Test that tokens of the history summarizer are not printed as the answer."""
+    from src.config import SUMMARY_TAG
+    from src.streaming import stream_answer
+
+    summary = {
+        "event": "on_chat_model_stream",
+        "name": "llm",
+        "parent_ids": ["root"],
+        "tags": [SUMMARY_TAG],
+        "data": {"chunk": AIMessageChunk("Summary: mugs. ")},
+    }
+    out = StringIO()
+
+    stream_answer(FakeStreamingAgent([summary] + make_events(["Lantern"])), "Top product?", out=out)
+
+    assert "Summary" not in out.getvalue()
+    assert "💡 Answer: Lantern" in out.getvalue()
+
+
+def test_tokens_are_yielded_before_the_model_call_ends():
+    """Test that answer tokens are yielded as they stream, not when the model call finishes."""
+    import asyncio
+
+    from src.streaming import aiter_turn
+
+    agent = FakeStreamingAgent(make_events(["Lantern ", "sold ", "most."]))
+    replayed = []
+
+    async def astream_events(inputs, config=None, **kwargs):
+        for event in agent.events:
+            replayed.append(event["event"])
+            yield event
+
+    agent.astream_events = astream_events
+
+    async def first_token():
+        async for event in aiter_turn(agent, "Top product?"):
+            if event[0] == "token":
+                return event[1], list(replayed)
+
+    token, seen = asyncio.run(first_token())
+    assert token == "Lantern "
+    assert "on_chat_model_end" not in seen
+
+
+def test_stream_answer_skips_tool_calling_text():
+    """Test that a model call's text stops streaming once it turns into tool calls."""
+    import asyncio
+
+    from src.streaming import aiter_turn, stream_answer
+
+    def chunk(content, tool_call=False):
+        tool_call_chunks = [{"name": "sql_db_query", "args": "", "id": "1", "index": 0}] if tool_call else []
+        return {
+            "event": "on_chat_model_stream",
+            "run_id": "step",
+            "data": {"chunk": AIMessageChunk(content, tool_call_chunks=tool_call_chunks)},
+        }
+
+    step = AIMessage("Let me check. ", tool_calls=[{"name": "sql_db_query", "args": {}, "id": "1"}])
+    events = [
+        chunk("Let me check. "),
+        chunk("", tool_call=True),
+        chunk("SELECT", tool_call=True),
+        {"event": "on_chat_model_end", "run_id": "step", "data": {"output": step}},
+    ] + make_events(["Lantern"])
+
+    async def collect():
+        return [event async for event in aiter_turn(FakeStreamingAgent(events), "Top product?")]
+
+    kinds = [event[:2] for event in asyncio.run(collect())]
+    assert kinds[:3] == [("token", "Let me check. "), ("intermediate",), ("tool_start", "sql_db_query")]
+    assert ("token", "SELECT") not in kinds and ("token", "Lantern") in kinds
+
+    out = StringIO()
+    response = stream_answer(FakeStreamingAgent(events), "Top product?", out=out)
+    assert response["output"] == "Lantern"
+    assert out.getvalue().rstrip().endswith("\n💡 Answer: Lantern")
+
+
+def test_stream_answer_marks_steps_with_tool_calls_only_at_the_end():
+    """Test that a call reporting its tool calls only in the final message is marked intermediate."""
+    import asyncio
+
+    from src.streaming import aiter_turn
+
+    step = AIMessage("Checking. ", tool_calls=[{"name": "sql_db_query", "args": {}, "id": "1"}])
+    events = [
+        {"event": "on_chat_model_stream", "run_id": "step", "data": {"chunk": AIMessageChunk(step.content)}},
+        {"event": "on_chat_model_end", "run_id": "step", "data": {"output": step}},
+    ] + make_events(["Lantern"])
+
+    async def collect():
+        return [event async for event in aiter_turn(FakeStreamingAgent(events), "Top product?")]
+
+    assert [event[:2] for event in asyncio.run(collect())][:2] == [("token", "Checking. "), ("intermediate",)]
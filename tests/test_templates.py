@@ -0,0 +1,169 @@
+"""Tests for templates module."""
+
+import sqlite3
+from unittest.mock import Mock
+
+
+def test_matcher_recognizes_templates(temp_db):
+    """Test that template questions are parsed into parameters and other questions are not."""
+    from src.templates import TemplateMatcher
+
+    matcher = TemplateMatcher(temp_db)
+
+    assert matcher.match("What are the top five products by revenue in the USA?") == (
+        "top_products",
+        {"country": "USA", "n": 5, "metric": "revenue"},
+    )
+    assert matcher.match("Top 10 best-selling products by units sold in UK for 2024") == (
+        "top_products",
+        {"country": "UK", "year": 2024, "n": 10, "metric": "quantity"},
+    )
+    assert matcher.match("Monthly revenue for 2024") == ("monthly_revenue", {"year": 2024})
+    assert matcher.match("How many customers are there in usa?") == ("customer_count", {"country": "USA"})
+    assert matcher.match("Total revenue") == ("total_revenue", {})
+
+    assert matcher.match("How many customers bought heart products?") is None
+    assert matcher.match("Top 5 products by revenue in Narnia") is None
+    assert matcher.match("And what about those countries?") is None
+
+
+def test_matcher_answers_with_product_filters(temp_db):
+    """Test that answers come from vetted SQL that excludes non-product rows."""
+    from src.templates import TemplateMatcher
+
+    matcher = TemplateMatcher(temp_db)
+
+    top = matcher.answer("Top 3 products by revenue")
+    assert top["template"] == "top_products"
+    assert top["output"].splitlines() == [
+        "Top 2 products by revenue:",
+        "1. Test Product: 50.00",
+        "2. Another Product: 45.00",
+    ]
+    assert matcher.answer("How many customers in USA?")["output"] == "There are 1 customers with purchases in USA."
+    assert matcher.answer("Monthly revenue in 2024")["output"].splitlines()[1] == "2024-01: 95.00"
+    assert matcher.answer("Which product sells best?") is None
+
+
+def test_matcher_refreshes_answers_when_database_changes(temp_db):
+    """Test that memoized answers are recomputed after the data changes."""
+    from src.templates import TemplateMatcher
+
+    matcher = TemplateMatcher(temp_db)
+    assert matcher.answer("Total revenue")["output"] == "Total revenue was 95.00."
+
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute("INSERT INTO transactions VALUES ('126', 'A003', 'New', 1, '2024-02-01', 5.0, 1004.0, 'UK')")
+    conn.close()
+
+    assert matcher.answer("Total revenue")["output"] == "Total revenue was 100.00."
+
+
+def test_template_agent_bypasses_agent_and_records_history(temp_db):
+    """Test that matched questions skip the agent but still land in the session history."""
+    from src.session_store import SessionHistory
+    from src.templates import TemplateAgent, TemplateMatcher
+
+    agent = Mock()
+    agent.invoke.return_value = {"output": "from the agent"}
+    history = SessionHistory()
+    wrapped = TemplateAgent(agent, TemplateMatcher(temp_db), lambda session_id: history)
+    config = {"configurable": {"session_id": "s"}}
+
+    assert "Test Product" in wrapped.invoke({"input": "Top 1 products by revenue"}, config=config)["output"]
+    assert wrapped.invoke({"input": "Why?"}, config=config)["output"] == "from the agent"
+
+    agent.invoke.assert_called_once()
+    assert [m.type for m in history.messages] == ["human", "ai"]
+
+
+def test_matcher_reads_rollups_when_current(temp_db):
+    """Test that template answers come from up-to-date rollups and match the base table."""
+    from src.rollups import refresh_rollups
+    from src.templates import TemplateMatcher
+
+    questions = ["Top 3 products by revenue", "Monthly revenue in USA", "Total revenue for 2024", "How many customers?"]
+    expected = [TemplateMatcher(temp_db, use_rollups=False).answer(q)["output"] for q in questions]
+
+    refresh_rollups(temp_db)
+    matcher = TemplateMatcher(temp_db)
+    assert [matcher.answer(q)["output"] for q in questions] == expected
+    assert matcher.rollup_hits == 4
+
+    # Rows appended after the refresh send the templates back to the transactions table
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.execute(
+            "INSERT INTO transactions VALUES ('126', 'A001', 'Test Product', 1, '2024-02-01', 10.0, 1004, 'UK')"
+        )
+    conn.close()
+    assert matcher.answer("Total revenue")["output"] == "Total revenue was 105.00."
+    assert matcher.rollup_hits == 4
+
+
+def test_matcher_reads_sales_table_when_built(temp_db):
+    """Test that row-level template queries read the pre-cleaned sales table with the same answers."""
+    from src.sales import ensure_sales_table
+    from src.templates import TemplateMatcher
+
+    questions = ["Top 3 products by quantity in USA", "Monthly revenue for 2024", "How many customers in UK for 2024?"]
+    expected = [TemplateMatcher(temp_db, use_sales=False).answer(q)["output"] for q in questions]
+
+    ensure_sales_table(temp_db)
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        # Visible only through the sales table, which proves the answers read it
+        conn.execute("UPDATE sales SET revenue = revenue * 2")
+    conn.close()
+
+    matcher = TemplateMatcher(temp_db)
+    answers = [matcher.answer(q)["output"] for q in questions]
+    assert answers[0] == expected[0] and answers[2] == expected[2]
+    assert answers[1] == "Monthly revenue in 2024:\n2024-01: 190.00"
+    assert expected[1] == "Monthly revenue in 2024:\n2024-01: 95.00"
+
+
+def test_template_agent_answers_off_the_event_loop(temp_db):
+    """Test that async template answers run in a worker thread, not on the event loop."""
+    import asyncio
+    import threading
+
+    from src.templates import TemplateAgent, TemplateMatcher
+
+    class Matcher(TemplateMatcher):
+        def answer(self, question):
+            threads.append(threading.current_thread())
+            return super().answer(question)
+
+    threads = []
+    wrapped = TemplateAgent(Mock(), Matcher(temp_db))
+
+    async def ask():
+        response = await wrapped.ainvoke({"input": "Total revenue"})
+        events = [event async for event in wrapped.astream_events({"input": "Total revenue"})]
+        return response, events
+
+    response, events = asyncio.run(ask())
+    assert response["output"] == "Total revenue was 95.00."
+    assert events[-1]["data"]["output"]["output"] == response["output"]
+    assert threading.main_thread() not in threads and len(threads) == 2
+
+
+def test_template_answers_over_time_budget_fall_back_to_agent(temp_db):
+    """Test that an answer exceeding the time budget is cancelled and left to the agent."""
+    from src.templates import TemplateAgent, TemplateMatcher
+
+    conn = sqlite3.connect(temp_db)
+    with conn:
+        conn.executemany(
+            "INSERT INTO transactions VALUES (?, 'A001', 'Test Product', 1, '2024-02-01', 1.0, 1001, 'USA')",
+            [(str(200 + i),) for i in range(50_000)],
+        )
+    conn.close()
+    agent = Mock()
+    agent.invoke.return_value = {"output": "from the agent"}
+    matcher = TemplateMatcher(temp_db, use_rollups=False, use_sales=False, timeout=1e-9)
+
+    assert TemplateAgent(agent, matcher).invoke({"input": "Total revenue"})["output"] == "from the agent"
+    assert matcher._answers == {}
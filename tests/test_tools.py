@@ -0,0 +1,161 @@
+"""Tests for tools module."""
+
+
+def make_toolkit(db_path, **kwargs):
+    """Build a ChatSQLToolkit over a real SQLite database."""
+    from langchain_community.utilities import SQLDatabase
+    from langchain_core.language_models import FakeListChatModel
+
+    from src.tools import ChatSQLToolkit
+
+    db = SQLDatabase.from_uri(f"sqlite:///{db_path}")
+    return ChatSQLToolkit(db=db, llm=FakeListChatModel(responses=[]), **kwargs)
+
+
+def get_query_tool(toolkit):
+    """Return the sql_db_query tool from a toolkit."""
+    return next(tool for tool in toolkit.get_tools() if tool.name == "sql_db_query")
+
+
+def test_toolkit_without_cache_uses_default_query_tool(temp_db):
+    """Test that the stock query tool is kept when caching is disabled."""
+    from src.tools import ChatQuerySQLDatabaseTool
+
+    tool = get_query_tool(make_toolkit(temp_db))
+    assert not isinstance(tool, ChatQuerySQLDatabaseTool)
+
+
+def test_cached_query_tool_serves_repeated_queries(temp_db):
+    """Test that a repeated query is answered from the cache."""
+    from src.cache import QueryResultCache
+    from src.tools import ChatQuerySQLDatabaseTool
+
+    cache = QueryResultCache()
+    tool = get_query_tool(make_toolkit(temp_db, query_cache=cache))
+    assert isinstance(tool, ChatQuerySQLDatabaseTool)
+    assert tool.name == "sql_db_query"
+
+    first = tool.run("SELECT COUNT(*) FROM transactions")
+    second = tool.run("select count(*) from transactions;")
+
+    assert first == second == "[(3,)]"
+    assert cache.stats()["hits"] == 1
+
+
+def test_cached_query_tool_does_not_cache_errors(temp_db):
+    """Test that SQL errors are returned but not cached."""
+    from src.cache import QueryResultCache
+
+    cache = QueryResultCache()
+    tool = get_query_tool(make_toolkit(temp_db, query_cache=cache))
+
+    result = tool.run("SELECT missing_column FROM transactions")
+    assert result.startswith("Error:")
+    assert len(cache) == 0
+
+
+def test_toolkit_context_prefers_precomputed_schema(temp_db):
+    """Test that get_context returns the precomputed schema without introspecting."""
+    schema_info = {"table_names": "transactions", "table_info": "CREATE TABLE transactions (...)"}
+    toolkit = make_toolkit(temp_db, schema_info=schema_info)
+
+    assert toolkit.get_context() == schema_info
+
+
+def test_query_tool_audits_plans(temp_db, tmp_path):
+    """Test that queries are recorded by the plan auditor when they run, not when answered from the cache."""
+    from src.cache import QueryResultCache
+    from src.indexes import QueryPlanAuditor
+
+    auditor = QueryPlanAuditor(temp_db, str(tmp_path / "plans.jsonl"))
+    tool = get_query_tool(make_toolkit(temp_db, query_cache=QueryResultCache(), plan_auditor=auditor))
+
+    tool.run("SELECT COUNT(*) FROM transactions")
+    tool.run("SELECT COUNT(*) FROM transactions")
+    assert auditor.queries == 1
+
+
+def test_compact_results_and_paging(temp_db):
+    """Test that the formatter shortens results and the page tool returns the rest."""
+    from src.results import ResultFormatter
+
+    toolkit = make_toolkit(temp_db, result_formatter=ResultFormatter(page_rows=2))
+    tools = {tool.name: tool for tool in toolkit.get_tools()}
+    query = "SELECT InvoiceNo, Quantity FROM transactions ORDER BY InvoiceNo"
+
+    first = tools["sql_db_query"].run(query)
+    assert first.splitlines()[:4] == ["InvoiceNo|Quantity", "123|5", "124|3", "-- rows 1-2 of 3"]
+    assert "sql_db_query_page" in first
+
+    second = tools["sql_db_query_page"].run({"query": query, "page": 2})
+    assert second.splitlines() == ["InvoiceNo|Quantity", "125|1", "-- rows 3-3 of 3"]
+
+
+def test_page_tool_reads_the_saved_result(temp_db, tmp_path):
+    """Test that later pages come from the session's saved result without re-running or re-auditing the query."""
+    from unittest.mock import Mock, patch
+
+    from src.guards import QueryGuard
+    from src.indexes import QueryPlanAuditor
+    from src.results import ResultFormatter
+    from src.scratch import ScratchResults
+    from src.tools import ChatQuerySQLDatabaseTool
+
+    auditor = QueryPlanAuditor(temp_db, str(tmp_path / "plans.jsonl"))
+    toolkit = make_toolkit(
+        temp_db,
+        plan_auditor=auditor,
+        query_guard=QueryGuard(),
+        result_formatter=ResultFormatter(page_rows=2),
+        session_results=ScratchResults(),
+    )
+    tools = {tool.name: tool for tool in toolkit.get_tools()}
+    run_manager = Mock(metadata={"session_id": "pages"})
+    query = "SELECT InvoiceNo, Quantity FROM transactions ORDER BY InvoiceNo"
+
+    tools["sql_db_query"]._run(query, run_manager)
+    with patch.object(ChatQuerySQLDatabaseTool, "execute", side_effect=AssertionError("re-ran the query")):
+        second = tools["sql_db_query_page"]._run(query, 2, run_manager)
+
+    assert second.splitlines() == ["InvoiceNo|Quantity", "125|1", "-- rows 3-3 of 3"]
+    assert auditor.queries == 1
+    # Another query, or a session without a saved result, is run again
+    other = "SELECT InvoiceNo FROM transactions ORDER BY InvoiceNo"
+    assert tools["sql_db_query_page"]._run(other, 2, Mock(metadata={"session_id": "none"})).startswith("InvoiceNo\n")
+
+
+def test_query_tool_saves_session_result(temp_db):
+    """Test that complete results are saved for the session and cached results are reused or dropped."""
+    from unittest.mock import Mock
+
+    from src.cache import QueryResultCache
+    from src.guards import QueryGuard
+    from src.scratch import ScratchResults
+
+    results = ScratchResults(max_rows=2)
+    tool = get_query_tool(
+        make_toolkit(
+            temp_db, query_cache=QueryResultCache(1024 * 1024), query_guard=QueryGuard(), session_results=results
+        )
+    )
+    run_manager = Mock(metadata={"session_id": "tools"})
+    by_country = "SELECT Country, COUNT(*) FROM transactions GROUP BY Country"
+    all_rows = "SELECT * FROM transactions"
+
+    tool._run(by_country, run_manager)
+    assert results.source("tools") == by_country
+    tool._run("SELECT nope FROM transactions", run_manager)
+    assert results.source("tools") == by_country
+
+    # Served from the query cache, with the rows copied from the session holding them
+    tool._run(by_country, Mock(metadata={"session_id": "other"}))
+    assert results.source("other") == by_country
+
+    tool._run(all_rows, run_manager)
+    assert results.source("tools") is None
+    tool._run(by_country, run_manager)
+    assert results.source("tools") == by_country
+
+    results.clear()
+    tool._run(by_country, run_manager)
+    assert results.source("tools") is None
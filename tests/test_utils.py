@@ -111,3 +111,36 @@ def test_spinner_multiple_start_stop_cycles():
     time.sleep(0.1)
     spinner.stop()
     assert spinner.running is False
+
+
+def test_background_agent_builds_and_delegates():
+    """Test BackgroundAgent forwards calls to the agent once built."""
+    import threading
+    from unittest.mock import Mock
+
+    from src.utils import BackgroundAgent
+
+    built = threading.Event()
+    agent = Mock()
+    agent.invoke.return_value = {"output": "ok"}
+
+    def factory(name):
+        built.wait(1)
+        return agent
+
+    background = BackgroundAgent(factory, name="test")
+    built.set()
+
+    assert background.invoke({"input": "q"}) == {"output": "ok"}
+    assert background.result() is agent
+
+
+def test_background_agent_reraises_factory_errors():
+    """Test BackgroundAgent.result() raises what the factory raised."""
+    from src.utils import BackgroundAgent
+
+    def factory():
+        raise FileNotFoundError("missing db")
+
+    with pytest.raises(FileNotFoundError):
+        BackgroundAgent(factory).result()